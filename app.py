@@ -1,14 +1,22 @@
 import sys
 
+from src.utils.startup_profiler import profiler
+
 from PyQt5.QtWidgets import QApplication
 
+profiler.mark("导入 PyQt5")
+
 from src.ui.main_window import FileManagementApp
 
+profiler.mark("导入主窗口")
+
 
 def main():
     app = QApplication(sys.argv)
+    profiler.mark("创建应用")
     window = FileManagementApp()
     window.show()
+    profiler.mark("显示窗口")
     sys.exit(app.exec_())
 
 
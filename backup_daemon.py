@@ -0,0 +1,245 @@
+"""无界面的备份服务及其命令行工具
+
+用法:
+    python backup_daemon.py serve [--interval 300]
+    python backup_daemon.py list
+    python backup_daemon.py show NAME
+    python backup_daemon.py add --dest DIR [--name NAME] [--frequency daily|CRON] [--catch-up once|skip]
+                                [--start ...] [--end ...] [--workers 4] [--queue-depth 16]
+                                [--full] [--verify-hash] [--hardlink]
+                                [--repository | --archive zip|tar [--codec zlib|bz2|lzma]] PATH...
+    python backup_daemon.py run NAME
+    python backup_daemon.py pause|resume|cancel NAME
+    python backup_daemon.py remove NAME
+    python backup_daemon.py snapshots BACKUP_DIR
+    python backup_daemon.py restore SNAPSHOT [--target DIR]
+    python backup_daemon.py repo-stats|repo-gc REPOSITORY
+    python backup_daemon.py stop
+
+只导入标准库和备份相关模块，不依赖 PyQt5、PIL 或 numpy
+"""
+import argparse
+import os
+import sys
+from datetime import datetime, timedelta
+
+from src.core.backup_archive import ARCHIVE_CODECS, ARCHIVE_FORMATS, ARCHIVE_ZIP, is_archive, restore_archive
+from src.core.backup_executor import format_progress, format_size
+from src.core.backup_manifest import list_snapshots, load_manifest, restore_snapshot
+from src.core.backup_repository import BackupRepository, RepositoryLocked, is_repository
+from src.core.backup_schedule import CATCH_UP_POLICIES, parse_frequency
+from src.core.backup_service import BackupClient, BackupService, BackupServiceError
+from src.core.backup_task import STORE_ARCHIVE, STORE_FILES, STORE_REPOSITORY, BackupTask
+
+# 备份频率的英文别名
+FREQUENCIES = {
+    'hourly': "每小时",
+    '6h': "每6小时",
+    'daily': "每天",
+    'weekly': "每周",
+    'monthly': "每月",
+}
+
+
+def collect_paths(paths):
+    """展开命令行给出的文件和目录，返回 [{'name', 'path'}, ...]"""
+    files = []
+    for path in paths:
+        path = os.path.abspath(path)
+        if os.path.isdir(path):
+            for root, _dirs, names in os.walk(path):
+                files.extend({'name': name, 'path': os.path.join(root, name)} for name in names)
+        elif os.path.isfile(path):
+            files.append({'name': os.path.basename(path), 'path': path})
+        else:
+            print(f"跳过不存在的路径: {path}")
+    return files
+
+
+def frequency_arg(text):
+    """命令行的备份频率：英文别名、中文名称或 cron 表达式"""
+    frequency = FREQUENCIES.get(text, text)
+    try:
+        parse_frequency(frequency)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+    return frequency
+
+
+def format_task(task):
+    """任务概要的单行显示"""
+    last_backup = task['last_backup'] or "从未"
+    next_run = task['next_run'] or "无"
+    return (f"{task['name']}  {task['frequency']}  {task['file_count']} 个文件  -> {task['backup_dir']}"
+            f"  上次备份: {last_backup}  下次备份: {next_run}  {format_progress(task['progress'])}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="北海融媒文件管理器备份服务")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    serve = subparsers.add_parser('serve', help="在前台运行备份服务")
+    serve.add_argument('--interval', type=int, default=300, help="最长休眠时间（秒），到下一个计划时间前不会更早醒来")
+    serve.add_argument('--port', type=int, default=0, help="控制端口，默认自动选择")
+
+    subparsers.add_parser('list', help="列出备份任务")
+    for name, help_text in (
+        ('show', "查看任务详情"),
+        ('run', "立即执行任务"),
+        ('pause', "暂停正在执行的任务"),
+        ('resume', "继续已暂停的任务"),
+        ('cancel', "取消正在执行的任务"),
+        ('remove', "删除任务"),
+    ):
+        command = subparsers.add_parser(name, help=help_text)
+        command.add_argument('name', help="任务名称")
+
+    add = subparsers.add_parser('add', help="新增备份任务")
+    add.add_argument('paths', nargs='+', help="要备份的文件或目录")
+    add.add_argument('--dest', required=True, help="备份目录")
+    add.add_argument('--name', help="任务名称")
+    add.add_argument('--frequency', default='daily', type=frequency_arg,
+                     help=f"备份频率：{'、'.join(FREQUENCIES)}，或五段式 cron 表达式如 \"30 2 * * 1-5\"")
+    add.add_argument('--catch-up', choices=CATCH_UP_POLICIES, default=CATCH_UP_POLICIES[0],
+                     help="错过的备份（如电脑休眠期间）补做一次，或跳到下一个计划时间")
+    add.add_argument('--start', type=datetime.fromisoformat, help="开始时间，默认为现在")
+    add.add_argument('--end', type=datetime.fromisoformat, help="结束时间，默认为一年后")
+    add.add_argument('--workers', type=int, default=4, help="并发复制的线程数，为 1 时逐个复制")
+    add.add_argument('--queue-depth', type=int, default=16, help="排队等待复制的小文件数上限")
+    add.add_argument('--full', action='store_true', help="每次复制全部文件，不做增量备份")
+    add.add_argument('--verify-hash', action='store_true', help="增量备份时比较文件内容哈希")
+    add.add_argument('--hardlink', action='store_true', help="未改变的文件从上一个快照硬链接，每个快照目录都是完整副本")
+    store = add.add_mutually_exclusive_group()
+    store.add_argument('--repository', action='store_true', help="保存到按内容去重的备份仓库")
+    store.add_argument('--archive', choices=ARCHIVE_FORMATS, help="每次备份保存为一个压缩包")
+    add.add_argument('--codec', choices=list(ARCHIVE_CODECS), default='zlib', help="压缩包的压缩算法")
+
+    snapshots = subparsers.add_parser('snapshots', help="列出备份目录或备份仓库中的快照")
+    snapshots.add_argument('backup_dir', help="备份目录或备份仓库")
+
+    restore = subparsers.add_parser('restore', help="恢复快照中的全部文件")
+    restore.add_argument('snapshot', help="快照目录、压缩包，或备份仓库中的快照索引文件")
+    restore.add_argument('--target', help="恢复到此目录下并保留原目录结构，默认恢复到原位置")
+
+    for name, help_text in (
+        ('repo-stats', "显示备份仓库的去重统计"),
+        ('repo-gc', "删除备份仓库中没有快照引用的数据块"),
+    ):
+        command = subparsers.add_parser(name, help=help_text)
+        command.add_argument('repository', help="备份仓库目录")
+
+    subparsers.add_parser('stop', help="停止备份服务")
+
+    args = parser.parse_args(argv)
+    if args.command == 'serve':
+        BackupService(interval=args.interval, port=args.port).serve_forever()
+        return 0
+    # 快照的查看和恢复直接读取备份目录，不需要备份服务
+    if args.command == 'snapshots':
+        if is_repository(args.backup_dir):
+            repository = BackupRepository(args.backup_dir)
+            for path in repository.list_snapshots():
+                snapshot = repository.load_snapshot(path)
+                size = sum(entry['size'] for entry in snapshot['files'])
+                print(f"{path}  {snapshot['task']}  {len(snapshot['files'])} 个文件 {format_size(size)}")
+            return 0
+        for snapshot in list_snapshots(args.backup_dir):
+            manifest = load_manifest(snapshot) or {'files': []}
+            name = os.path.basename(snapshot)
+            copied = sum(1 for entry in manifest['files'] if entry['snapshot'] == name)
+            print(f"{snapshot}  {len(manifest['files'])} 个文件，本次复制 {copied} 个")
+        for name in sorted(os.listdir(args.backup_dir)):
+            path = os.path.join(args.backup_dir, name)
+            if is_archive(path):
+                print(f"{path}  {format_size(os.path.getsize(path))}")
+        return 0
+    if args.command == 'restore':
+        repository_root = os.path.dirname(os.path.dirname(os.path.abspath(args.snapshot)))
+        if os.path.isfile(args.snapshot) and is_repository(repository_root):
+            restored, failed = BackupRepository(repository_root).restore(args.snapshot, args.target)
+        elif is_archive(args.snapshot):
+            restored, failed = restore_archive(args.snapshot, args.target)
+        elif load_manifest(args.snapshot) is None:
+            print(f"不是备份快照: {args.snapshot}")
+            return 1
+        else:
+            restored, failed = restore_snapshot(args.snapshot, args.target)
+        print(f"已恢复 {restored} 个文件，失败 {failed} 个")
+        return 1 if failed else 0
+    if args.command in ('repo-stats', 'repo-gc'):
+        if not is_repository(args.repository):
+            print(f"不是备份仓库: {args.repository}")
+            return 1
+        repository = BackupRepository(args.repository)
+        if args.command == 'repo-gc':
+            try:
+                removed, freed = repository.gc()
+            except RepositoryLocked as e:
+                print(f"错误: {e}")
+                return 1
+            print(f"已删除 {removed} 个数据块，释放 {format_size(freed)}")
+            return 0
+        stats = repository.stats()
+        print(f"快照: {stats['snapshots']} 个，共 {stats['files']} 个文件 {format_size(stats['logical_bytes'])}")
+        print(f"数据块: {stats['objects']} 个，占用 {format_size(stats['stored_bytes'])}")
+        print(f"去重比: {stats['dedup_ratio']:.2f}")
+        return 0
+
+    client = BackupClient()
+    try:
+        if args.command == 'list':
+            tasks = client.request('list')
+            for task in tasks:
+                print(format_task(task))
+            if not tasks:
+                print("没有备份任务")
+        elif args.command == 'show':
+            task = client.request('show', name=args.name)
+            print(format_task(task))
+            print(f"时间范围: {task['start_time']} ~ {task['end_time']}")
+            for file_info in task['files']:
+                print(f"  {file_info['path']}")
+        elif args.command == 'add':
+            files = collect_paths(args.paths)
+            if not files:
+                print("没有可备份的文件")
+                return 1
+            start = args.start or datetime.now()
+            task = BackupTask(
+                files,
+                os.path.abspath(args.dest),
+                start,
+                args.end or start + timedelta(days=365),
+                args.frequency,
+                args.name,
+                args.workers,
+                args.queue_depth,
+                not args.full,
+                args.verify_hash,
+                STORE_REPOSITORY if args.repository else STORE_ARCHIVE if args.archive else STORE_FILES,
+                args.archive or ARCHIVE_ZIP,
+                args.codec,
+                args.hardlink,
+                args.catch_up
+            )
+            print(format_task(client.request('add', task=task.to_dict())))
+        elif args.command == 'run':
+            if client.request('run', name=args.name):
+                print(f"已开始执行: {args.name}")
+            else:
+                print(f"任务正在执行: {args.name}")
+        elif args.command in ('pause', 'resume', 'cancel'):
+            print(f"{args.name}: {format_progress(client.request(args.command, name=args.name))}")
+        elif args.command == 'remove':
+            print(f"已删除: {client.request('remove', name=args.name)}")
+        elif args.command == 'stop':
+            client.request('stop')
+            print("备份服务正在停止")
+    except BackupServiceError as e:
+        print(f"错误: {e}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
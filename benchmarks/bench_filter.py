@@ -0,0 +1,74 @@
+"""筛选基准测试：在内存中的合成文件树上测量列构建及向量化筛选的耗时
+
+用法: python -m benchmarks.bench_filter [--files 1000000] [--per-dir 1000] [--query "ext:mp4 size>100MB modified<7d"]
+"""
+import argparse
+import random
+import time
+
+from src.core.file_filter import FileColumns, parse_filter
+from src.core.node_store import NodeStore
+
+
+def build_memory_tree(total_files, per_dir, seed=0):
+    """生成内存中的合成文件树，大小和时间随机分布"""
+    rng = random.Random(seed)
+    extensions = ['.mp4', '.jpg', '.docx', '.txt', '.mkv']
+    now = time.time()
+    root = {'name': 'root', 'path': '/root', 'type': 'directory', 'children': []}
+    for dir_index in range(0, total_files, per_dir):
+        dir_path = f"/root/dir_{dir_index // per_dir:05d}"
+        dir_node = {'name': dir_path[6:], 'path': dir_path, 'type': 'directory', 'children': []}
+        root['children'].append(dir_node)
+        for i in range(min(per_dir, total_files - dir_index)):
+            ext = extensions[i % len(extensions)]
+            name = f"file_{i:05d}{ext}"
+            modified = now - rng.random() * 365 * 86400
+            dir_node['children'].append({
+                'name': name,
+                'size': int(rng.paretovariate(1.2) * 1048576),
+                'created': modified,
+                'modified': modified,
+                'path': f"{dir_path}/{name}",
+                'type': 'file',
+                'extension': ext
+            })
+    return root
+
+
+def main():
+    parser = argparse.ArgumentParser(description="筛选基准测试")
+    parser.add_argument('--files', type=int, default=1000000, help="合成文件数量")
+    parser.add_argument('--per-dir', type=int, default=1000, help="每个目录的文件数量")
+    parser.add_argument('--query', default="ext:mp4 size>100MB modified<7d", help="筛选表达式")
+    parser.add_argument('--repeat', type=int, default=5, help="筛选重复次数")
+    args = parser.parse_args()
+
+    print(f"生成内存文件树: {args.files} 个文件 ...")
+    tree = build_memory_tree(args.files, args.per_dir)
+    predicates = parse_filter(args.query)
+
+    start = time.perf_counter()
+    columns = FileColumns.from_tree(tree)
+    build_time = time.perf_counter() - start
+
+    store = NodeStore.from_tree(tree)
+    start = time.perf_counter()
+    store_columns = FileColumns.from_tree(store.root())
+    store_build_time = time.perf_counter() - start
+
+    for label, cols in (("字典树", columns), ("列式存储", store_columns)):
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            count, visible = cols.filter(predicates)
+            timings.append(time.perf_counter() - start)
+        print(f"{label}: 匹配 {count} 个文件, 显示 {len(visible)} 项, "
+              f"筛选最快 {min(timings) * 1000:.1f} 毫秒")
+
+    print(f"构建列(字典树):   {build_time * 1000:.0f} 毫秒（显示新的文件树后构建，之后原地更新）")
+    print(f"构建列(列式存储): {store_build_time * 1000:.1f} 毫秒（直接复用数组）")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""文件树内存占用基准测试：对比字典树与列式存储每个节点的内存
+
+用法: python -m benchmarks.bench_memory [--files 100000] [--per-dir 200]
+"""
+import argparse
+import gc
+import shutil
+import tempfile
+import tracemalloc
+
+from benchmarks.bench_scan import build_synthetic_tree
+from src.core.file_manager import FileManager
+
+
+def measure(func, *args):
+    """返回 func 的结果及其保留的内存字节数"""
+    gc.collect()
+    tracemalloc.start()
+    result = func(*args)
+    gc.collect()
+    current, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current
+
+
+def main():
+    parser = argparse.ArgumentParser(description="文件树内存占用基准测试")
+    parser.add_argument('--files', type=int, default=100000, help="合成文件数量")
+    parser.add_argument('--per-dir', type=int, default=200, help="每个目录的文件数量")
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="bhrm_bench_memory_")
+    try:
+        print(f"生成合成目录树: {args.files} 个文件 ...")
+        build_synthetic_tree(root, args.files, args.per_dir)
+
+        def load_dict_tree():
+            manager = FileManager()
+            manager.load_files_tree(root)
+            return manager
+
+        manager, dict_bytes = measure(load_dict_tree)
+        nodes = len(manager.node_index)
+        del manager
+
+        store, store_bytes = measure(FileManager().load_node_store, root)
+        assert len(store) == nodes, "两种存储的节点数量不一致"
+
+        print(f"节点数量:               {nodes}")
+        print(f"字典树(含路径索引):     {dict_bytes / nodes:8.1f} 字节/节点, 共 {dict_bytes / 1048576:.1f} MB")
+        print(f"列式存储:               {store_bytes / nodes:8.1f} 字节/节点, 共 {store_bytes / 1048576:.1f} MB")
+        print(f"节省:                   {1 - store_bytes / dict_bytes:.0%}")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
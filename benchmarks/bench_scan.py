@@ -0,0 +1,146 @@
+"""目录扫描基准测试：对比 os.walk 旧实现与 os.scandir 单遍扫描
+
+用法: python -m benchmarks.bench_scan [--files 100000] [--per-dir 200] [--workers 8]
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+from src.core.file_manager import FileManager
+
+
+def legacy_load_files_tree(directory):
+    """旧版实现：os.walk + 逐文件 os.stat + 线性查找父节点"""
+    tree = {
+        'name': os.path.basename(directory),
+        'path': directory,
+        'type': 'directory',
+        'children': []
+    }
+
+    def find_parent_node(relative_path):
+        if relative_path == '.':
+            return tree
+        current_node = tree
+        for part in relative_path.split(os.sep)[:-1]:
+            for child in current_node['children']:
+                if child['name'] == part and child['type'] == 'directory':
+                    current_node = child
+                    break
+            else:
+                return None
+        return current_node
+
+    for root, dirs, filenames in os.walk(directory):
+        for dirname in dirs:
+            dir_path = os.path.join(root, dirname)
+            parent_node = find_parent_node(os.path.relpath(dir_path, directory))
+            if parent_node:
+                parent_node['children'].append({
+                    'name': dirname,
+                    'path': dir_path,
+                    'type': 'directory',
+                    'children': []
+                })
+        for filename in filenames:
+            file_path = os.path.join(root, filename)
+            stat = os.stat(file_path)
+            parent_node = find_parent_node(os.path.relpath(file_path, directory))
+            if parent_node:
+                ext = os.path.splitext(filename)[1]
+                parent_node['children'].append({
+                    'name': filename,
+                    'size': stat.st_size,
+                    'created': stat.st_ctime,
+                    'modified': stat.st_mtime,
+                    'path': file_path,
+                    'type': 'file',
+                    'extension': ext if ext else '文件'
+                })
+    return tree
+
+
+def build_synthetic_tree(root, total_files, per_dir):
+    """生成合成目录树：每个目录 per_dir 个文件，目录按两级分组"""
+    extensions = ['.mp4', '.jpg', '.docx', '.txt', '']
+    created = 0
+    dir_index = 0
+    while created < total_files:
+        group = os.path.join(root, f"group_{dir_index // 20:03d}")
+        dir_path = os.path.join(group, f"dir_{dir_index:05d}")
+        os.makedirs(dir_path, exist_ok=True)
+        for i in range(min(per_dir, total_files - created)):
+            ext = extensions[i % len(extensions)]
+            with open(os.path.join(dir_path, f"file_{i:05d}{ext}"), 'wb') as f:
+                f.write(b'x' * (i % 64))
+        created += per_dir
+        dir_index += 1
+
+
+def count_nodes(node):
+    count = 1
+    for child in node.get('children', []):
+        count += count_nodes(child)
+    return count
+
+
+# compute_rollups 给目录节点加上的汇总键，旧实现没有
+ROLLUP_KEYS = ('size', 'file_count', 'newest_modified', 'unloaded_count')
+
+
+def without_rollups(node):
+    """去掉目录节点汇总键后的副本，用于和旧实现比较"""
+    if node['type'] != 'directory':
+        return node
+    projected = {key: value for key, value in node.items() if key not in ROLLUP_KEYS}
+    projected['children'] = [without_rollups(child) for child in node['children']]
+    return projected
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="目录扫描基准测试")
+    parser.add_argument('--files', type=int, default=100000, help="合成文件数量")
+    parser.add_argument('--per-dir', type=int, default=200, help="每个目录的文件数量")
+    parser.add_argument('--workers', type=int, default=0, help="额外测试的并行扫描线程数")
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="bhrm_bench_scan_")
+    try:
+        print(f"生成合成目录树: {args.files} 个文件 ...")
+        build_synthetic_tree(root, args.files, args.per_dir)
+
+        # 预热文件系统缓存，避免首次扫描吃亏
+        FileManager().load_files_tree(root)
+
+        legacy_tree, legacy_time = timed(legacy_load_files_tree, root)
+        new_tree, new_time = timed(FileManager().load_files_tree, root)
+
+        assert legacy_tree == without_rollups(new_tree), "新旧实现生成的树结构不一致"
+        print(f"节点数量:        {count_nodes(new_tree)}")
+        print(f"os.walk 旧实现:  {legacy_time:.3f} s")
+        print(f"scandir 新实现:  {new_time:.3f} s")
+        print(f"加速比:          {legacy_time / new_time:.1f}x")
+
+        if args.workers > 1:
+            manager = FileManager()
+            parallel_tree, parallel_time = timed(
+                manager.load_files_tree, root, args.workers
+            )
+            assert parallel_tree == new_tree, "并行扫描生成的树结构不一致"
+            print(f"并行扫描({args.workers} 线程): {parallel_time:.3f} s")
+            for line in manager.format_scan_stats():
+                print(line)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""排序基准测试：在单个目录下的大量文件上测量文件树模型按列排序的耗时，并校验排序结果
+
+用法: python -m benchmarks.bench_sort [--files 500000]
+"""
+import argparse
+import os
+import time
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PyQt5.QtCore import QCoreApplication, Qt
+
+from benchmarks.bench_filter import build_memory_tree
+from src.core.file_manager import FileManager
+from src.ui.file_tree_model import SORT_KEYS, FileTreeModel
+
+
+def check_order(entry, column, descending):
+    """校验目录中相邻行的排序键顺序"""
+    key = SORT_KEYS[column]
+    keys = [key(entry.child(row).node) for row in range(len(entry.children))]
+    pairs = zip(keys, keys[1:])
+    if descending:
+        return all(a >= b for a, b in pairs)
+    return all(a <= b for a, b in pairs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="排序基准测试")
+    parser.add_argument('--files', type=int, default=500000, help="目录中的文件数量")
+    args = parser.parse_args()
+
+    app = QCoreApplication([])
+    print(f"生成内存文件树: {args.files} 个文件 ...")
+    tree = build_memory_tree(args.files, args.files)
+    model = FileTreeModel(FileManager())
+    model.set_tree(tree)
+    directory = model.index(0, 0, model.root_index())
+    print(f"目录行数: {model.rowCount(directory)}")
+
+    for column, order, label in (
+        (1, Qt.DescendingOrder, "大小 倒序"),
+        (1, Qt.AscendingOrder, "大小 正序"),
+        (2, Qt.DescendingOrder, "创建时间 倒序"),
+        (3, Qt.AscendingOrder, "修改时间 正序"),
+        (0, Qt.AscendingOrder, "文件名 正序"),
+        (0, Qt.DescendingOrder, "文件名 倒序"),
+        (4, Qt.AscendingOrder, "类型 正序"),
+        (1, Qt.DescendingOrder, "大小 倒序(再次)"),
+    ):
+        start = time.perf_counter()
+        model.sort(column, order)
+        elapsed = time.perf_counter() - start
+        correct = check_order(directory.internalPointer(), column, order == Qt.DescendingOrder)
+        print(f"{label}: {elapsed * 1000:.0f} 毫秒, 顺序{'正确' if correct else '错误'}")
+    del app
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""启动基准测试：多次启动程序直到窗口首次绘制，统计耗时并与预算比较
+
+在仓库根目录运行，超出预算时返回非零退出码:
+    python -m benchmarks.bench_startup [--runs 5] [--budget-ms 400]
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PHASE_LINE = re.compile(r"^\s+([\d.]+) ms\s+\(累计\s+([\d.]+) ms\)\s+(.+)$")
+
+
+def run_once():
+    """启动一次程序，返回 (进程总耗时, {阶段: 累计毫秒})"""
+    env = dict(os.environ, BHRM_STARTUP_PROFILE='exit')
+    env.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, os.path.join(ROOT, 'app.py')],
+        cwd=ROOT, env=env, capture_output=True, text=True, timeout=60
+    )
+    elapsed = (time.perf_counter() - start) * 1000
+    phases = {}
+    for line in result.stdout.splitlines():
+        match = PHASE_LINE.match(line)
+        if match:
+            phases[match.group(3)] = float(match.group(2))
+    if not phases:
+        raise RuntimeError(f"没有得到启动耗时报告:\n{result.stdout}\n{result.stderr}")
+    return elapsed, phases
+
+
+def main():
+    parser = argparse.ArgumentParser(description="启动基准测试")
+    parser.add_argument('--runs', type=int, default=5, help="启动次数")
+    parser.add_argument('--budget-ms', type=float, default=400, help="首次绘制的耗时预算（毫秒）")
+    args = parser.parse_args()
+
+    totals = []
+    first_paint = []
+    runs = []
+    for _ in range(args.runs):
+        elapsed, phases = run_once()
+        totals.append(elapsed)
+        first_paint.append(phases.get("首次绘制", max(phases.values())))
+        runs.append(phases)
+
+    print("各阶段累计耗时中位数:")
+    for phase in runs[0]:
+        values = [phases[phase] for phases in runs if phase in phases]
+        print(f"  {statistics.median(values):8.1f} ms  {phase}")
+    paint = statistics.median(first_paint)
+    print(f"首次绘制（进程内）: 中位数 {paint:.1f} ms, 最慢 {max(first_paint):.1f} ms")
+    print(f"进程启动到退出:     中位数 {statistics.median(totals):.1f} ms（含解释器启动和退出）")
+
+    if paint > args.budget_ms:
+        print(f"超出预算 {args.budget_ms:.0f} ms")
+        return 1
+    print(f"在预算 {args.budget_ms:.0f} ms 之内")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
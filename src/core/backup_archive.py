@@ -0,0 +1,252 @@
+import bz2
+import gzip
+import io
+import json
+import lzma
+import os
+import shutil
+import tarfile
+import zipfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime
+
+from src.core.backup_manifest import MANIFEST_NAME, PARTIAL_SUFFIX, SNAPSHOT_PREFIX, restore_path
+
+# 压缩包格式
+ARCHIVE_ZIP = 'zip'
+ARCHIVE_TAR = 'tar'
+ARCHIVE_FORMATS = (ARCHIVE_ZIP, ARCHIVE_TAR)
+
+# 压缩算法 -> (tar 扩展名, zip 压缩方式, 独立压缩一个数据块的函数)
+ARCHIVE_CODECS = {
+    'zlib': ('gz', zipfile.ZIP_DEFLATED, lambda data: gzip.compress(data, compresslevel=6, mtime=0)),
+    'bz2': ('bz2', zipfile.ZIP_BZIP2, lambda data: bz2.compress(data, 9)),
+    'lzma': ('xz', zipfile.ZIP_LZMA, lambda data: lzma.compress(data, preset=6)),
+}
+
+# tar 压缩流按此大小分块并行压缩
+BLOCK_SIZE = 4 * 1024 * 1024
+READ_SIZE = 1024 * 1024
+
+
+def archive_extension(archive_format, codec):
+    if archive_format == ARCHIVE_ZIP:
+        return '.zip'
+    return f".tar.{ARCHIVE_CODECS[codec][0]}"
+
+
+def is_archive(path):
+    """path 是否为已完成的压缩包快照"""
+    if not os.path.isfile(path) or path.endswith(PARTIAL_SUFFIX):
+        return False
+    return path.endswith('.zip') or '.tar.' in os.path.basename(path)
+
+
+class ParallelCompressor:
+    """可写的类文件对象：数据按 BLOCK_SIZE 分块，在线程池中各自独立压缩后按顺序写入 dst
+
+    gzip、bzip2 和 xz 都允许多个独立压缩流首尾相连，tar 等解压工具和 tarfile 的 'r:*' 模式会依次读出
+    （tarfile 的流式模式 'r|*' 只读第一个压缩流），因此单个压缩包也能利用多个线程；
+    排队的数据块不超过 workers * 2 个
+    """
+
+    def __init__(self, dst, compress, workers=4, block_size=BLOCK_SIZE, checkpoint=None):
+        self.dst = dst
+        self.compress = compress
+        # 每写入一个压缩块前调用，用于响应暂停和取消
+        self.checkpoint = checkpoint
+        self.block_size = block_size
+        self.max_pending = workers * 2
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='backup-compress')
+        self.pending = deque()
+        self.buffer = bytearray()
+        self.written = 0
+
+    def write(self, data):
+        self.buffer += data
+        while len(self.buffer) >= self.block_size:
+            self._submit(bytes(self.buffer[:self.block_size]))
+            del self.buffer[:self.block_size]
+        return len(data)
+
+    def close(self):
+        """压缩剩余数据并等待全部写入"""
+        try:
+            if self.buffer:
+                self._submit(bytes(self.buffer))
+                self.buffer = bytearray()
+            while self.pending:
+                self._drain()
+        finally:
+            self.abort()
+
+    def abort(self):
+        """丢弃尚未写入的数据块，不等待正在压缩的块"""
+        self.pending.clear()
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+    def _submit(self, block):
+        self.pending.append(self.pool.submit(self.compress, block))
+        while len(self.pending) > self.max_pending:
+            self._drain()
+
+    def _drain(self):
+        future = self.pending.popleft()
+        # 等待压缩较慢的块时也及时响应暂停和取消
+        while True:
+            if self.checkpoint is not None:
+                self.checkpoint()
+            if wait([future], timeout=0.2).done:
+                break
+        data = future.result()
+        self.dst.write(data)
+        self.written += len(data)
+
+
+class ProgressReader:
+    """包装源文件，每次读取前检查暂停和取消，读取后报告进度"""
+
+    def __init__(self, f, job):
+        self.f = f
+        self.job = job
+
+    def read(self, size=-1):
+        self.job.checkpoint()
+        data = self.f.read(size)
+        self.job.advance(len(data))
+        return data
+
+
+def write_archive(task, job, workers=4):
+    """把任务的全部文件写入一个压缩包快照，返回压缩包路径
+
+    文件直接流式写入压缩包，不在临时目录中暂存；先写入 .partial 文件，完成后再改名。
+    压缩包的第一个成员是清单，记录各文件的原路径，用于恢复
+    """
+    codec = ARCHIVE_CODECS[task.codec]
+    entries = []
+    for file_info in task.files:
+        stat = os.stat(file_info['path'])
+        entries.append({
+            'path': file_info['path'],
+            'name': file_info['name'],
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'arcname': os.path.splitdrive(file_info['path'])[1].lstrip('\\/').replace('\\', '/'),
+        })
+    manifest = json.dumps({
+        'version': 1,
+        'task': task.name,
+        'created': datetime.now().isoformat(),
+        'files': entries,
+    }, ensure_ascii=False, indent=1).encode('utf-8')
+
+    os.makedirs(task.backup_dir, exist_ok=True)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    extension = archive_extension(task.archive_format, task.codec)
+    path = os.path.join(task.backup_dir, f"{SNAPSHOT_PREFIX}{timestamp}{extension}")
+    suffix = 1
+    while os.path.exists(path):
+        path = os.path.join(task.backup_dir, f"{SNAPSHOT_PREFIX}{timestamp}_{suffix}{extension}")
+        suffix += 1
+    partial = path + PARTIAL_SUFFIX
+    job.start(len(entries), sum(entry['size'] for entry in entries))
+    try:
+        with open(partial, 'wb') as dst:
+            if task.archive_format == ARCHIVE_ZIP:
+                _write_zip(dst, entries, manifest, codec[1], job)
+            else:
+                compressor = ParallelCompressor(dst, codec[2], workers, checkpoint=job.checkpoint)
+                try:
+                    _write_tar(compressor, entries, manifest, job)
+                except BaseException:
+                    compressor.abort()
+                    raise
+                compressor.close()
+        job.bytes_stored = os.path.getsize(partial)
+        os.replace(partial, path)
+    except BaseException:
+        try:
+            os.remove(partial)
+        except OSError:
+            pass
+        raise
+    return path
+
+
+def _write_zip(dst, entries, manifest, compress_type, job):
+    # zip 的各成员独立压缩，但 zipfile 只能在写入线程中压缩
+    with zipfile.ZipFile(dst, 'w', compression=compress_type, allowZip64=True) as zf:
+        zf.writestr(MANIFEST_NAME, manifest)
+        for entry in entries:
+            job.begin_file(entry['path'])
+            info = zipfile.ZipInfo.from_file(entry['path'], entry['arcname'])
+            info.compress_type = compress_type
+            with open(entry['path'], 'rb') as src, zf.open(info, 'w') as member:
+                reader = ProgressReader(src, job)
+                while True:
+                    data = reader.read(READ_SIZE)
+                    if not data:
+                        break
+                    member.write(data)
+            job.end_file()
+
+
+def _write_tar(compressor, entries, manifest, job):
+    with tarfile.open(fileobj=compressor, mode='w|', format=tarfile.PAX_FORMAT, copybufsize=READ_SIZE) as tar:
+        info = tarfile.TarInfo(MANIFEST_NAME)
+        info.size = len(manifest)
+        info.mtime = datetime.now().timestamp()
+        tar.addfile(info, io.BytesIO(manifest))
+        for entry in entries:
+            job.begin_file(entry['path'])
+            info = tar.gettarinfo(entry['path'], entry['arcname'])
+            # 以打包开始前记录的大小为准，文件在打包期间被截短时 tarfile 会报错
+            info.size = entry['size']
+            with open(entry['path'], 'rb') as src:
+                tar.addfile(info, ProgressReader(src, job))
+            job.end_file()
+
+
+def restore_archive(path, target_dir=None):
+    """恢复压缩包快照中的全部文件，返回 (恢复数, 失败数)"""
+    restored = failed = 0
+    if path.endswith('.zip'):
+        with zipfile.ZipFile(path) as zf:
+            manifest = json.loads(zf.read(MANIFEST_NAME))
+            for entry in manifest['files']:
+                try:
+                    with zf.open(entry['arcname']) as src:
+                        _restore_member(src, entry, target_dir)
+                    restored += 1
+                except (OSError, KeyError, zipfile.BadZipFile) as e:
+                    print(f"恢复文件失败 {entry['path']}: {e}")
+                    failed += 1
+        return restored, failed
+
+    # 按成员顺序读取，压缩流不需要回退；清单是第一个成员
+    with tarfile.open(path, mode='r:*') as tar:
+        entries = None
+        for member in tar:
+            if entries is None:
+                entries = {entry['arcname']: entry for entry in json.loads(tar.extractfile(member).read())['files']}
+                continue
+            entry = entries.get(member.name)
+            if entry is None or not member.isfile():
+                continue
+            try:
+                _restore_member(tar.extractfile(member), entry, target_dir)
+                restored += 1
+            except OSError as e:
+                print(f"恢复文件失败 {entry['path']}: {e}")
+                failed += 1
+    return restored, failed
+
+
+def _restore_member(src, entry, target_dir):
+    dst_path = restore_path(entry['path'], target_dir)
+    os.makedirs(os.path.dirname(dst_path), exist_ok=True)
+    with open(dst_path, 'wb') as dst:
+        shutil.copyfileobj(src, dst, READ_SIZE)
+    os.utime(dst_path, ns=(entry['mtime_ns'], entry['mtime_ns']))
@@ -0,0 +1,294 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# 备份执行的状态
+PENDING = 'pending'
+RUNNING = 'running'
+PAUSED = 'paused'
+DONE = 'done'
+CANCELLED = 'cancelled'
+FAILED = 'failed'
+
+# 状态的显示名称
+STATE_NAMES = {
+    PENDING: "等待中",
+    RUNNING: "备份中",
+    PAUSED: "已暂停",
+    DONE: "已完成",
+    CANCELLED: "已取消",
+    FAILED: "失败",
+}
+
+
+def format_size(size):
+    """格式化字节数，与 FileManager.format_size 一致，守护进程不必导入 FileManager"""
+    for unit in ['B', 'KB', 'MB', 'GB', 'TB']:
+        if size < 1024.0:
+            return f"{size:.1f} {unit}"
+        size /= 1024.0
+    return f"{size:.1f} PB"
+
+
+def format_stored(bytes_stored, bytes_done):
+    """实际写入的字节数及其占原大小的比例，未统计时返回空字符串"""
+    if not bytes_stored or not bytes_done:
+        return ""
+    return f"实际写入 {format_size(bytes_stored)}（{bytes_stored * 100 / bytes_done:.1f}%）"
+
+
+def format_progress(progress, full_path=True):
+    """BackupJob.status() 的单行显示，命令行和备份管理对话框共用
+
+    progress 为 None 时表示没有执行过；full_path 为 False 时当前文件只显示文件名
+    """
+    if progress is None:
+        return "空闲"
+    text = STATE_NAMES.get(progress['state'], progress['state'])
+    if progress['bytes_total']:
+        percent = progress['bytes_done'] * 100 // progress['bytes_total']
+        text += f" {progress['files_done']}/{progress['files_total']} 个文件 {percent}%"
+        text += f" {format_size(progress['throughput'])}/s"
+        stored = format_stored(progress['bytes_stored'], progress['bytes_done'])
+        if stored:
+            text += f" {stored}"
+    if progress['files_skipped']:
+        text += f" {progress['files_skipped']} 个文件未改变"
+    # 旧版本的备份服务没有这一项
+    if progress.get('files_resumed'):
+        text += f" {progress['files_resumed']} 个文件在上次中断前已复制"
+    if progress['current_file']:
+        current = progress['current_file'] if full_path else os.path.basename(progress['current_file'])
+        text += f" 当前: {current}"
+    if progress['error']:
+        text += f" 错误: {progress['error']}"
+    return text
+
+
+class BackupCancelled(Exception):
+    """备份被取消"""
+
+
+class BackupJob:
+    """一次备份的执行状态：进度、暂停和取消
+
+    备份过程在工作线程中调用 start/advance/checkpoint 更新进度，其他线程调用 pause/resume/cancel 控制
+    """
+
+    def __init__(self, task, on_progress=None, report_interval=0.2):
+        self.task = task
+        self.state = PENDING
+        self.error = None
+        self.files_total = 0
+        self.files_done = 0
+        # 增量备份中未改变、无需复制的文件数
+        self.files_skipped = 0
+        # 上次中断的备份中已复制完成、本次无需再复制的文件数
+        self.files_resumed = 0
+        self.bytes_total = 0
+        self.bytes_done = 0
+        # 实际写入备份位置的字节数（压缩或去重之后），未统计时为 0
+        self.bytes_stored = 0
+        self.current_file = None
+        # 开始复制和结束的时间（time.monotonic），用于计算吞吐量
+        self.started_at = None
+        self.finished_at = None
+        # 并发复制时多个线程同时更新进度
+        self._lock = threading.Lock()
+        # 进度回调 on_progress(job)，在工作线程中调用，至多每 report_interval 秒一次
+        self.on_progress = on_progress
+        self.report_interval = report_interval
+        self._last_report = 0.0
+        self._cancelled = threading.Event()
+        # 未暂停时处于 set 状态
+        self._running = threading.Event()
+        self._running.set()
+        self._finished = threading.Event()
+
+    @property
+    def name(self):
+        return self.task.name
+
+    @property
+    def active(self):
+        """是否尚未结束"""
+        return not self._finished.is_set()
+
+    def pause(self):
+        """暂停备份，当前数据块写完后停下"""
+        if self.active:
+            self._running.clear()
+            self.state = PAUSED
+            self._report(force=True)
+
+    def resume(self):
+        """继续已暂停的备份"""
+        if self.active and not self._running.is_set():
+            self.state = RUNNING
+            self._running.set()
+            self._report(force=True)
+
+    def cancel(self):
+        """取消备份，已暂停的备份也会立即结束"""
+        self._cancelled.set()
+        self._running.set()
+
+    def wait(self, timeout=None):
+        """等待备份结束，返回是否已结束"""
+        return self._finished.wait(timeout)
+
+    # ---- 由执行备份的工作线程调用 ----
+
+    def start(self, files_total, bytes_total, files_skipped=0, files_resumed=0):
+        """开始复制，记录要复制的文件总数和总字节数"""
+        self.files_total = files_total
+        self.files_skipped = files_skipped
+        self.files_resumed = files_resumed
+        self.bytes_total = bytes_total
+        self.started_at = time.monotonic()
+        if self._running.is_set():
+            self.state = RUNNING
+        self._report(force=True)
+
+    def checkpoint(self):
+        """暂停时在此等待，被取消时抛出 BackupCancelled"""
+        if not self._running.is_set():
+            self._running.wait()
+        if self._cancelled.is_set():
+            raise BackupCancelled()
+
+    def begin_file(self, path):
+        self.current_file = path
+        self._report()
+
+    def advance(self, size):
+        """已复制 size 字节"""
+        with self._lock:
+            self.bytes_done += size
+        self._report()
+
+    def end_file(self):
+        with self._lock:
+            self.files_done += 1
+        self._report()
+
+    def finish(self, state, error=None):
+        self.state = state
+        self.error = error
+        self.current_file = None
+        if self.started_at is not None:
+            self.finished_at = time.monotonic()
+        self._finished.set()
+        self._report(force=True)
+
+    def elapsed(self):
+        """已复制的秒数"""
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.monotonic()) - self.started_at
+
+    def throughput(self):
+        """平均吞吐量（字节/秒）"""
+        elapsed = self.elapsed()
+        return self.bytes_done / elapsed if elapsed > 0 else 0.0
+
+    def status(self):
+        """进度信息，可保存为 JSON"""
+        return {
+            'state': self.state,
+            'error': self.error,
+            'files_total': self.files_total,
+            'files_done': self.files_done,
+            'files_skipped': self.files_skipped,
+            'files_resumed': self.files_resumed,
+            'bytes_total': self.bytes_total,
+            'bytes_done': self.bytes_done,
+            'bytes_stored': self.bytes_stored,
+            'current_file': self.current_file,
+            'elapsed': round(self.elapsed(), 3),
+            'throughput': round(self.throughput()),
+        }
+
+    def _report(self, force=False):
+        if self.on_progress is None:
+            return
+        now = time.monotonic()
+        if force or now - self._last_report >= self.report_interval:
+            self._last_report = now
+            try:
+                self.on_progress(self)
+            except Exception as e:
+                print(f"报告备份进度失败: {e}")
+
+
+class BackupExecutor:
+    """在工作线程中执行备份任务，同一任务正在执行时不会再次启动"""
+
+    def __init__(self, workers=2):
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='backup')
+        self._lock = threading.Lock()
+        # 任务名称 -> 最近一次执行
+        self.jobs = {}
+
+    def submit(self, task, on_progress=None, on_finished=None):
+        """提交任务，返回 BackupJob；该任务仍在执行时返回 None
+
+        on_finished(job) 在工作线程中于备份结束后调用
+        """
+        with self._lock:
+            job = self.jobs.get(task.name)
+            if job is not None and job.active:
+                return None
+            job = BackupJob(task, on_progress)
+            self.jobs[task.name] = job
+        self._pool.submit(self._run, job, on_finished)
+        return job
+
+    def job(self, name):
+        """返回任务最近一次执行，没有时返回 None"""
+        with self._lock:
+            return self.jobs.get(name)
+
+    def active_jobs(self):
+        """返回尚未结束的执行"""
+        with self._lock:
+            return [job for job in self.jobs.values() if job.active]
+
+    def forget(self, name):
+        """删除任务时取消其执行并丢弃记录"""
+        with self._lock:
+            job = self.jobs.pop(name, None)
+        if job is not None:
+            job.cancel()
+
+    def shutdown(self, wait=True):
+        """取消所有执行并关闭线程池"""
+        for job in self.active_jobs():
+            job.cancel()
+        self._pool.shutdown(wait=wait)
+
+    def _run(self, job, on_finished):
+        try:
+            job.checkpoint()
+            job.task.execute_backup(job)
+            job.finish(DONE)
+            summary = [
+                f"复制 {job.files_done} 个文件 {format_size(job.bytes_done)}",
+                f"{job.files_skipped} 个文件未改变",
+                f"{job.files_resumed} 个文件在上次中断前已复制" if job.files_resumed else "",
+                format_stored(job.bytes_stored, job.bytes_done),
+                f"用时 {job.elapsed():.1f} 秒",
+                f"{format_size(job.throughput())}/s",
+            ]
+            print(f"备份完成: {job.name}，{'，'.join(part for part in summary if part)}")
+        except BackupCancelled:
+            job.finish(CANCELLED)
+        except Exception as e:
+            print(f"备份失败: {e}")
+            job.finish(FAILED, str(e))
+        if on_finished is not None:
+            try:
+                on_finished(job)
+            except Exception as e:
+                print(f"处理备份结果失败: {e}")
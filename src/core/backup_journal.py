@@ -0,0 +1,145 @@
+import json
+import os
+import threading
+from datetime import datetime
+
+from src.core.backup_manifest import PARTIAL_SUFFIX, SNAPSHOT_PREFIX, snapshot_key
+
+# 未完成的快照目录中的检查点日志
+JOURNAL_NAME = "journal.jsonl"
+
+
+class BackupJournal:
+    """一次普通文件备份的检查点日志，每行一条 JSON 记录，只追加写入，线程安全
+
+    第一行记录任务名和快照名；之后每复制完一个文件记一行，大文件每落盘一个检查点也记一行已完成的偏移。
+    记录中的大小和修改时间是复制前源文件的状态，继续时源文件已改变的记录作废。
+    每条记录一次写入，进程崩溃或断电时最多丢失最后一条不完整的记录
+    """
+
+    def __init__(self, snapshot_dir, task_name=None, snapshot=None):
+        self.snapshot_dir = snapshot_dir
+        self.path = os.path.join(snapshot_dir, JOURNAL_NAME)
+        self.task_name = task_name
+        self.snapshot = snapshot
+        # 存储的文件名 -> 记录，同一文件以最后一条为准
+        self.records = {}
+        # 本次要复制的 目标路径 -> (大小, 修改时间, 继续复制的偏移)
+        self._expected = {}
+        self._lock = threading.Lock()
+        if os.path.exists(self.path):
+            self._load()
+        self._fd = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        if os.fstat(self._fd).st_size == 0:
+            self._append({'version': 1, 'task': task_name, 'snapshot': snapshot,
+                          'created': datetime.now().isoformat()})
+
+    def _load(self):
+        with open(self.path, 'r', encoding='utf-8') as f:
+            lines = f.read().splitlines()
+        for i, line in enumerate(lines):
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # 崩溃时写了一半的记录
+                continue
+            if i == 0:
+                self.task_name = record.get('task')
+                self.snapshot = record.get('snapshot')
+            elif 'stored' in record:
+                self.records[record['stored']] = record
+
+    def resume_offset(self, dst_path, size, mtime_ns):
+        """目标文件可以从哪里继续复制：已完整复制时返回 None，否则返回偏移（从头复制为 0）"""
+        record = self.records.get(os.path.basename(dst_path))
+        if record is None or record['size'] != size or record['mtime_ns'] != mtime_ns:
+            return 0
+        try:
+            stat = os.stat(dst_path)
+        except OSError:
+            return 0
+        offset = record.get('offset')
+        if offset is None:
+            # 复制完成时目标文件的修改时间已设为源文件的修改时间
+            return None if stat.st_size == size and stat.st_mtime_ns == mtime_ns else 0
+        return offset if stat.st_size >= offset else 0
+
+    def expect(self, dst_path, size, mtime_ns, offset=0):
+        """登记本次要复制的文件、复制前源文件的状态和从哪里继续复制"""
+        self._expected[dst_path] = (size, mtime_ns, offset)
+
+    def offset(self, dst_path):
+        return self._expected[dst_path][2]
+
+    def checkpoint(self, dst_path, offset):
+        """大文件的 offset 之前已经落盘"""
+        self._record(dst_path, offset=offset)
+
+    def done(self, dst_path):
+        """文件已完整复制"""
+        self._record(dst_path)
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def commit(self, snapshot_dir):
+        """数据和清单落盘后提交快照：把未完成的目录原子地改名为正式的快照名，再删除日志
+
+        改名之前中断时下次备份从日志继续；改名之后中断只会在完整的快照中留下日志文件
+        """
+        self.close()
+        sync_path(self.snapshot_dir)
+        os.rename(self.snapshot_dir, snapshot_dir)
+        sync_path(os.path.dirname(os.path.abspath(snapshot_dir)))
+        os.remove(os.path.join(snapshot_dir, JOURNAL_NAME))
+
+    def _record(self, dst_path, **extra):
+        size, mtime_ns, _offset = self._expected[dst_path]
+        self._append(dict({'stored': os.path.basename(dst_path), 'size': size, 'mtime_ns': mtime_ns}, **extra))
+
+    def _append(self, record):
+        line = (json.dumps(record, ensure_ascii=False) + "\n").encode('utf-8')
+        with self._lock:
+            os.write(self._fd, line)
+
+
+def find_partial(backup_dir, task_name):
+    """返回该任务最近一个未完成的快照目录，没有时返回 None"""
+    try:
+        names = os.listdir(backup_dir)
+    except OSError:
+        return None
+    for name in sorted(names, key=snapshot_key, reverse=True):
+        if not (name.startswith(SNAPSHOT_PREFIX) and name.endswith(PARTIAL_SUFFIX)):
+            continue
+        path = os.path.join(backup_dir, name, JOURNAL_NAME)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                header = json.loads(f.readline())
+        except (OSError, ValueError):
+            continue
+        if header.get('task') == task_name:
+            return os.path.join(backup_dir, name)
+    return None
+
+
+def sync_path(path):
+    """把文件或目录落盘
+
+    Windows 上不能打开目录，只有可写打开的文件才能落盘，目录和只读文件跳过
+    """
+    if os.name == 'nt':
+        if os.path.isdir(path):
+            return
+        try:
+            fd = os.open(path, os.O_RDWR)
+        except PermissionError:
+            return
+    else:
+        fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
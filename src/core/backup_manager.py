@@ -1,17 +1,100 @@
 from datetime import datetime
 
+from src.core.backup_executor import CANCELLED, DONE, BackupExecutor
+from src.core.backup_schedule import RETRY_DELAY, BackupScheduler
+
 
 class BackupManager:
-    def __init__(self):
+    def __init__(self, executor=None):
         self.backup_tasks = []
-        
+        # 备份在执行器的工作线程中进行，不阻塞调用线程
+        self.executor = executor if executor is not None else BackupExecutor()
+        # 按下一次执行时间排列的任务
+        self.scheduler = BackupScheduler()
+        # 进度回调 on_progress(job) 和结束回调 on_finished(job)，在工作线程中调用
+        self.on_progress = None
+        self.on_finished = None
+        # 计划改变、最早到期时间可能提前时调用 on_schedule_changed()，可能在工作线程中调用
+        self.on_schedule_changed = None
+
     def add_task(self, task):
         """添加备份任务"""
         self.backup_tasks.append(task)
-        
-    def execute_tasks(self):
-        """执行所有备份任务"""
-        current_time = datetime.now()
-        for task in self.backup_tasks:
-            if task.should_backup(current_time):
-                task.execute_backup()
\ No newline at end of file
+        self._schedule(task)
+
+    def remove_task(self, index):
+        """删除备份任务，正在执行的备份会被取消"""
+        task = self.backup_tasks.pop(index)
+        self.scheduler.unschedule(task)
+        self.executor.forget(task.name)
+
+    def execute_tasks(self, now=None):
+        """启动所有到期的备份任务，返回距下一个任务到期的秒数，没有计划时返回 None
+
+        只取出优先队列中已到期的任务，正在执行的任务不会重复启动，结束后再计划下一次
+        """
+        now = now or datetime.now()
+        for task in self.scheduler.pop_due(now):
+            self.run_task(task)
+        return self.seconds_until_next(now)
+
+    def seconds_until_next(self, now=None):
+        """距最早的任务到期的秒数，没有计划时返回 None"""
+        due = self.scheduler.next_due()
+        if due is None:
+            return None
+        return max((due - (now or datetime.now())).total_seconds(), 0.0)
+
+    def next_run(self, task):
+        """任务的下一次计划执行时间，正在执行或不再执行时返回 None"""
+        return self.scheduler.due_time(task)
+
+    def run_task(self, task):
+        """立即在后台执行任务，返回 BackupJob；任务正在执行时返回 None"""
+        return self.executor.submit(task, self.on_progress, self._finished)
+
+    def job_status(self, name):
+        """任务最近一次执行的进度信息，没有执行过时返回 None"""
+        job = self.executor.job(name)
+        return job.status() if job is not None else None
+
+    def pause_task(self, name):
+        """暂停任务的执行"""
+        job = self.executor.job(name)
+        if job is not None:
+            job.pause()
+
+    def resume_task(self, name):
+        """继续任务的执行"""
+        job = self.executor.job(name)
+        if job is not None:
+            job.resume()
+
+    def cancel_task(self, name):
+        """取消任务的执行"""
+        job = self.executor.job(name)
+        if job is not None:
+            job.cancel()
+
+    def shutdown(self):
+        """取消所有正在执行的备份并等待工作线程结束"""
+        self.executor.shutdown()
+
+    def _finished(self, job):
+        # 已删除的任务不再计划
+        if any(task is job.task for task in self.backup_tasks):
+            now = datetime.now()
+            if job.state == DONE:
+                self._schedule(job.task, now)
+            elif job.state == CANCELLED:
+                # 取消的这一次不再补做，从现在起计算下一次
+                self._schedule(job.task, now, base=now)
+            else:
+                self._schedule(job.task, now, not_before=now + RETRY_DELAY)
+        if self.on_finished is not None:
+            self.on_finished(job)
+
+    def _schedule(self, task, now=None, base=None, not_before=None):
+        self.scheduler.schedule(task, now, base, not_before)
+        if self.on_schedule_changed is not None:
+            self.on_schedule_changed()
@@ -0,0 +1,132 @@
+import hashlib
+import json
+import os
+from datetime import datetime
+
+from src.core.copy_engine import copy_file
+
+# 每个备份快照目录中的清单文件
+MANIFEST_NAME = "manifest.json"
+SNAPSHOT_PREFIX = "backup_"
+# 尚未完成的快照目录或压缩包带此后缀，完成后改名去掉
+PARTIAL_SUFFIX = ".partial"
+
+
+def file_hash(path, chunk_size=1024 * 1024):
+    """计算文件内容的 SHA-256"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def snapshot_key(name):
+    """快照目录名 backup_<日期>_<时间>[_<序号>] 的排序键，同一秒内的快照按序号排列"""
+    parts = name[len(SNAPSHOT_PREFIX):].split('_')
+    suffix = int(parts[2]) if len(parts) > 2 and parts[2].isdigit() else 0
+    return parts[:2], suffix
+
+
+def list_snapshots(backup_dir):
+    """返回备份目录中带清单的快照目录，按时间从旧到新排列"""
+    try:
+        names = os.listdir(backup_dir)
+    except OSError:
+        return []
+    return [
+        os.path.join(backup_dir, name)
+        for name in sorted(names, key=snapshot_key)
+        if name.startswith(SNAPSHOT_PREFIX) and not name.endswith(PARTIAL_SUFFIX)
+        and os.path.isfile(os.path.join(backup_dir, name, MANIFEST_NAME))
+    ]
+
+
+def latest_snapshot(backup_dir, task_name=None):
+    """返回最近一次完成的快照目录，指定 task_name 时只找该任务的快照，没有时返回 None"""
+    for snapshot in reversed(list_snapshots(backup_dir)):
+        if task_name is None:
+            return snapshot
+        manifest = load_manifest(snapshot)
+        if manifest is not None and manifest.get('task') == task_name:
+            return snapshot
+    return None
+
+
+def load_manifest(snapshot_dir):
+    """读取快照清单，读取失败时返回 None"""
+    try:
+        with open(os.path.join(snapshot_dir, MANIFEST_NAME), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"读取备份清单失败: {e}")
+        return None
+
+
+def write_manifest(snapshot_dir, task_name, entries):
+    """写入快照清单，先写临时文件再替换，未写完的清单不会被当作完整快照"""
+    manifest = {
+        'version': 1,
+        'task': task_name,
+        'created': datetime.now().isoformat(),
+        'files': entries,
+    }
+    path = os.path.join(snapshot_dir, MANIFEST_NAME)
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(path + '.tmp', path)
+
+
+def manifest_index(snapshot_dir):
+    """上一个快照中 源路径 -> 清单条目，只保留数据文件仍然存在的条目"""
+    if snapshot_dir is None:
+        return {}
+    manifest = load_manifest(snapshot_dir)
+    if manifest is None:
+        return {}
+    backup_dir = os.path.dirname(snapshot_dir)
+    index = {}
+    for entry in manifest.get('files', []):
+        if os.path.exists(os.path.join(backup_dir, entry['snapshot'], entry['stored'])):
+            index[entry['path']] = entry
+    return index
+
+
+def is_unchanged(entry, size, mtime_ns, digest=None):
+    """文件与清单条目相比是否未改变，digest 为 None 时只比较大小和修改时间"""
+    if entry is None or entry['size'] != size or entry['mtime_ns'] != mtime_ns:
+        return False
+    return digest is None or entry.get('hash') == digest
+
+
+def restore_path(path, target_dir=None):
+    """文件恢复到的位置：不指定 target_dir 时恢复到原位置，否则在 target_dir 下保留原目录结构"""
+    if target_dir is None:
+        return path
+    relative = os.path.splitdrive(path)[1].lstrip('\\/')
+    return os.path.join(target_dir, relative)
+
+
+def restore_snapshot(snapshot_dir, target_dir=None):
+    """恢复快照中的全部文件，包括引用之前快照的未改变文件，返回 (恢复数, 失败数)"""
+    manifest = load_manifest(snapshot_dir)
+    if manifest is None:
+        return 0, 0
+    backup_dir = os.path.dirname(os.path.abspath(snapshot_dir))
+    restored = failed = 0
+    for entry in manifest.get('files', []):
+        data_path = os.path.join(backup_dir, entry['snapshot'], entry['stored'])
+        dst_path = restore_path(entry['path'], target_dir)
+        try:
+            os.makedirs(os.path.dirname(dst_path), exist_ok=True)
+            copy_file(data_path, dst_path)
+            restored += 1
+        except OSError as e:
+            print(f"恢复文件失败 {entry['path']}: {e}")
+            failed += 1
+    return restored, failed
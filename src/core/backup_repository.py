@@ -0,0 +1,277 @@
+import hashlib
+import json
+import os
+import uuid
+from datetime import datetime
+
+from src.core.backup_manifest import is_unchanged, restore_path
+
+# 仓库根目录中的标记文件、对象目录、快照索引目录和锁目录
+REPOSITORY_FILE = "repository.json"
+OBJECTS_DIR = "objects"
+SNAPSHOTS_DIR = "snapshots"
+LOCKS_DIR = "locks"
+GC_LOCK = "gc"
+
+# 大文件按固定大小切块，各块分别去重
+CHUNK_SIZE = 4 * 1024 * 1024
+
+
+class RepositoryLocked(Exception):
+    """备份与垃圾回收不能同时进行"""
+
+
+def is_repository(path):
+    """path 是否为去重备份仓库"""
+    return os.path.isfile(os.path.join(path, REPOSITORY_FILE))
+
+
+class BackupRepository:
+    """按内容寻址的去重备份仓库
+
+    文件按 CHUNK_SIZE 切块，每块以 SHA-256 为名保存在 objects/ 下，相同内容只保存一次，
+    不论来自哪次备份或哪个任务。每次备份在 snapshots/ 下写一个索引，记录各文件的块列表
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.objects_dir = os.path.join(root, OBJECTS_DIR)
+        self.snapshots_dir = os.path.join(root, SNAPSHOTS_DIR)
+        self.locks_dir = os.path.join(root, LOCKS_DIR)
+
+    def init(self):
+        """创建仓库目录结构，已存在时不做改动"""
+        for path in (self.objects_dir, self.snapshots_dir, self.locks_dir):
+            os.makedirs(path, exist_ok=True)
+        marker = os.path.join(self.root, REPOSITORY_FILE)
+        if not os.path.exists(marker):
+            with open(marker, 'w', encoding='utf-8') as f:
+                json.dump({'version': 1, 'chunk_size': CHUNK_SIZE}, f)
+
+    # ---- 对象 ----
+
+    def object_path(self, digest):
+        return os.path.join(self.objects_dir, digest[:2], digest[2:])
+
+    def put_object(self, data):
+        """保存一个数据块，返回 (哈希, 是否新写入)"""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.object_path(digest)
+        if os.path.exists(path):
+            return digest, False
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # 先写临时文件并落盘再改名，崩溃或断电时不会留下不完整的对象（已存在的对象不会再写入）
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        return digest, True
+
+    def iter_objects(self, temporary=False):
+        """遍历 (哈希, 路径)；temporary 时改为遍历中断留下的临时文件，哈希为 None"""
+        try:
+            prefixes = os.listdir(self.objects_dir)
+        except OSError:
+            return
+        for prefix in prefixes:
+            directory = os.path.join(self.objects_dir, prefix)
+            for name in os.listdir(directory):
+                if name.endswith('.tmp') != temporary:
+                    continue
+                yield None if temporary else prefix + name, os.path.join(directory, name)
+
+    def store_file(self, path, job):
+        """按块保存文件，返回 (块哈希列表, 新写入的字节数)，每块之前检查暂停和取消"""
+        chunks = []
+        written = 0
+        with open(path, 'rb') as f:
+            while True:
+                job.checkpoint()
+                data = f.read(CHUNK_SIZE)
+                if not data:
+                    break
+                digest, new = self.put_object(data)
+                chunks.append(digest)
+                if new:
+                    written += len(data)
+                job.advance(len(data))
+        return chunks, written
+
+    # ---- 快照 ----
+
+    def list_snapshots(self):
+        """返回快照索引文件，按时间从旧到新排列"""
+        try:
+            names = [name for name in os.listdir(self.snapshots_dir) if name.endswith('.json')]
+        except OSError:
+            return []
+        # 索引文件名以创建时间开头
+        return [os.path.join(self.snapshots_dir, name) for name in sorted(names)]
+
+    def load_snapshot(self, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def latest_snapshot(self, task_name):
+        """任务最近一次快照的索引，没有时返回 None"""
+        for path in reversed(self.list_snapshots()):
+            snapshot = self.load_snapshot(path)
+            if snapshot.get('task') == task_name:
+                return snapshot
+        return None
+
+    def write_snapshot(self, task_name, entries):
+        """写入快照索引，返回索引文件路径"""
+        created = datetime.now()
+        name = f"{created.strftime('%Y%m%d_%H%M%S_%f')}_{uuid.uuid4().hex[:8]}.json"
+        path = os.path.join(self.snapshots_dir, name)
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump({'version': 1, 'task': task_name, 'created': created.isoformat(), 'files': entries},
+                      f, ensure_ascii=False, indent=1)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(path + '.tmp', path)
+        return path
+
+    def backup(self, task, job):
+        """把任务的文件保存到仓库并写入快照，返回快照索引路径
+
+        与该任务上一个快照相比大小和修改时间都未改变的文件直接沿用其块列表，不再读取
+        """
+        self.init()
+        lock = self._acquire_backup_lock()
+        try:
+            previous = self.latest_snapshot(task.name) if task.incremental else None
+            previous = {entry['path']: entry for entry in previous['files']} if previous else {}
+
+            entries = []
+            pending = []
+            for file_info in task.files:
+                stat = os.stat(file_info['path'])
+                entry = previous.get(file_info['path'])
+                if is_unchanged(entry, stat.st_size, stat.st_mtime_ns) and self._has_objects(entry['chunks']):
+                    entries.append(dict(entry, name=file_info['name']))
+                else:
+                    pending.append((file_info, stat))
+
+            job.start(len(pending), sum(stat.st_size for _info, stat in pending), len(entries))
+            for file_info, stat in pending:
+                job.begin_file(file_info['path'])
+                chunks, written = self.store_file(file_info['path'], job)
+                job.bytes_stored += written
+                entries.append({
+                    'path': file_info['path'],
+                    'name': file_info['name'],
+                    'size': stat.st_size,
+                    'mtime_ns': stat.st_mtime_ns,
+                    'chunks': chunks,
+                })
+                job.end_file()
+            return self.write_snapshot(task.name, entries)
+        finally:
+            os.remove(lock)
+
+    def remove_snapshot(self, path):
+        """删除快照索引，其数据块在下次垃圾回收时释放"""
+        os.remove(path)
+
+    def restore(self, snapshot_path, target_dir=None, verify=True):
+        """恢复快照中的全部文件，返回 (恢复数, 失败数)"""
+        snapshot = self.load_snapshot(snapshot_path)
+        restored = failed = 0
+        for entry in snapshot['files']:
+            dst_path = restore_path(entry['path'], target_dir)
+            try:
+                os.makedirs(os.path.dirname(dst_path), exist_ok=True)
+                with open(dst_path, 'wb') as dst:
+                    for digest in entry['chunks']:
+                        with open(self.object_path(digest), 'rb') as src:
+                            data = src.read()
+                        if verify and hashlib.sha256(data).hexdigest() != digest:
+                            raise OSError(f"数据块已损坏: {digest}")
+                        dst.write(data)
+                os.utime(dst_path, ns=(entry['mtime_ns'], entry['mtime_ns']))
+                restored += 1
+            except OSError as e:
+                print(f"恢复文件失败 {entry['path']}: {e}")
+                failed += 1
+        return restored, failed
+
+    # ---- 维护 ----
+
+    def referenced_objects(self):
+        """所有快照引用的块哈希"""
+        referenced = set()
+        for path in self.list_snapshots():
+            for entry in self.load_snapshot(path)['files']:
+                referenced.update(entry['chunks'])
+        return referenced
+
+    def gc(self):
+        """删除没有快照引用的块和中断留下的临时文件，返回 (删除的块数, 释放字节数)
+
+        有备份正在写入时抛出 RepositoryLocked
+        """
+        lock = os.path.join(self.locks_dir, GC_LOCK)
+        try:
+            fd = os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            raise RepositoryLocked("仓库正在进行垃圾回收")
+        os.close(fd)
+        try:
+            if any(name != GC_LOCK for name in os.listdir(self.locks_dir)):
+                raise RepositoryLocked("有备份正在写入仓库")
+            referenced = self.referenced_objects()
+            removed = freed = 0
+            for digest, path in list(self.iter_objects()):
+                if digest in referenced:
+                    continue
+                freed += os.path.getsize(path)
+                os.remove(path)
+                removed += 1
+            for _digest, path in list(self.iter_objects(temporary=True)):
+                freed += os.path.getsize(path)
+                os.remove(path)
+            return removed, freed
+        finally:
+            os.remove(lock)
+
+    def stats(self):
+        """仓库统计：快照数、各快照文件总大小、实际保存的块数和大小、去重比"""
+        logical = 0
+        files = 0
+        snapshots = self.list_snapshots()
+        for path in snapshots:
+            for entry in self.load_snapshot(path)['files']:
+                logical += entry['size']
+                files += 1
+        objects = stored = 0
+        for _digest, path in self.iter_objects():
+            objects += 1
+            stored += os.path.getsize(path)
+        return {
+            'snapshots': len(snapshots),
+            'files': files,
+            'logical_bytes': logical,
+            'objects': objects,
+            'stored_bytes': stored,
+            'dedup_ratio': logical / stored if stored else 0.0,
+        }
+
+    def _has_objects(self, chunks):
+        return all(os.path.exists(self.object_path(digest)) for digest in chunks)
+
+    def _acquire_backup_lock(self):
+        """登记正在进行的备份；备份和 gc 都是先登记再检查对方，两者不会同时进行
+
+        进程异常退出留下的锁文件会阻止 gc，确认没有备份在运行后可删除 locks/ 下的文件
+        """
+        lock = os.path.join(self.locks_dir, f"backup-{os.getpid()}-{uuid.uuid4().hex}")
+        with open(lock, 'w'):
+            pass
+        if os.path.exists(os.path.join(self.locks_dir, GC_LOCK)):
+            os.remove(lock)
+            raise RepositoryLocked("仓库正在进行垃圾回收")
+        return lock
@@ -0,0 +1,197 @@
+import heapq
+import itertools
+import threading
+from datetime import datetime, timedelta
+
+# 固定频率 -> 间隔
+FREQUENCY_INTERVALS = {
+    "每小时": timedelta(hours=1),
+    "每6小时": timedelta(hours=6),
+    "每天": timedelta(days=1),
+    "每周": timedelta(weeks=1),
+    "每月": timedelta(days=30),
+}
+
+# cron 表达式的常用别名
+CRON_ALIASES = {
+    '@hourly': '0 * * * *',
+    '@daily': '0 0 * * *',
+    '@weekly': '0 0 * * 0',
+    '@monthly': '0 0 1 * *',
+}
+
+# 错过的备份（如电脑休眠期间）：补做一次，或跳到下一个计划时间
+CATCH_UP_ONCE = 'once'
+CATCH_UP_SKIP = 'skip'
+CATCH_UP_POLICIES = (CATCH_UP_ONCE, CATCH_UP_SKIP)
+
+# 到期后超过这个时间才开始的备份算作错过
+MISSED_GRACE = timedelta(minutes=5)
+# 失败的任务在这之后重试
+RETRY_DELAY = timedelta(minutes=5)
+
+
+class CronExpression:
+    """五段式 cron 表达式：分 时 日 月 星期，支持 *、列表、范围和步长，星期 0 和 7 都表示周日
+
+    与 cron 相同，日和星期都不是 * 时满足其一即可
+    """
+
+    FIELDS = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+
+    def __init__(self, text):
+        self.text = text
+        fields = CRON_ALIASES.get(text.strip(), text).split()
+        if len(fields) != 5:
+            raise ValueError(f"cron 表达式应有 5 段: {text}")
+        self.minutes, self.hours, self.days, self.months, weekdays = (
+            parse_field(field, low, high) for field, (low, high) in zip(fields, self.FIELDS)
+        )
+        self.weekdays = {day % 7 for day in weekdays}
+        self.any_day = fields[2] == '*'
+        self.any_weekday = fields[4] == '*'
+
+    def matches_day(self, time):
+        day = time.day in self.days
+        # datetime.weekday() 中周一为 0，cron 中周日为 0
+        weekday = (time.weekday() + 1) % 7 in self.weekdays
+        if self.any_day or self.any_weekday:
+            return day and weekday
+        return day or weekday
+
+    def next_after(self, time):
+        """time 之后（不含）第一个满足表达式的时间，五年内没有时返回 None"""
+        time = time.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = time + timedelta(days=366 * 5)
+        while time < limit:
+            if time.month not in self.months:
+                year, month = divmod(time.month, 12)
+                time = time.replace(year=time.year + year, month=month + 1, day=1, hour=0, minute=0)
+            elif not self.matches_day(time):
+                time = time.replace(hour=0, minute=0) + timedelta(days=1)
+            elif time.hour not in self.hours:
+                time = time.replace(minute=0) + timedelta(hours=1)
+            elif time.minute not in self.minutes:
+                time += timedelta(minutes=1)
+            else:
+                return time
+        return None
+
+
+def parse_field(field, low, high):
+    """解析 cron 表达式的一段，返回允许的取值集合"""
+    values = set()
+    for part in field.split(','):
+        value_range, _, step = part.partition('/')
+        try:
+            step = int(step) if step else 1
+            if value_range == '*':
+                start, end = low, high
+            elif '-' in value_range:
+                start, end = (int(value) for value in value_range.split('-', 1))
+            else:
+                start = int(value_range)
+                end = high if step > 1 else start
+        except ValueError:
+            raise ValueError(f"无法识别的 cron 字段: {part}")
+        if not (low <= start <= end <= high) or step < 1:
+            raise ValueError(f"cron 字段超出范围: {part}")
+        values.update(range(start, end + 1, step))
+    return values
+
+
+def parse_frequency(frequency):
+    """返回固定间隔 timedelta 或 CronExpression，无法识别时抛出 ValueError"""
+    if frequency in FREQUENCY_INTERVALS:
+        return FREQUENCY_INTERVALS[frequency]
+    return CronExpression(frequency)
+
+
+def next_run(task, now, base=None):
+    """任务下一次应执行的时间，已过结束时间或频率无效时返回 None
+
+    base 为计算下一次时间的起点，默认为上次备份时间。到期时间早于 now 超过 MISSED_GRACE 时按任务的
+    catch_up 处理：补做一次（立即执行）或跳到 now 之后的下一个计划时间
+    """
+    if now > task.end_time:
+        return None
+    try:
+        schedule = parse_frequency(task.frequency)
+    except ValueError:
+        return None
+    base = base or task.last_backup
+    if isinstance(schedule, timedelta):
+        due = task.start_time if base is None else max(base + schedule, task.start_time)
+        if task.catch_up == CATCH_UP_SKIP and now - due > MISSED_GRACE:
+            # 跳到宽限期内的第一个计划时间
+            due += schedule * -((due - now + MISSED_GRACE) // schedule)
+    else:
+        earliest = task.start_time - timedelta(minutes=1)
+        due = schedule.next_after(max(base, earliest) if base is not None else earliest)
+        if due is not None and task.catch_up == CATCH_UP_SKIP and now - due > MISSED_GRACE:
+            due = schedule.next_after(now - timedelta(minutes=1))
+    if due is None or due > task.end_time:
+        return None
+    return due
+
+
+class BackupScheduler:
+    """按下一次执行时间排列任务的优先队列，线程安全
+
+    取出到期任务和查看最早到期时间都只看堆顶，与任务总数无关；重新计划时旧条目标记为无效，在堆顶时丢弃
+    """
+
+    def __init__(self):
+        self._heap = []
+        # id(task) -> [到期时间, 序号, 任务, 是否有效]
+        self._entries = {}
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+
+    def schedule(self, task, now=None, base=None, not_before=None):
+        """计算任务的下一次执行时间并放入队列，返回该时间；不再执行时返回 None"""
+        now = now or datetime.now()
+        due = next_run(task, now, base)
+        if due is not None and not_before is not None:
+            due = max(due, not_before)
+        with self._lock:
+            self._invalidate(task)
+            if due is None:
+                return None
+            entry = [due, next(self._counter), task, True]
+            self._entries[id(task)] = entry
+            heapq.heappush(self._heap, entry)
+        return due
+
+    def unschedule(self, task):
+        with self._lock:
+            self._invalidate(task)
+
+    def pop_due(self, now):
+        """取出所有到期的任务"""
+        tasks = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                due, _seq, task, valid = heapq.heappop(self._heap)
+                if valid:
+                    del self._entries[id(task)]
+                    tasks.append(task)
+        return tasks
+
+    def next_due(self):
+        """最早的到期时间，没有计划时返回 None"""
+        with self._lock:
+            while self._heap and not self._heap[0][3]:
+                heapq.heappop(self._heap)
+            return self._heap[0][0] if self._heap else None
+
+    def due_time(self, task):
+        """任务的下一次执行时间，不在队列中时返回 None"""
+        with self._lock:
+            entry = self._entries.get(id(task))
+            return entry[0] if entry is not None else None
+
+    def _invalidate(self, task):
+        entry = self._entries.pop(id(task), None)
+        if entry is not None:
+            entry[3] = False
@@ -0,0 +1,319 @@
+"""无界面的备份服务：在独立进程中保存并按计划执行备份任务
+
+服务只依赖标准库，通过本机 TCP 端口接收控制命令。每个连接发送一行 JSON 请求并收到一行 JSON 响应，
+端口和访问令牌写在状态文件中，命令行工具和图形界面读取状态文件后作为客户端连接
+"""
+import json
+import os
+import secrets
+import socket
+import threading
+from datetime import datetime
+
+from src.core.backup_executor import PAUSED, PENDING, RUNNING
+from src.core.backup_manager import BackupManager
+from src.core.backup_task import BackupTask
+
+# 任务列表文件
+TASKS_FILE = "backup_tasks.json"
+# 服务状态文件: 监听端口、访问令牌和进程号
+STATE_FILE = "backup_daemon.json"
+
+
+class BackupServiceError(Exception):
+    """备份服务不可用或拒绝了请求"""
+
+
+class TaskStore:
+    """以 JSON 文件保存的备份任务列表"""
+
+    def __init__(self, path=TASKS_FILE):
+        self.path = path
+
+    def load(self):
+        """读取任务列表，文件不存在时返回空列表"""
+        if not os.path.exists(self.path):
+            return []
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return [BackupTask.from_dict(data) for data in json.load(f)]
+        except Exception as e:
+            print(f"加载备份任务失败: {e}")
+            return []
+
+    def save(self, tasks):
+        """写入临时文件后替换，避免中断时留下不完整的任务文件"""
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump([task.to_dict() for task in tasks], f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, self.path)
+
+
+def task_summary(task, progress=None, files=False, next_run=None):
+    """任务的概要信息、下一次计划执行时间及最近一次执行的进度，files 为 True 时包括文件路径"""
+    summary = task.to_dict()
+    summary['file_count'] = len(summary['files'])
+    summary['next_run'] = next_run.isoformat() if next_run else None
+    summary['progress'] = progress
+    summary['running'] = progress is not None and progress['state'] in (PENDING, RUNNING, PAUSED)
+    if not files:
+        del summary['files']
+    return summary
+
+
+class BackupService:
+    """备份守护进程：按计划执行任务，并在本机端口上处理控制命令"""
+
+    def __init__(self, store_path=TASKS_FILE, state_path=STATE_FILE, interval=300, port=0):
+        self.store = TaskStore(store_path)
+        self.state_path = state_path
+        # 最长休眠时间（秒）：系统休眠或调整时钟后，最迟这么久之后重新检查计划
+        self.interval = interval
+        self.port = port
+        self.token = secrets.token_hex(16)
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        # 计划改变时唤醒主循环
+        self._wake = threading.Event()
+        self.manager = BackupManager()
+        for task in self.store.load():
+            self.manager.add_task(task)
+        # 备份结束后保存上次备份时间
+        self.manager.on_finished = self._on_finished
+        self.manager.on_schedule_changed = self._wake.set
+        self.tasks = self.manager.backup_tasks
+        self._server = None
+
+    def serve_forever(self):
+        """启动控制端口并按计划检查任务，直到收到 stop 命令或被中断"""
+        self._server = socket.create_server(('127.0.0.1', self.port))
+        self.port = self._server.getsockname()[1]
+        self._write_state()
+        threading.Thread(target=self._accept_loop, daemon=True).start()
+        print(f"备份服务已启动: 127.0.0.1:{self.port}，{len(self.tasks)} 个任务")
+        try:
+            while not self._stopped.is_set():
+                delay = self.run_due_tasks()
+                # 休眠到最早的任务到期，计划改变或收到 stop 命令时提前醒来
+                self._wake.wait(self.interval if delay is None else min(delay, self.interval))
+                self._wake.clear()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.shutdown()
+
+    def shutdown(self):
+        """关闭控制端口，取消正在执行的备份并删除状态文件"""
+        self._stopped.set()
+        self._wake.set()
+        self.manager.shutdown()
+        if self._server is not None:
+            self._server.close()
+            self._server = None
+        try:
+            os.remove(self.state_path)
+        except OSError:
+            pass
+
+    def run_due_tasks(self):
+        """启动所有到期的任务，返回距下一个任务到期的秒数，没有计划时返回 None"""
+        with self._lock:
+            return self.manager.execute_tasks()
+
+    def handle(self, request):
+        """处理一条控制命令，返回结果；命令无效时抛出 BackupServiceError"""
+        command = request.get('command')
+        if command == 'ping':
+            return {'pid': os.getpid(), 'tasks': len(self.tasks)}
+        if command == 'list':
+            with self._lock:
+                return [self._summary(task) for task in self.tasks]
+        if command == 'show':
+            task = self._find(request.get('name'))
+            with self._lock:
+                return self._summary(task, files=True)
+        if command == 'add':
+            task = BackupTask.from_dict(request['task'])
+            with self._lock:
+                if any(existing.name == task.name for existing in self.tasks):
+                    raise BackupServiceError(f"任务已存在: {task.name}")
+                self.manager.add_task(task)
+                self._save()
+                return self._summary(task)
+        if command == 'remove':
+            task = self._find(request.get('name'))
+            with self._lock:
+                self.manager.remove_task(self.tasks.index(task))
+                self._save()
+            return task.name
+        if command == 'run':
+            return self.manager.run_task(self._find(request.get('name'))) is not None
+        if command in ('pause', 'resume', 'cancel'):
+            task = self._find(request.get('name'))
+            getattr(self.manager, f'{command}_task')(task.name)
+            return self.manager.job_status(task.name)
+        if command == 'stop':
+            self._stopped.set()
+            self._wake.set()
+            return True
+        raise BackupServiceError(f"未知命令: {command}")
+
+    def _summary(self, task, files=False):
+        return task_summary(task, self.manager.job_status(task.name), files, self.manager.next_run(task))
+
+    def _find(self, name):
+        with self._lock:
+            for task in self.tasks:
+                if task.name == name:
+                    return task
+        raise BackupServiceError(f"任务不存在: {name}")
+
+    def _on_finished(self, job):
+        with self._lock:
+            self._save()
+
+    def _save(self):
+        try:
+            self.store.save(list(self.tasks))
+        except Exception as e:
+            print(f"保存备份任务失败: {e}")
+
+    def _write_state(self):
+        """写入端口和令牌，只允许当前用户读取"""
+        state = {'port': self.port, 'token': self.token, 'pid': os.getpid()}
+        fd = os.open(self.state_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        if hasattr(os, 'fchmod'):
+            # 文件已存在时 os.open 不改变其权限，写入令牌前收紧（Windows 上没有 fchmod）
+            os.fchmod(fd, 0o600)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+
+    def _accept_loop(self):
+        while not self._stopped.is_set():
+            try:
+                connection, _address = self._server.accept()
+            except OSError:
+                break
+            threading.Thread(target=self._serve_connection, args=(connection,), daemon=True).start()
+
+    def _serve_connection(self, connection):
+        with connection, connection.makefile('rwb') as stream:
+            try:
+                request = json.loads(stream.readline())
+                if not secrets.compare_digest(str(request.get('token', '')), self.token):
+                    raise BackupServiceError("访问令牌无效")
+                response = {'ok': True, 'result': self.handle(request)}
+            except BackupServiceError as e:
+                response = {'ok': False, 'error': str(e)}
+            except Exception as e:
+                response = {'ok': False, 'error': f"请求无效: {e}"}
+            stream.write(json.dumps(response, ensure_ascii=False).encode('utf-8') + b'\n')
+            stream.flush()
+
+
+class BackupClient:
+    """备份服务的客户端"""
+
+    def __init__(self, state_path=STATE_FILE, timeout=5):
+        self.state_path = state_path
+        self.timeout = timeout
+
+    def request(self, command, **params):
+        """发送命令并返回结果，服务未运行或拒绝请求时抛出 BackupServiceError"""
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            raise BackupServiceError("备份服务未运行")
+        request = dict(params, command=command, token=state['token'])
+        try:
+            with socket.create_connection(('127.0.0.1', state['port']), self.timeout) as connection:
+                connection.sendall(json.dumps(request, ensure_ascii=False).encode('utf-8') + b'\n')
+                with connection.makefile('rb') as stream:
+                    response = json.loads(stream.readline())
+        except (OSError, ValueError) as e:
+            raise BackupServiceError(f"无法连接备份服务: {e}")
+        if not response.get('ok'):
+            raise BackupServiceError(response.get('error', "未知错误"))
+        return response.get('result')
+
+    def ping(self):
+        """备份服务是否正在运行"""
+        try:
+            self.request('ping')
+            return True
+        except BackupServiceError:
+            return False
+
+
+class RemoteBackupManager:
+    """与 BackupManager 接口相同，任务保存在备份服务中并由服务按计划执行"""
+
+    def __init__(self, client):
+        self.client = client
+        # 最近一次获取任务列表时各任务的执行进度和下一次计划执行时间
+        self._progress = {}
+        self._next_run = {}
+
+    @property
+    def backup_tasks(self):
+        try:
+            summaries = self.client.request('list')
+        except BackupServiceError as e:
+            print(f"获取备份任务失败: {e}")
+            return []
+        self._progress = {data['name']: data.get('progress') for data in summaries}
+        self._next_run = {data['name']: data.get('next_run') for data in summaries}
+        return [BackupTask.from_dict(data) for data in summaries]
+
+    def add_task(self, task):
+        """添加备份任务"""
+        try:
+            self.client.request('add', task=task.to_dict())
+        except BackupServiceError as e:
+            print(f"添加备份任务失败: {e}")
+
+    def remove_task(self, index):
+        """删除备份任务"""
+        tasks = self.backup_tasks
+        if index < len(tasks):
+            try:
+                self.client.request('remove', name=tasks[index].name)
+            except BackupServiceError as e:
+                print(f"删除备份任务失败: {e}")
+
+    def execute_tasks(self):
+        """任务由备份服务按计划执行，本进程中没有计划，返回 None"""
+        return None
+
+    def run_task(self, task):
+        """请求备份服务立即执行任务，返回是否已启动"""
+        return self._control('run', task.name)
+
+    def job_status(self, name):
+        """最近一次获取任务列表时任务的执行进度"""
+        return self._progress.get(name)
+
+    def next_run(self, task):
+        """最近一次获取任务列表时任务的下一次计划执行时间"""
+        next_run = self._next_run.get(task.name)
+        return datetime.fromisoformat(next_run) if next_run else None
+
+    def pause_task(self, name):
+        self._control('pause', name)
+
+    def resume_task(self, name):
+        self._control('resume', name)
+
+    def cancel_task(self, name):
+        self._control('cancel', name)
+
+    def shutdown(self):
+        """备份在服务中继续执行"""
+
+    def _control(self, command, name):
+        try:
+            return self.client.request(command, name=name)
+        except BackupServiceError as e:
+            print(f"控制备份任务失败: {e}")
+            return None
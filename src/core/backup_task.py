@@ -1,10 +1,40 @@
+import errno
+import functools
 import os
-import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
+from src.core.backup_archive import ARCHIVE_ZIP, write_archive
+from src.core.backup_executor import BackupJob
+from src.core.backup_journal import JOURNAL_NAME, BackupJournal, find_partial, sync_path
+from src.core.backup_manifest import (
+    PARTIAL_SUFFIX,
+    SNAPSHOT_PREFIX,
+    file_hash,
+    is_unchanged,
+    latest_snapshot,
+    manifest_index,
+    write_manifest,
+)
+from src.core.backup_repository import BackupRepository
+from src.core.backup_schedule import CATCH_UP_ONCE, next_run
+from src.core.copy_engine import copy_file
+
+# 备份的保存方式：普通文件快照目录、按内容寻址的去重仓库，或压缩包
+STORE_FILES = 'files'
+STORE_REPOSITORY = 'repository'
+STORE_ARCHIVE = 'archive'
+
+# 不小于此大小的文件走单独的大文件通道
+LARGE_FILE_SIZE = 8 * 1024 * 1024
+
 
 class BackupTask:
-    def __init__(self, files, backup_dir, start_time, end_time, frequency, name=None):
+    def __init__(self, files, backup_dir, start_time, end_time, frequency, name=None,
+                 copy_workers=4, queue_depth=16, incremental=True, verify_hash=False, store=STORE_FILES,
+                 archive_format=ARCHIVE_ZIP, codec='zlib', hardlink=False,
+                 catch_up=CATCH_UP_ONCE):
         self.files = files
         self.backup_dir = backup_dir
         self.start_time = start_time
@@ -12,53 +42,276 @@ class BackupTask:
         self.frequency = frequency
         self.name = name if name else f"{datetime.now().strftime('%Y-%m-%d_%H_%M_%S')}_备份策略"
         self.last_backup = None
+        # 并发复制的线程数（为 1 时逐个复制）和排队等待复制的小文件数上限
+        self.copy_workers = copy_workers
+        self.queue_depth = queue_depth
+        # 增量备份只复制新增或改变的文件；verify_hash 时还比较内容哈希，而不只是大小和修改时间
+        self.incremental = incremental
+        self.verify_hash = verify_hash
+        self.store = store
+        # 保存为压缩包时的格式（zip/tar）和压缩算法（zlib/bz2/lzma）
+        self.archive_format = archive_format
+        self.codec = codec
+        # 普通文件快照中，未改变的文件从上一个快照硬链接过来，每个快照目录都是完整的副本
+        self.hardlink = hardlink
+        # 错过的备份补做一次还是跳过，见 backup_schedule
+        self.catch_up = catch_up
+        
+    def to_dict(self):
+        """转换为可保存为 JSON 的字典，文件只保留名称和路径"""
+        return {
+            'name': self.name,
+            'files': [{'name': file_info['name'], 'path': file_info['path']} for file_info in self.files],
+            'backup_dir': self.backup_dir,
+            'start_time': self.start_time.isoformat(),
+            'end_time': self.end_time.isoformat(),
+            'frequency': self.frequency,
+            'last_backup': self.last_backup.isoformat() if self.last_backup else None,
+            'copy_workers': self.copy_workers,
+            'queue_depth': self.queue_depth,
+            'incremental': self.incremental,
+            'verify_hash': self.verify_hash,
+            'store': self.store,
+            'archive_format': self.archive_format,
+            'codec': self.codec,
+            'hardlink': self.hardlink,
+            'catch_up': self.catch_up,
+        }
+        
+    @classmethod
+    def from_dict(cls, data):
+        """由 to_dict 的结果恢复备份任务"""
+        task = cls(
+            data.get('files', []),
+            data['backup_dir'],
+            datetime.fromisoformat(data['start_time']),
+            datetime.fromisoformat(data['end_time']),
+            data['frequency'],
+            data['name'],
+            data.get('copy_workers', 4),
+            data.get('queue_depth', 16),
+            data.get('incremental', True),
+            data.get('verify_hash', False),
+            data.get('store', STORE_FILES),
+            data.get('archive_format', ARCHIVE_ZIP),
+            data.get('codec', 'zlib'),
+            data.get('hardlink', False),
+            data.get('catch_up', CATCH_UP_ONCE)
+        )
+        if data.get('last_backup'):
+            task.last_backup = datetime.fromisoformat(data['last_backup'])
+        return task
         
     def should_backup(self, current_time):
         """判断是否应该执行备份"""
-        # 检查是否在时间范围内
-        if not (self.start_time <= current_time <= self.end_time):
-            return False
-            
-        # 检查是否满足频率要求
-        if self.last_backup is None:
-            return True
-            
-        # 根据频率判断
-        if self.frequency == "每小时":
-            return (current_time - self.last_backup).total_seconds() >= 3600
-        elif self.frequency == "每6小时":
-            return (current_time - self.last_backup).total_seconds() >= 21600
-        elif self.frequency == "每天":
-            return (current_time - self.last_backup).total_seconds() >= 86400
-        elif self.frequency == "每周":
-            return (current_time - self.last_backup).total_seconds() >= 604800
-        elif self.frequency == "每月":
-            return (current_time - self.last_backup).total_seconds() >= 2592000
-            
-        return False
+        due = next_run(self, current_time)
+        return due is not None and due <= current_time
         
-    def execute_backup(self):
-        """执行备份"""
+    def execute_backup(self, job=None):
+        """执行备份
+        
+        job 为 BackupJob 时按数据块复制并报告进度，在数据块之间响应暂停和取消，
+        出错或取消时抛出异常由调用方处理；不传 job 时出错只打印错误
+        """
         try:
-            # 创建备份目录
+            if self.store == STORE_REPOSITORY:
+                BackupRepository(self.backup_dir).backup(self, job if job is not None else BackupJob(self))
+            elif self.store == STORE_ARCHIVE:
+                write_archive(self, job if job is not None else BackupJob(self), self.copy_workers)
+            else:
+                self.backup_files(job)
+            self.last_backup = datetime.now()
+        except Exception as e:
+            if job is not None:
+                raise
+            print(f"备份失败: {e}")
+            
+    def backup_files(self, job=None):
+        """以普通文件保存快照
+        
+        每次备份生成一个快照目录和清单，增量备份时与该任务上一个快照的清单比较，
+        未改变的文件只在清单中引用之前快照里的副本，每个快照仍可完整恢复；
+        hardlink 时改为硬链接到新快照目录中，目标文件系统不支持硬链接时改为复制。
+        
+        快照先写入带 .partial 后缀的目录，检查点日志记录每个复制完成的文件和大文件已落盘的偏移；
+        全部复制并落盘后写入清单，再原子地改名为正式的快照目录。备份中途中断（崩溃、重启、备份盘断开）时，
+        下一次备份继续使用该目录，只复制未完成的文件，大文件从最后一个检查点继续
+        """
+        # 上一个完整的快照，需在创建新快照目录之前查找
+        previous = manifest_index(latest_snapshot(self.backup_dir, self.name)) if self.incremental else {}
+        # 目标文件系统不支持硬链接时，未改变的文件也复制
+        can_link = self.hardlink
+        
+        # 继续上次中断的备份，否则新建快照目录，同一秒内多次备份时加序号
+        partial_dir = find_partial(self.backup_dir, self.name)
+        if partial_dir is not None:
+            snapshot = os.path.basename(partial_dir)[:-len(PARTIAL_SUFFIX)]
+            print(f"继续上次中断的备份: {snapshot}")
+        else:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            backup_subdir = os.path.join(self.backup_dir, f"backup_{timestamp}")
-            os.makedirs(backup_subdir, exist_ok=True)
+            snapshot = f"{SNAPSHOT_PREFIX}{timestamp}"
+            suffix = 1
+            while (os.path.exists(os.path.join(self.backup_dir, snapshot))
+                   or os.path.exists(os.path.join(self.backup_dir, snapshot + PARTIAL_SUFFIX))):
+                snapshot = f"{SNAPSHOT_PREFIX}{timestamp}_{suffix}"
+                suffix += 1
+            partial_dir = os.path.join(self.backup_dir, snapshot + PARTIAL_SUFFIX)
+            os.makedirs(partial_dir, exist_ok=True)
+        journal = BackupJournal(partial_dir, self.name, snapshot)
+        try:
+            self._backup_into(partial_dir, snapshot, previous, can_link, journal, job)
+        finally:
+            journal.close()
             
-            # 复制文件
-            for i, file_info in enumerate(self.files):
-                src_path = file_info['path']
-                filename = file_info['name']
-                name, ext = os.path.splitext(filename)
-                new_filename = f"{name}_{i:03d}{ext}"
-                dst_path = os.path.join(backup_subdir, new_filename)
+    def _backup_into(self, partial_dir, snapshot, previous, can_link, journal, job):
+        """把文件备份到未完成的快照目录 partial_dir，完成后提交为快照 snapshot"""
+        entries = []
+        copies = []
+        resumed = 0
+        # 本快照中复制（而非引用或硬链接）的文件，包括上次中断前复制的，提交前需要落盘
+        copied = []
+        for i, file_info in enumerate(self.files):
+            src_path = file_info['path']
+            filename = file_info['name']
+            try:
+                stat = os.stat(src_path)
+                digest = file_hash(src_path) if self.verify_hash else None
+            except OSError:
+                # 不存在的文件留给复制时报错
+                stat = digest = None
                 
-                # 确保目标目录存在
-                os.makedirs(os.path.dirname(dst_path), exist_ok=True)
+            name, ext = os.path.splitext(filename)
+            new_filename = f"{name}_{i:03d}{ext}"
+            dst_path = os.path.join(partial_dir, new_filename)
+            
+            entry = previous.get(src_path)
+            if stat is not None and is_unchanged(entry, stat.st_size, stat.st_mtime_ns, digest):
+                if not self.hardlink:
+                    entries.append(dict(entry, name=filename))
+                    continue
+                if can_link:
+                    try:
+                        if os.path.lexists(dst_path):
+                            # 上次中断前已链接或复制
+                            os.remove(dst_path)
+                        os.link(os.path.join(self.backup_dir, entry['snapshot'], entry['stored']), dst_path)
+                        entries.append(dict(entry, name=filename, snapshot=snapshot, stored=new_filename))
+                        continue
+                    except OSError as e:
+                        # 文件系统不支持硬链接时本次备份不再尝试，其他错误（如链接数达到上限）只影响这个文件
+                        if e.errno in (errno.EXDEV, errno.EPERM, errno.EOPNOTSUPP, errno.ENOSYS, errno.EINVAL):
+                            print(f"备份目录不支持硬链接，改为复制: {e}")
+                            can_link = False
+                        
+            # 确保目标目录存在
+            os.makedirs(os.path.dirname(dst_path), exist_ok=True)
+            
+            size = stat.st_size if stat is not None else 0
+            mtime_ns = stat.st_mtime_ns if stat is not None else 0
+            entries.append({
+                'path': src_path,
+                'name': filename,
+                'size': size,
+                'mtime_ns': mtime_ns,
+                'hash': digest,
+                'snapshot': snapshot,
+                'stored': new_filename,
+            })
+            copied.append(dst_path)
+            offset = journal.resume_offset(dst_path, size, mtime_ns) if stat is not None else 0
+            if offset is None:
+                # 上次中断前已复制完成
+                resumed += 1
+                continue
+            if offset == 0 and os.path.lexists(dst_path):
+                # 上次中断前可能是从之前快照硬链接过来的，与之前快照共用同一个文件，
+                # 不能就地覆盖，删除后重新复制
+                os.remove(dst_path)
+            journal.expect(dst_path, size, mtime_ns, offset)
+            copies.append((src_path, dst_path, size - offset))
+            
+        # 复制文件
+        if job is None:
+            for src_path, dst_path, size in copies:
+                journaled_copy(src_path, dst_path, size, None, journal)
+        else:
+            job.start(len(copies), sum(size for _src, _dst, size in copies),
+                      len(entries) - len(copies) - resumed, resumed)
+            copy_files(copies, job, self.copy_workers, self.queue_depth, journal)
+            
+        # 删除上次中断前复制、本次不再需要的文件（如任务的文件列表已改变）
+        stored = {entry['stored'] for entry in entries if entry['snapshot'] == snapshot}
+        for name in os.listdir(partial_dir):
+            if name not in stored and name != JOURNAL_NAME:
+                os.remove(os.path.join(partial_dir, name))
                 
-                # 复制文件
-                shutil.copy2(src_path, dst_path)
+        # 所有文件复制完成并落盘后才写入清单，然后提交快照；硬链接的文件内容未改变，不需要再落盘
+        for dst_path in copied:
+            sync_path(dst_path)
+        write_manifest(partial_dir, self.name, entries)
+        journal.commit(os.path.join(self.backup_dir, snapshot))
+
+
+def journaled_copy(src_path, dst_path, size, job=None, journal=None):
+    """复制一个文件，size 为要复制的字节数；给出 journal 时从日志记录的偏移继续，
+    大文件每个检查点记入日志，复制完成后也记入日志
+    """
+    if journal is None:
+        copy_file(src_path, dst_path, job)
+        return
+    on_checkpoint = functools.partial(journal.checkpoint, dst_path) if size >= LARGE_FILE_SIZE else None
+    copy_file(src_path, dst_path, job, journal.offset(dst_path), on_checkpoint)
+    journal.done(dst_path)
+
+
+def copy_files(copies, job, workers=4, queue_depth=16, journal=None):
+    """复制 [(src_path, dst_path, size), ...]，出错或取消时抛出第一个异常
+    
+    workers 为 1 时在当前线程中逐个复制。否则大文件在单独的线程中依次复制，不占用小文件的工作线程；
+    小文件由 workers 个线程并发复制，打开和关闭文件的等待相互重叠，最多 queue_depth 个文件排队。
+    出错后不再开始新的文件，已开始的文件复制完后抛出异常。给出 journal 时见 journaled_copy
+    """
+    if workers <= 1:
+        for src_path, dst_path, size in copies:
+            job.begin_file(src_path)
+            journaled_copy(src_path, dst_path, size, job, journal)
+            job.end_file()
+        return
+        
+    errors = []
+    failed = threading.Event()
+    slots = threading.BoundedSemaphore(workers + queue_depth)
+    
+    def copy_one(src_path, dst_path, size, slot):
+        try:
+            if not failed.is_set():
+                job.begin_file(src_path)
+                journaled_copy(src_path, dst_path, size, job, journal)
+                job.end_file()
+        except BaseException as e:
+            errors.append(e)
+            failed.set()
+        finally:
+            if slot:
+                slots.release()
                 
-            self.last_backup = datetime.now()
-        except Exception as e:
-            print(f"备份失败: {e}")
\ No newline at end of file
+    large_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='backup-large')
+    small_pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='backup-copy')
+    try:
+        # 大文件数量少，一次全部交给大文件通道
+        for src_path, dst_path, size in copies:
+            if size >= LARGE_FILE_SIZE:
+                large_pool.submit(copy_one, src_path, dst_path, size, False)
+        for src_path, dst_path, size in copies:
+            if size < LARGE_FILE_SIZE:
+                slots.acquire()
+                if failed.is_set():
+                    slots.release()
+                    break
+                small_pool.submit(copy_one, src_path, dst_path, size, True)
+    finally:
+        small_pool.shutdown()
+        large_pool.shutdown()
+    if errors:
+        raise errors[0]
+
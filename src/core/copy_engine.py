@@ -0,0 +1,201 @@
+import errno
+import mmap
+import os
+import shutil
+import sys
+
+# 内核复制每次调用的字节数，也是检查暂停、取消和报告进度的间隔
+CHUNK_SIZE = 8 * 1024 * 1024
+# 内核复制不可用时，用按页对齐的缓冲区在用户态读写
+BUFFER_SIZE = 4 * 1024 * 1024
+# 可继续的复制每隔这么多字节把目标文件落盘并记录检查点
+CHECKPOINT_SIZE = 64 * 1024 * 1024
+
+# 复制方式，按优先级排列
+COPY_FILE_RANGE = 'copy_file_range'
+SENDFILE = 'sendfile'
+READ_WRITE = 'read_write'
+
+# 这些错误表示当前文件（或文件系统组合）不支持该复制方式，改用下一种
+FALLBACK_ERRNOS = {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.EBADF, errno.EPERM}
+
+# 运行时发现内核完全不支持（ENOSYS）的复制方式，之后不再尝试
+_unsupported = set()
+
+
+def available_methods():
+    """当前平台可用的复制方式，按优先级排列"""
+    methods = []
+    if hasattr(os, 'copy_file_range') and COPY_FILE_RANGE not in _unsupported:
+        methods.append(COPY_FILE_RANGE)
+    # 其他平台的 sendfile 只能写入套接字
+    if sys.platform.startswith('linux') and hasattr(os, 'sendfile') and SENDFILE not in _unsupported:
+        methods.append(SENDFILE)
+    methods.append(READ_WRITE)
+    return methods
+
+
+def is_sparse(stat):
+    """文件占用的块少于其大小，可能含有空洞"""
+    return hasattr(os, 'SEEK_DATA') and hasattr(stat, 'st_blocks') and stat.st_blocks * 512 < stat.st_size
+
+
+def data_segments(fd, size):
+    """用 SEEK_DATA/SEEK_HOLE 找出文件中有数据的区间 [(偏移, 长度), ...]，文件系统不支持时返回整个文件"""
+    segments = []
+    offset = 0
+    while offset < size:
+        try:
+            start = os.lseek(fd, offset, os.SEEK_DATA)
+        except OSError as e:
+            if e.errno == errno.ENXIO:
+                # 之后只有空洞
+                break
+            return [(0, size)]
+        end = min(os.lseek(fd, start, os.SEEK_HOLE), size)
+        if end > start:
+            segments.append((start, end - start))
+        offset = end
+    return segments
+
+
+def copy_file(src_path, dst_path, job=None, offset=0, on_checkpoint=None):
+    """复制文件内容和元数据，返回实际使用的复制方式
+
+    优先用 copy_file_range（同一文件系统上可能直接共享数据块），其次 sendfile，数据都不经过用户态；
+    都不可用时用按页对齐的大缓冲区读写。稀疏文件只复制有数据的区间，目标文件保留空洞。
+    job 为 BackupJob 时每个数据块之前检查暂停和取消、之后报告进度；中断时删除不完整的目标文件。
+
+    offset 大于 0 时继续之前中断的复制，保留目标文件中 offset 之前的数据，进度只计算之后的部分。
+    给出 on_checkpoint 时每复制 CHECKPOINT_SIZE 字节先把目标文件落盘，再调用 on_checkpoint(已完成的偏移)，
+    中断时保留不完整的目标文件以便继续
+    """
+    try:
+        with open(src_path, 'rb', buffering=0) as src, open(dst_path, 'r+b' if offset else 'wb', buffering=0) as dst:
+            src_fd = src.fileno()
+            dst_fd = dst.fileno()
+            stat = os.fstat(src_fd)
+            sparse = is_sparse(stat)
+            segments = data_segments(src_fd, stat.st_size) if sparse else [(0, stat.st_size)]
+            if offset:
+                # 丢弃检查点之后可能不完整的数据
+                os.ftruncate(dst_fd, offset)
+
+            copier = _Copier(src_fd, dst_fd, offset, on_checkpoint)
+            try:
+                done = offset
+                for start, length in segments:
+                    end = start + length
+                    if end <= offset:
+                        continue
+                    start = max(start, offset)
+                    if job is not None and start > done:
+                        # 空洞不需要复制，但计入进度
+                        job.advance(start - done)
+                    copier.copy_range(start, end - start, job)
+                    done = end
+                if sparse:
+                    # 末尾的空洞只需设置文件长度
+                    os.ftruncate(dst_fd, stat.st_size)
+                if job is not None and stat.st_size > done:
+                    job.advance(stat.st_size - done)
+                # 源文件在复制期间变短时不能留下与清单中大小不符的副本
+                copied_size = os.fstat(dst_fd).st_size
+                if copied_size != stat.st_size:
+                    raise OSError(errno.EIO, f"复制不完整（{copied_size}/{stat.st_size} 字节），源文件可能已被修改", src_path)
+            finally:
+                copier.close()
+        shutil.copystat(src_path, dst_path)
+        return copier.method
+    except BaseException:
+        if on_checkpoint is None:
+            try:
+                os.remove(dst_path)
+            except OSError:
+                pass
+        raise
+
+
+class _Copier:
+    """在两个文件描述符之间按区间复制，当前方式失败时降级到下一种"""
+
+    def __init__(self, src_fd, dst_fd, synced=0, on_checkpoint=None):
+        self.src_fd = src_fd
+        self.dst_fd = dst_fd
+        # 已落盘并记录检查点的偏移
+        self.synced = synced
+        # 本次已复制的字节数
+        self.copied = 0
+        self.on_checkpoint = on_checkpoint
+        self.methods = available_methods()
+        self.method = self.methods[0]
+        self.buffer = None
+        self.view = None
+
+    def copy_range(self, offset, length, job=None):
+        end = offset + length
+        while offset < end:
+            if job is not None:
+                job.checkpoint()
+            copied = self._copy_chunk(offset, min(CHUNK_SIZE, end - offset))
+            if copied == 0:
+                if self.method != READ_WRITE and self.copied == 0:
+                    # 有些文件系统（procfs、部分 FUSE 和网络文件系统）不支持内核复制时返回 0 而不是报错
+                    self._fall_back()
+                    continue
+                # 源文件在复制期间变短
+                break
+            offset += copied
+            self.copied += copied
+            if job is not None:
+                job.advance(copied)
+            if self.on_checkpoint is not None and offset - self.synced >= CHECKPOINT_SIZE:
+                # 数据落盘之后才记录检查点，继续复制时检查点之前的数据一定完整
+                getattr(os, 'fdatasync', os.fsync)(self.dst_fd)
+                self.synced = offset
+                self.on_checkpoint(offset)
+
+    def close(self):
+        if self.buffer is not None:
+            self.view.release()
+            self.buffer.close()
+            self.buffer = None
+
+    def _copy_chunk(self, offset, count):
+        while True:
+            try:
+                if self.method == COPY_FILE_RANGE:
+                    return os.copy_file_range(self.src_fd, self.dst_fd, count, offset, offset)
+                if self.method == SENDFILE:
+                    # sendfile 从目标文件的当前位置写入
+                    os.lseek(self.dst_fd, offset, os.SEEK_SET)
+                    return os.sendfile(self.dst_fd, self.src_fd, offset, count)
+                return self._read_write(offset, count)
+            except OSError as e:
+                if self.method == READ_WRITE or e.errno not in FALLBACK_ERRNOS:
+                    raise
+                if e.errno == errno.ENOSYS:
+                    _unsupported.add(self.method)
+                self._fall_back()
+
+    def _fall_back(self):
+        self.method = self.methods[self.methods.index(self.method) + 1]
+
+    def _read_write(self, offset, count):
+        if self.buffer is None:
+            # 匿名映射按页对齐
+            self.buffer = mmap.mmap(-1, BUFFER_SIZE)
+            self.view = memoryview(self.buffer)
+        count = min(count, BUFFER_SIZE)
+        os.lseek(self.src_fd, offset, os.SEEK_SET)
+        os.lseek(self.dst_fd, offset, os.SEEK_SET)
+        if hasattr(os, 'readv'):
+            size = os.readv(self.src_fd, [self.view[:count]])
+        else:
+            data = os.read(self.src_fd, count)
+            size = len(data)
+            self.view[:size] = data
+        written = 0
+        while written < size:
+            written += os.write(self.dst_fd, self.view[written:size])
+        return size
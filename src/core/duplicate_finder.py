@@ -0,0 +1,208 @@
+import hashlib
+import os
+import sqlite3
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS file_hashes (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    modified REAL NOT NULL,
+    partial TEXT,
+    full TEXT
+);
+"""
+
+
+class HashCache:
+    """文件哈希缓存，以 (路径, 大小, 修改时间) 为键，文件变化后缓存自动失效
+
+    每个线程应使用各自的 HashCache 实例
+    """
+
+    def __init__(self, db_path):
+        self.conn = sqlite3.connect(db_path, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        """关闭数据库连接"""
+        self.conn.close()
+
+    def lookup(self, files, column):
+        """查询文件的缓存哈希，files 为 [(路径, 大小, 修改时间), ...]，返回 {路径: 哈希}"""
+        found = {}
+        for path, size, modified in files:
+            row = self.conn.execute(
+                f"SELECT {column} FROM file_hashes WHERE path = ? AND size = ? AND modified = ?",
+                (path, size, modified),
+            ).fetchone()
+            if row is not None and row[0] is not None:
+                found[path] = row[0]
+        return found
+
+    def store(self, files, hashes, column):
+        """写入哈希，文件的大小或修改时间变化时清除其另一种哈希"""
+        other = 'full' if column == 'partial' else 'partial'
+        with self.conn:
+            self.conn.executemany(
+                f"""INSERT INTO file_hashes (path, size, modified, {column}) VALUES (?, ?, ?, ?)
+                ON CONFLICT (path) DO UPDATE SET
+                    {other} = CASE WHEN size = excluded.size AND modified = excluded.modified
+                                   THEN {other} END,
+                    size = excluded.size,
+                    modified = excluded.modified,
+                    {column} = excluded.{column}""",
+                [(path, size, modified, hashes[path])
+                 for path, size, modified in files if path in hashes],
+            )
+
+
+class DuplicateFinder:
+    """重复文件查找：先按大小分组，再比较首尾部分内容的哈希，最后才计算完整哈希
+
+    每一阶段只处理上一阶段仍有重复的文件，哈希在线程池中计算，结果缓存在 HashCache 中
+    """
+
+    def __init__(self, cache=None, workers=4, partial_size=16 * 1024, chunk_size=1024 * 1024):
+        self.cache = cache
+        self.workers = workers
+        # 部分哈希读取文件开头和结尾各 partial_size 字节
+        self.partial_size = partial_size
+        self.chunk_size = chunk_size
+        self._cancelled = False
+        # 最近一次查找的统计信息
+        self.stats = {}
+
+    def cancel(self):
+        """请求取消查找"""
+        self._cancelled = True
+
+    def find(self, files, min_size=1, progress=None):
+        """查找重复文件
+
+        files 为 [(路径, 大小, 修改时间), ...]，progress(阶段, 已完成, 总数) 用于报告进度。
+        返回重复文件组列表 [{'size', 'hash', 'paths', 'reclaimable'}, ...]，按可释放空间倒序；
+        被取消时返回 None
+        """
+        self._cancelled = False
+        by_size = defaultdict(list)
+        for file in files:
+            if file[1] >= min_size:
+                by_size[file[1]].append(file)
+        candidates = [group for group in by_size.values() if len(group) > 1]
+        self.stats = {
+            'files': len(files),
+            'size_candidates': sum(len(group) for group in candidates),
+        }
+
+        # 部分哈希
+        partial_groups = self._group_by_hash(candidates, 'partial', self.partial_hash, progress)
+        if partial_groups is None:
+            return None
+        self.stats['partial_candidates'] = sum(len(group) for _, group in partial_groups)
+
+        # 小文件的部分哈希已覆盖全部内容，无需再计算完整哈希
+        small = [item for item in partial_groups if item[1][0][1] <= 2 * self.partial_size]
+        large = [group for _, group in partial_groups
+                 if group[0][1] > 2 * self.partial_size]
+        full_groups = self._group_by_hash(large, 'full', self.full_hash, progress)
+        if full_groups is None:
+            return None
+        self.stats['full_candidates'] = sum(len(group) for group in large)
+
+        duplicates = []
+        for digest, group in small + full_groups:
+            size = group[0][1]
+            duplicates.append({
+                'size': size,
+                'hash': digest,
+                'paths': sorted(path for path, _, _ in group),
+                'reclaimable': size * (len(group) - 1),
+            })
+        duplicates.sort(key=lambda group: group['reclaimable'], reverse=True)
+        return duplicates
+
+    def _group_by_hash(self, groups, column, hash_func, progress):
+        """对每组文件计算哈希并按哈希细分，返回 [(哈希, 文件组), ...]，被取消时返回 None"""
+        files = [file for group in groups for file in group]
+        hashes = self.cache.lookup(files, column) if self.cache is not None else {}
+        pending = [file for file in files if file[0] not in hashes]
+        self.stats[f'{column}_cached'] = len(files) - len(pending)
+
+        computed = {}
+        done = len(files) - len(pending)
+        if progress is not None:
+            progress(column, done, len(files))
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            results = executor.map(lambda file: (file[0], hash_func(file)), pending)
+            try:
+                for path, digest in results:
+                    if self._cancelled:
+                        executor.shutdown(wait=False, cancel_futures=True)
+                        return None
+                    done += 1
+                    if digest is not None:
+                        computed[path] = digest
+                    if progress is not None:
+                        progress(column, done, len(files))
+            finally:
+                if self.cache is not None and computed:
+                    self.cache.store(pending, computed, column)
+        hashes.update(computed)
+
+        result = []
+        for group in groups:
+            by_hash = defaultdict(list)
+            for file in group:
+                digest = hashes.get(file[0])
+                if digest is not None:
+                    by_hash[digest].append(file)
+            result.extend(item for item in by_hash.items() if len(item[1]) > 1)
+        return result
+
+    def partial_hash(self, file):
+        """计算文件开头和结尾部分内容的哈希，无法读取时返回 None"""
+        path, size, _modified = file
+        try:
+            with open(path, 'rb') as f:
+                digest = hashlib.blake2b(f.read(self.partial_size))
+                if size > 2 * self.partial_size:
+                    f.seek(-self.partial_size, os.SEEK_END)
+                digest.update(f.read(self.partial_size))
+            return digest.hexdigest()
+        except OSError as e:
+            print(f"无法读取文件 {path}: {e}")
+            return None
+
+    def full_hash(self, file):
+        """流式计算文件完整内容的哈希，无法读取时返回 None"""
+        path = file[0]
+        try:
+            digest = hashlib.blake2b()
+            with open(path, 'rb') as f:
+                while True:
+                    if self._cancelled:
+                        return None
+                    chunk = f.read(self.chunk_size)
+                    if not chunk:
+                        break
+                    digest.update(chunk)
+            return digest.hexdigest()
+        except OSError as e:
+            print(f"无法读取文件 {path}: {e}")
+            return None
+
+
+def collect_files(tree):
+    """收集文件树中所有文件的 (路径, 大小, 修改时间)"""
+    files = []
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        if node['type'] == 'directory':
+            stack.extend(node['children'])
+        else:
+            files.append((node['path'], node['size'], node['modified']))
+    return files
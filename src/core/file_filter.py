@@ -0,0 +1,343 @@
+import re
+import time
+from array import array
+from datetime import datetime
+
+import numpy as np
+
+from src.core.node_store import DIRECTORY, FILE, NodeView
+
+# 大小单位（按 1024 进位）
+SIZE_UNITS = {
+    '': 1, 'b': 1,
+    'k': 1024, 'kb': 1024,
+    'm': 1024 ** 2, 'mb': 1024 ** 2,
+    'g': 1024 ** 3, 'gb': 1024 ** 3,
+    't': 1024 ** 4, 'tb': 1024 ** 4,
+}
+
+# 相对时间单位（秒）
+DURATION_UNITS = {'min': 60, 'h': 3600, 'd': 86400, 'w': 7 * 86400}
+
+# 条件字段名 -> 列名
+FIELDS = {
+    'size': 'size', '大小': 'size',
+    'modified': 'modified', 'mtime': 'modified', '修改': 'modified',
+    'created': 'created', 'ctime': 'created', '创建': 'created',
+    'ext': 'extension', 'type': 'extension', '类型': 'extension',
+}
+
+# 原地移除的节点的类型，既不是文件也不是目录
+REMOVED = -1
+
+# 各列的属性名
+COLUMN_NAMES = ('parents', 'kinds', 'sizes', 'created', 'modified', 'ext_codes')
+
+TERM_PATTERN = re.compile(r'^([^\s:<>=]+)\s*(<=|>=|<|>|=|:)\s*(.+)$')
+
+
+def parse_filter(text):
+    """解析筛选表达式，返回条件列表 [(字段, 运算符, 值...), ...]
+
+    各条件之间为"与"关系，例如 "ext:mp4,mkv size>1GB modified<7d"：
+    - ext:mp4,mkv        扩展名为其中之一（不区分大小写，可省略点号）
+    - size>1GB           大小比较，支持 B/KB/MB/GB/TB
+    - modified<7d        修改时间在 7 天以内（相对时间比较的是距今时长，支持 min/h/d/w）
+    - created>=2024-01-01  创建时间比较（绝对日期）
+    字段后使用 ':' 时，大小表示等于，时间表示"以内"或"以后"
+    表达式无法解析时抛出 ValueError
+    """
+    predicates = []
+    for term in text.split():
+        match = TERM_PATTERN.match(term)
+        if match is None:
+            raise ValueError(f"无法识别的条件: {term}")
+        name, op, value = match.groups()
+        field = FIELDS.get(name.lower())
+        if field is None:
+            raise ValueError(f"未知的字段: {name}")
+
+        if field == 'extension':
+            if op not in (':', '='):
+                raise ValueError(f"扩展名只支持 ':' 或 '=': {term}")
+            extensions = {
+                ext if ext.startswith('.') else '.' + ext
+                for ext in value.lower().split(',') if ext
+            }
+            predicates.append((field, 'in', extensions))
+        elif field == 'size':
+            predicates.append((field, op if op != ':' else '=', parse_size(value)))
+        else:
+            kind, target = parse_time(value)
+            if op == ':':
+                # modified:7d 表示 7 天以内，modified:2024-01-01 表示该日期以后
+                op = '<' if kind == 'age' else '>='
+            predicates.append((field, op, kind, target))
+    return predicates
+
+
+def parse_size(value):
+    """解析带单位的大小，返回字节数"""
+    match = re.match(r'^(\d+(?:\.\d+)?)\s*([a-zA-Z]*)$', value)
+    if match is None or match.group(2).lower() not in SIZE_UNITS:
+        raise ValueError(f"无法识别的大小: {value}")
+    return int(float(match.group(1)) * SIZE_UNITS[match.group(2).lower()])
+
+
+def parse_time(value):
+    """解析时间，返回 ('age', 秒数) 表示相对时间，('at', 时间戳) 表示绝对日期"""
+    match = re.match(r'^(\d+(?:\.\d+)?)(min|h|d|w)$', value.lower())
+    if match is not None:
+        return 'age', float(match.group(1)) * DURATION_UNITS[match.group(2)]
+    for fmt in ('%Y-%m-%d', '%Y%m%d'):
+        try:
+            return 'at', datetime.strptime(value, fmt).timestamp()
+        except ValueError:
+            continue
+    raise ValueError(f"无法识别的时间: {value}")
+
+
+class FileColumns:
+    """文件树的列式快照，用于向量化筛选
+
+    每个节点（包括目录）占一个下标：父节点下标、类型、大小、创建/修改时间和扩展名编码
+    分别保存在 NumPy 数组中。字典树的变化通过 apply_changes 原地同步：新节点追加在末尾，
+    移除的节点只标记为 REMOVED
+    """
+
+    def __init__(self, parents, kinds, sizes, created, modified, ext_codes, extensions,
+                 positions=None, store=None):
+        self.parents = parents
+        self.kinds = kinds
+        self.sizes = sizes
+        self.created = created
+        self.modified = modified
+        self.ext_codes = ext_codes
+        # 扩展名编码表
+        self.extensions = extensions
+        self._ext_lookup = {extension: code for code, extension in enumerate(extensions)}
+        # 字典树保存 路径 -> 下标，列式存储的节点视图自带下标
+        self.positions = positions
+        self.store = store
+        # 追加节点时按倍数扩容，公开的列是有效部分的视图
+        self._storage = {name: getattr(self, name) for name in COLUMN_NAMES}
+        self._capacity = len(kinds)
+        self._removed = 0
+
+    def __len__(self):
+        return len(self.kinds)
+
+    @classmethod
+    def from_tree(cls, tree):
+        """由文件树构建列，列式存储直接复用其数组"""
+        if isinstance(tree, NodeView):
+            return cls.from_node_store(tree.store)
+
+        parents = array('i')
+        kinds = array('b')
+        sizes = array('q')
+        created = array('d')
+        modified = array('d')
+        ext_codes = array('I')
+        extensions = []
+        ext_lookup = {}
+        positions = {}
+
+        stack = [(tree, -1)]
+        while stack:
+            node, parent = stack.pop()
+            index = len(kinds)
+            positions[node['path']] = index
+            parents.append(parent)
+            if node['type'] == 'directory':
+                kinds.append(DIRECTORY)
+                sizes.append(0)
+                created.append(0.0)
+                modified.append(0.0)
+                ext_codes.append(0)
+                stack.extend((child, index) for child in node['children'])
+            else:
+                extension = node['extension']
+                code = ext_lookup.get(extension)
+                if code is None:
+                    code = ext_lookup[extension] = len(extensions)
+                    extensions.append(extension)
+                kinds.append(FILE)
+                sizes.append(node['size'])
+                created.append(node['created'])
+                modified.append(node['modified'])
+                ext_codes.append(code)
+
+        return cls(
+            np.frombuffer(parents, dtype=np.int32),
+            np.frombuffer(kinds, dtype=np.int8),
+            np.frombuffer(sizes, dtype=np.int64),
+            np.frombuffer(created, dtype=np.float64),
+            np.frombuffer(modified, dtype=np.float64),
+            np.frombuffer(ext_codes, dtype=np.uint32),
+            extensions,
+            positions=positions,
+        )
+
+    @classmethod
+    def from_node_store(cls, store):
+        """由列式存储构建列，不复制数据"""
+        return cls(
+            np.frombuffer(store.parents, dtype=np.int32),
+            np.frombuffer(store.kinds, dtype=np.int8),
+            np.frombuffer(store.sizes, dtype=np.int64),
+            np.frombuffer(store.created, dtype=np.float64),
+            np.frombuffer(store.modified, dtype=np.float64),
+            np.frombuffer(store.ext_codes, dtype=np.uint32),
+            list(store.extensions),
+            store=store,
+        )
+
+    def match(self, predicates, now=None):
+        """计算满足所有条件的文件的布尔掩码"""
+        now = time.time() if now is None else now
+        mask = self.kinds == FILE
+        for field, op, *value in predicates:
+            if field == 'extension':
+                codes = [
+                    code for code, extension in enumerate(self.extensions)
+                    if extension.lower() in value[0]
+                ]
+                mask &= np.isin(self.ext_codes, np.array(codes, dtype=np.uint32))
+            elif field == 'size':
+                mask &= compare(self.sizes, op, value[0])
+            else:
+                kind, target = value
+                column = getattr(self, field)
+                if kind == 'age':
+                    # 相对时间比较距今时长：modified<7d 即修改时间晚于 7 天前
+                    column = now - column
+                mask &= compare(column, op, target)
+        return mask
+
+    def visible(self, mask):
+        """返回匹配的文件及其所有上级目录的布尔掩码"""
+        visible = mask.copy()
+        frontier = np.unique(self.parents[mask])
+        frontier = frontier[frontier >= 0]
+        while len(frontier):
+            frontier = frontier[~visible[frontier]]
+            visible[frontier] = True
+            frontier = np.unique(self.parents[frontier])
+            frontier = frontier[frontier >= 0]
+        return visible
+
+    def position(self, node):
+        """返回节点在列中的下标，节点不在列中时返回 None"""
+        if isinstance(node, NodeView):
+            return node.index if node.store is self.store else None
+        return self.positions.get(node['path'])
+
+    def filter(self, predicates, now=None):
+        """筛选文件，返回 (匹配文件数, 应显示的节点 VisibleNodes)"""
+        mask = self.match(predicates, now)
+        return int(mask.sum()), VisibleNodes(self, self.visible(mask))
+
+    def apply_changes(self, changes):
+        """将 FileManager.apply_changes 的变更原地同步到列中
+
+        返回 False 表示无法原地同步（列式存储），或已移除的节点超过一半，应重新构建
+        """
+        if self.positions is None:
+            return False
+        for operation, parent_path, node in changes:
+            if operation == 'insert':
+                parent = self.positions.get(parent_path)
+                if parent is not None:
+                    self._insert(node, parent)
+            elif operation == 'update':
+                # 目录的列不保存汇总信息
+                index = self.positions.get(node['path'])
+                if index is not None and node['type'] == 'file':
+                    self.sizes[index] = node['size']
+                    self.created[index] = node['created']
+                    self.modified[index] = node['modified']
+                    self.ext_codes[index] = self._extension_code(node['extension'])
+            elif operation == 'remove':
+                self._remove(node)
+        return self._removed * 2 <= len(self)
+
+    def _insert(self, node, parent):
+        """在列末尾追加节点及其子树"""
+        rows = []
+        start = len(self)
+        stack = [(node, parent)]
+        while stack:
+            current, parent = stack.pop()
+            index = start + len(rows)
+            self.positions[current['path']] = index
+            if current['type'] == 'directory':
+                rows.append((parent, DIRECTORY, 0, 0.0, 0.0, 0))
+                stack.extend((child, index) for child in current['children'])
+            else:
+                rows.append((parent, FILE, current['size'], current['created'],
+                             current['modified'], self._extension_code(current['extension'])))
+
+        end = start + len(rows)
+        if end > self._capacity:
+            self._capacity = max(end, self._capacity * 2)
+            for name in COLUMN_NAMES:
+                column = getattr(self, name)
+                storage = np.empty(self._capacity, dtype=column.dtype)
+                storage[:start] = column
+                self._storage[name] = storage
+        for name, values in zip(COLUMN_NAMES, zip(*rows)):
+            storage = self._storage[name]
+            storage[start:end] = values
+            setattr(self, name, storage[:end])
+
+    def _remove(self, node):
+        """将节点及其子树标记为已移除"""
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            index = self.positions.pop(current['path'], None)
+            if index is not None:
+                self.kinds[index] = REMOVED
+                self._removed += 1
+            if current['type'] == 'directory':
+                stack.extend(current['children'])
+
+    def _extension_code(self, extension):
+        code = self._ext_lookup.get(extension)
+        if code is None:
+            code = self._ext_lookup[extension] = len(self.extensions)
+            self.extensions.append(extension)
+        return code
+
+
+class VisibleNodes:
+    """筛选结果：匹配的文件及其所有上级目录的掩码，支持 `节点 in visible` 查询
+
+    只在查询时按节点查找下标，不为每个可见节点拼接路径；筛选之后新增的节点不可见
+    """
+
+    def __init__(self, columns, mask):
+        self.columns = columns
+        self.mask = mask
+        self.count = int(np.count_nonzero(mask))
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, node):
+        index = self.columns.position(node)
+        return index is not None and index < len(self.mask) and bool(self.mask[index])
+
+
+def compare(column, op, value):
+    """按运算符比较整列"""
+    if op == '<':
+        return column < value
+    if op == '<=':
+        return column <= value
+    if op == '>':
+        return column > value
+    if op == '>=':
+        return column >= value
+    return column == value
@@ -1,87 +1,554 @@
 import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from stat import S_ISDIR
+
+from src.core.node_store import DIRECTORY, FILE, NodeStore
 
 
 class FileManager:
     def __init__(self):
-        pass
-        
-    def load_files_tree(self, directory):
-        """加载目录中的所有文件，组织成树状结构"""
+        # 路径 -> 节点索引，扫描时建立，用于 O(1) 查找节点
+        self.node_index = {}
+        # 目录路径 -> 扫描时的修改时间，用于增量刷新
+        self.dir_mtimes = {}
+        # 最近一次扫描的统计信息（并行模式下包含各工作线程耗时）
+        self.last_scan_stats = {}
+
+    def load_files_tree(self, directory, workers=1):
+        """加载目录中的所有文件，组织成树状结构
+
+        workers 大于 1 时使用线程池并行扫描子目录，适用于网络共享等高延迟目录
+        """
+        tree = None
+        for dir_node in self.iter_files_tree(directory, workers):
+            if tree is None:
+                tree = dir_node
+        return tree
+
+    def iter_files_tree(self, directory, workers=1):
+        """逐个目录扫描，每扫描完一个目录就产出该目录节点（其子节点已填充）
+
+        第一个产出的是根节点。串行扫描按广度优先顺序产出，顶层内容最先出现；
+        workers 大于 1 时并行扫描，按完成顺序产出。完整扫描结束后更新 last_scan_stats
+        """
         tree = {
             'name': os.path.basename(directory),
             'path': directory,
             'type': 'directory',
             'children': []
         }
-        
-        # 遍历目录及其子目录
-        for root, dirs, filenames in os.walk(directory):
-            # 创建目录结构
-            for dirname in dirs:
-                dir_path = os.path.join(root, dirname)
-                relative_path = os.path.relpath(dir_path, directory)
-                dir_node = {
-                    'name': dirname,
-                    'path': dir_path,
-                    'type': 'directory',
-                    'children': []
-                }
-                
-                # 找到父节点并添加
-                parent_node = self._find_parent_node(tree, relative_path)
-                if parent_node:
-                    parent_node['children'].append(dir_node)
-            
-            # 添加文件
-            for filename in filenames:
-                file_path = os.path.join(root, filename)
-                relative_path = os.path.relpath(file_path, directory)
-                try:
-                    stat = os.stat(file_path)
-                    file_node = {
-                        'name': filename,
-                        'size': stat.st_size,
-                        'created': stat.st_ctime,
-                        'modified': stat.st_mtime,
-                        'path': file_path,
-                        'type': 'file',
-                        'extension': os.path.splitext(filename)[1] if os.path.splitext(filename)[1] else '文件'
-                    }
-                    
-                    # 找到父节点并添加
-                    parent_node = self._find_parent_node(tree, relative_path)
-                    if parent_node:
-                        parent_node['children'].append(file_node)
-                except Exception as e:
-                    print(f"无法读取文件信息 {file_path}: {e}")
-                    
+        self.node_index = {directory: tree}
+        self.dir_mtimes = {}
+
+        start = time.perf_counter()
+        per_worker = {}
+        if workers > 1:
+            yield from self._iter_parallel(tree, workers, per_worker)
+        else:
+            # 使用 os.scandir 单遍遍历，直接复用 DirEntry 中的 stat 信息
+            queue = deque([tree])
+            while queue:
+                dir_node = queue.popleft()
+                queue.extend(self._scan_directory(dir_node))
+                yield dir_node
+
+        self.compute_rollups(tree)
+        self.last_scan_stats = {
+            'directory': directory,
+            'workers': max(workers, 1),
+            'elapsed': time.perf_counter() - start,
+            'nodes': len(self.node_index),
+            'per_worker': per_worker
+        }
+
+    def adopt(self, other):
+        """接管另一个 FileManager（例如后台扫描使用的）的索引和统计信息"""
+        self.node_index = other.node_index
+        self.dir_mtimes = other.dir_mtimes
+        self.last_scan_stats = other.last_scan_stats
+
+    def load_files_level(self, directory):
+        """只加载目录的直接子节点，用于按需展开
+
+        尚未加载内容的子目录节点带有 'loaded': False 标记，已加载的目录不带该键
+        """
+        tree = {
+            'name': os.path.basename(directory),
+            'path': directory,
+            'type': 'directory',
+            'children': []
+        }
+        self.node_index = {directory: tree}
+        self.dir_mtimes = {}
+
+        for dir_node in self._scan_directory(tree):
+            dir_node['loaded'] = False
+        # 未加载的子目录不计入汇总，加载后再累加到上级目录
+        self._summarize(tree)
+        return tree
+
+    def attach_children(self, dir_node, loaded_node, node_index, dir_mtimes):
+        """将另一个 FileManager 在后台加载的目录内容挂到树中的未加载目录上
+
+        返回汇总信息发生变化的上级目录节点
+        """
+        old_size = dir_node.get('size', 0)
+        old_count = dir_node.get('file_count', 0)
+        old_newest = dir_node.get('newest_modified', 0.0)
+        # 目录本身不再是未加载的目录，其内容中可能还有未加载的子目录
+        old_unloaded = dir_node.get('unloaded_count', 0) + (not dir_node.get('loaded', True))
+
+        dir_node['children'] = loaded_node['children']
+        dir_node.pop('loaded', None)
+        node_index.pop(dir_node['path'], None)
+        self.node_index.update(node_index)
+        self.dir_mtimes.update(dir_mtimes)
+        self._summarize(dir_node)
+
+        touched = {}
+        self._adjust_ancestors(
+            os.path.dirname(dir_node['path']),
+            dir_node['size'] - old_size,
+            dir_node['file_count'] - old_count,
+            dir_node['newest_modified'],
+            old_newest,
+            touched,
+            dir_node['unloaded_count'] - old_unloaded,
+        )
+        return list(touched.values())
+
+    def compute_rollups(self, node):
+        """自底向上计算目录及其所有子目录的汇总信息
+
+        目录节点的 'size' 为递归总大小，'file_count' 为递归文件数量，
+        'newest_modified' 为其中最新的文件修改时间，'unloaded_count' 为其下尚未加载内容的目录数量
+        （按需加载时未加载目录中的文件不计入 file_count）。尚未汇总的目录不带这些键
+        """
+        directories = []
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            if current['type'] == 'directory':
+                directories.append(current)
+                stack.extend(current['children'])
+        # 先序遍历的逆序保证子目录先于父目录汇总
+        for dir_node in reversed(directories):
+            self._summarize(dir_node)
+
+    def _summarize(self, dir_node):
+        """由直接子节点汇总目录的总大小、文件数量和最新修改时间"""
+        size = 0
+        count = 0
+        newest = 0.0
+        unloaded = 0
+        for child in dir_node['children']:
+            if child['type'] == 'directory':
+                size += child.get('size', 0)
+                count += child.get('file_count', 0)
+                newest = max(newest, child.get('newest_modified', 0.0))
+                unloaded += child.get('unloaded_count', 0) + (not child.get('loaded', True))
+            else:
+                size += child['size']
+                count += 1
+                newest = max(newest, child['modified'])
+        dir_node['size'] = size
+        dir_node['file_count'] = count
+        dir_node['newest_modified'] = newest
+        dir_node['unloaded_count'] = unloaded
+
+    def _adjust_ancestors(self, path, size, count, newest, stale_newest, touched, unloaded=0):
+        """将子树的变化量累加到目录及其所有上级目录，只访问父目录链
+
+        newest 为新增或更新后的修改时间，stale_newest 为移除或更新前的修改时间，
+        它正是某个上级目录的最新修改时间时，该目录的最新修改时间由其直接子节点重新计算。
+        unloaded 为未加载目录数量的变化。touched 记录访问过的目录 {路径: 节点}
+        """
+        while True:
+            node = self.node_index.get(path)
+            if node is None or node['type'] != 'directory' or 'size' not in node:
+                break
+            node['size'] += size
+            node['file_count'] += count
+            if unloaded:
+                node['unloaded_count'] = node.get('unloaded_count', 0) + unloaded
+            if stale_newest is not None and stale_newest >= node['newest_modified']:
+                node['newest_modified'] = max(
+                    (child.get('newest_modified', 0.0) if child['type'] == 'directory'
+                     else child['modified'] for child in node['children']),
+                    default=0.0,
+                )
+            elif newest > node['newest_modified']:
+                node['newest_modified'] = newest
+            touched[path] = node
+
+            parent = os.path.dirname(path)
+            if parent == path:
+                break
+            path = parent
+
+    def load_node_store(self, directory):
+        """扫描目录到紧凑的列式存储中，适用于百万级文件的目录
+
+        返回 NodeStore，通过其 root() 视图可以像字典树一样访问节点。
+        列式存储不建立路径索引，不支持增量刷新和实时监视
+        """
+        store = NodeStore(directory)
+        self.node_index = {}
+        self.dir_mtimes = {}
+
+        stack = [(0, directory)]
+        while stack:
+            index, path = stack.pop()
+            dirs = []
+            files = []
+            try:
+                with os.scandir(path) as entries:
+                    for entry in entries:
+                        try:
+                            is_dir = entry.is_dir()
+                        except OSError:
+                            is_dir = False
+                        if is_dir:
+                            dirs.append((entry.name, entry.path, not entry.is_symlink()))
+                        else:
+                            try:
+                                files.append((entry.name, entry.stat()))
+                            except OSError as e:
+                                print(f"无法读取文件信息 {entry.path}: {e}")
+            except OSError:
+                pass
+
+            # 同一目录的子节点连续存放：子目录在前、文件在后
+            start = len(store)
+            for name, dir_path, recurse in dirs:
+                child = store.add_node(index, name, DIRECTORY)
+                if recurse:
+                    stack.append((child, dir_path))
+            for name, stat in files:
+                extension = os.path.splitext(name)[1]
+                store.add_node(
+                    index, name, FILE, stat.st_size, stat.st_ctime, stat.st_mtime,
+                    extension if extension else '文件'
+                )
+            store.set_children(index, start, len(store) - start)
+
+        store.compute_rollups()
+        return store
+
+    def _iter_parallel(self, tree, workers, per_worker):
+        """使用线程池并行扫描目录树，按完成顺序产出目录节点，per_worker 记录各工作线程的统计
+
+        每个目录的子节点只由扫描该目录的任务填充，因此结果与串行扫描完全一致，
+        不受线程调度顺序影响
+        """
+        lock = threading.Lock()
+
+        def scan(dir_node):
+            start = time.perf_counter()
+            pending = self._scan_directory(dir_node)
+            elapsed = time.perf_counter() - start
+            name = threading.current_thread().name
+            with lock:
+                stats = per_worker.setdefault(
+                    name, {'directories': 0, 'entries': 0, 'busy': 0.0}
+                )
+                stats['directories'] += 1
+                stats['entries'] += len(dir_node['children'])
+                stats['busy'] += elapsed
+            return dir_node, pending
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='scan') as executor:
+            futures = {executor.submit(scan, tree)}
+            try:
+                while futures:
+                    done, futures = wait(futures, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        dir_node, pending = future.result()
+                        for child in pending:
+                            futures.add(executor.submit(scan, child))
+                        yield dir_node
+            finally:
+                # 提前停止（例如取消扫描）时放弃尚未开始的任务
+                for future in futures:
+                    future.cancel()
+
+    def format_scan_stats(self):
+        """格式化最近一次扫描的统计信息，便于针对不同共享调整并发数"""
+        stats = self.last_scan_stats
+        if not stats:
+            return []
+        lines = [
+            f"扫描 {stats['directory']}: {stats['nodes']} 个节点, "
+            f"{stats['workers']} 个线程, 耗时 {stats['elapsed']:.2f} 秒"
+        ]
+        for name, worker in sorted(stats['per_worker'].items()):
+            lines.append(
+                f"  {name}: {worker['directories']} 个目录, "
+                f"{worker['entries']} 个条目, 忙碌 {worker['busy']:.2f} 秒"
+            )
+        return lines
+
+    def _scan_directory(self, dir_node):
+        """扫描单个目录，填充其直接子节点，返回需要继续遍历的子目录节点"""
+        dir_nodes = []
+        file_nodes = []
+        pending = []
+        try:
+            # 先记录目录修改时间再读取内容，读取期间的变化会在下次刷新时被发现
+            self.dir_mtimes[dir_node['path']] = os.stat(dir_node['path']).st_mtime
+            with os.scandir(dir_node['path']) as entries:
+                for entry in entries:
+                    try:
+                        is_dir = entry.is_dir()
+                    except OSError:
+                        is_dir = False
+
+                    if is_dir:
+                        node = {
+                            'name': entry.name,
+                            'path': entry.path,
+                            'type': 'directory',
+                            'children': []
+                        }
+                        dir_nodes.append(node)
+                        # 与 os.walk 保持一致，不进入符号链接指向的目录
+                        if not entry.is_symlink():
+                            pending.append(node)
+                    else:
+                        try:
+                            node = self._make_file_node(entry.name, entry.path, entry.stat())
+                        except OSError as e:
+                            print(f"无法读取文件信息 {entry.path}: {e}")
+                            continue
+                        file_nodes.append(node)
+                    self.node_index[node['path']] = node
+        except OSError:
+            # 与 os.walk 保持一致，忽略无法访问的目录
+            pass
+
+        # 子目录在前、文件在后，与原有树结构保持一致
+        dir_node['children'] = dir_nodes + file_nodes
+        return pending
+
+    def reconcile(self, dir_mtimes):
+        """对比目录修改时间，读取发生变化的目录的最新内容，不修改当前树，可在后台线程中调用
+
+        dir_mtimes 为调用方复制的目录修改时间。返回 (prepared, stale_mtimes)：prepared 与
+        prepare_changes 的结果格式相同，stale_mtimes 为发生变化的目录及其当前修改时间，
+        应在 apply_changes 之后合并到 dir_mtimes 中
+        """
+        events = {}
+        stale_mtimes = {}
+        for path, mtime in dir_mtimes.items():
+            try:
+                current = os.stat(path).st_mtime
+            except OSError:
+                events[path] = 'deleted'
+                continue
+            if current == mtime:
+                continue
+
+            # 先记录修改时间再读取内容，读取期间的变化会在下次对比时被发现
+            stale_mtimes[path] = current
+            node = self.node_index.get(path)
+            known = {
+                child['name']: child['type'] == 'directory' for child in list(node['children'])
+            } if node else {}
+            names = set()
+            try:
+                with os.scandir(path) as entries:
+                    for entry in entries:
+                        names.add(entry.name)
+                        try:
+                            is_dir = entry.is_dir()
+                        except OSError:
+                            is_dir = False
+                        if entry.name not in known:
+                            events[entry.path] = 'created'
+                        elif not (is_dir and known[entry.name]):
+                            # 已有的文件重新读取元数据；已有的目录由其自身的修改时间决定，
+                            # 只有类型改变时才需要处理
+                            events[entry.path] = 'modified'
+            except OSError:
+                pass
+            for name in known.keys() - names:
+                events[os.path.join(path, name)] = 'deleted'
+
+        return self.prepare_changes(events), stale_mtimes
+
+    def _forget_subtree(self, node):
+        """从索引中移除节点及其所有子节点"""
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            self.node_index.pop(current['path'], None)
+            if current['type'] == 'directory':
+                self.dir_mtimes.pop(current['path'], None)
+                stack.extend(current['children'])
+
+    def load_from_index(self, metadata_index, directory):
+        """从元数据索引恢复上次扫描的文件树，索引中没有该目录时返回 None"""
+        tree, dir_mtimes = metadata_index.load_tree(directory)
+        if tree is None:
+            return None
+
+        self.dir_mtimes = dir_mtimes
+        self.node_index = {}
+        stack = [tree]
+        while stack:
+            node = stack.pop()
+            self.node_index[node['path']] = node
+            if node['type'] == 'directory':
+                stack.extend(node['children'])
+        self.compute_rollups(tree)
         return tree
-        
-    def _find_parent_node(self, tree, relative_path):
-        """找到相对路径对应的父节点"""
-        if relative_path == '.':
-            return tree
-            
-        parts = relative_path.split(os.sep)
-        current_node = tree
-        
-        # 遍历路径部分，找到对应的节点
-        for part in parts[:-1]:  # 最后一个是文件名或目录名，不包含在路径中
-            found = False
-            for child in current_node['children']:
-                if child['name'] == part and child['type'] == 'directory':
-                    current_node = child
-                    found = True
-                    break
-            if not found:
-                return None
-                
-        return current_node
-        
+
+    def prepare_changes(self, events):
+        """读取变化路径的最新状态，不修改当前树，可在后台线程中调用
+
+        events 为 {路径: 事件类型}，返回 {路径: (事件类型, 新节点, 子树索引, 子树目录修改时间)}，
+        路径已不存在时新节点为 None。只有新出现的目录（包括替换了文件的目录）才会被扫描，
+        已有目录本身的修改事件被忽略，其内容变化由各子路径的事件处理
+        """
+        prepared = {}
+        for path, kind in events.items():
+            node = None
+            sub_index = {}
+            sub_mtimes = {}
+            if kind != 'overflow':
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    stat = None
+                if stat is not None and S_ISDIR(stat.st_mode) and kind != 'created':
+                    old = self.node_index.get(path)
+                    if old is not None and old['type'] == 'directory':
+                        continue
+                    kind = 'created'
+
+                if stat is None:
+                    pass
+                elif S_ISDIR(stat.st_mode):
+                    if os.path.islink(path):
+                        node = {
+                            'name': os.path.basename(path),
+                            'path': path,
+                            'type': 'directory',
+                            'children': []
+                        }
+                        self._summarize(node)
+                        sub_index = {path: node}
+                    else:
+                        # 新目录使用独立的扫描器完整扫描，避免在后台线程中修改当前索引
+                        scanner = FileManager()
+                        node = scanner.load_files_tree(path)
+                        sub_index = scanner.node_index
+                        sub_mtimes = scanner.dir_mtimes
+                else:
+                    node = self._make_file_node(os.path.basename(path), path, stat)
+                    sub_index = {path: node}
+            prepared[path] = (kind, node, sub_index, sub_mtimes)
+        return prepared
+
+    def apply_changes(self, prepared, dir_mtimes=None):
+        """将 prepare_changes 的结果合并到当前树，返回最小变更列表
+
+        变更为 (操作, 父目录路径, 节点)，操作为 'insert'、'update'、'remove'，
+        或 'refresh'（事件丢失，需要重新对比）。dir_mtimes 为 reconcile 返回的
+        目录修改时间，在合并完成后更新。汇总信息发生变化的上级目录以 'update' 变更
+        附加在最后
+        """
+        changes = []
+        touched = {}
+        for path, (kind, node, sub_index, sub_mtimes) in prepared.items():
+            if kind == 'overflow':
+                changes.append(('refresh', path, None))
+                continue
+
+            parent_path = os.path.dirname(path)
+            parent = self.node_index.get(parent_path)
+            if parent is None or parent['type'] != 'directory' or parent_path == path:
+                # 父目录不在树中（其新建事件会完整扫描子树），或者是根目录本身
+                continue
+
+            old = self.node_index.get(path)
+            if old is not None and node is not None and old['type'] == node['type']:
+                if node['type'] == 'file':
+                    if (old['size'], old['created'], old['modified']) != (
+                        node['size'], node['created'], node['modified']
+                    ):
+                        size_delta = node['size'] - old['size']
+                        stale_newest = old['modified']
+                        old.update(node)
+                        changes.append(('update', parent_path, old))
+                        self._adjust_ancestors(
+                            parent_path, size_delta, 0, node['modified'], stale_newest, touched
+                        )
+                    continue
+                if kind != 'created':
+                    # 目录本身仍存在，其内容变化由各子路径的事件处理
+                    continue
+
+            if old is not None:
+                siblings = parent['children']
+                for i, child in enumerate(siblings):
+                    if child is old:
+                        del siblings[i]
+                        break
+                self._forget_subtree(old)
+                changes.append(('remove', parent_path, old))
+                size, count, newest = self._totals(old)
+                unloaded = old.get('unloaded_count', 0) + (not old.get('loaded', True))
+                self._adjust_ancestors(parent_path, -size, -count, 0.0, newest, touched, -unloaded)
+
+            if node is not None:
+                parent['children'].append(node)
+                self.node_index.update(sub_index)
+                self.dir_mtimes.update(sub_mtimes)
+                changes.append(('insert', parent_path, node))
+                size, count, newest = self._totals(node)
+                self._adjust_ancestors(parent_path, size, count, newest, None, touched)
+
+        for path, dir_node in touched.items():
+            if path in self.node_index:
+                changes.append(('update', os.path.dirname(path), dir_node))
+
+        for path, mtime in (dir_mtimes or {}).items():
+            if path in self.node_index:
+                self.dir_mtimes[path] = mtime
+        return changes
+
+    def _totals(self, node):
+        """返回节点的 (总大小, 文件数量, 最新修改时间)"""
+        if node['type'] == 'directory':
+            return (node.get('size', 0), node.get('file_count', 0),
+                    node.get('newest_modified', 0.0))
+        return node['size'], 1, node['modified']
+
+    def _make_file_node(self, name, path, stat):
+        """根据 stat 结果创建文件节点"""
+        extension = os.path.splitext(name)[1]
+        return {
+            'name': name,
+            'size': stat.st_size,
+            'created': stat.st_ctime,
+            'modified': stat.st_mtime,
+            'path': path,
+            'type': 'file',
+            'extension': extension if extension else '文件'
+        }
+
+    def find_node(self, path):
+        """根据路径查找节点"""
+        return self.node_index.get(path)
+
     def format_size(self, size):
         """格式化文件大小"""
         for unit in ['B', 'KB', 'MB', 'GB', 'TB']:
             if size < 1024.0:
                 return f"{size:.1f} {unit}"
             size /= 1024.0
-        return f"{size:.1f} PB"
\ No newline at end of file
+        return f"{size:.1f} PB"
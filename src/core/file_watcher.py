@@ -0,0 +1,338 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+import time
+
+# inotify 事件标志，见 <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_DONT_FOLLOW = 0x02000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (
+    IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+    | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF
+    | IN_ONLYDIR | IN_DONT_FOLLOW
+)
+
+EVENT_HEADER = struct.Struct('iIII')
+
+
+class FileWatcher:
+    """文件系统监视器基类
+
+    在后台线程中收集事件，按路径合并并去抖后批量交给回调。回调在监视线程中调用，
+    参数为 {路径: 事件类型}，事件类型为 'created'、'modified'、'deleted'，
+    或 'overflow'（事件丢失，需要完整刷新）
+    """
+
+    def __init__(self, root, callback, debounce=0.3, max_delay=2.0):
+        self.root = root
+        self.callback = callback
+        # 最后一个事件之后静默 debounce 秒才提交，持续的事件流最多延迟 max_delay 秒
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self._pending = {}
+        self._first_event = None
+        self._last_event = None
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """启动监视线程"""
+        self._thread = threading.Thread(
+            target=self._run, name=type(self).__name__, daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        """停止监视线程"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+        self._close()
+
+    def watch(self, file_manager, directories):
+        """开始监视监视器创建之后才加入文件树的目录（例如按需加载的目录）"""
+        raise NotImplementedError
+
+    def _run(self):
+        raise NotImplementedError
+
+    def _close(self):
+        pass
+
+    def _record(self, path, kind):
+        """记录事件，同一路径的多次事件合并为一次"""
+        now = time.monotonic()
+        # 新建之后的修改仍视为新建
+        if kind == 'modified' and self._pending.get(path) == 'created':
+            kind = 'created'
+        self._pending[path] = kind
+        if self._first_event is None:
+            self._first_event = now
+        self._last_event = now
+
+    def _flush_if_due(self):
+        """去抖时间已到时，将合并后的事件批量提交给回调"""
+        if not self._pending:
+            return
+        now = time.monotonic()
+        if (now - self._last_event < self.debounce
+                and now - self._first_event < self.max_delay):
+            return
+
+        events, self._pending = self._pending, {}
+        self._first_event = self._last_event = None
+        try:
+            self.callback(events)
+        except Exception as e:
+            print(f"处理文件变化失败: {e}")
+
+
+class InotifyWatcher(FileWatcher):
+    """基于 Linux inotify 的监视器，为每个目录添加监视"""
+
+    def __init__(self, root, callback, directories, debounce=0.3, max_delay=2.0):
+        super().__init__(root, callback, debounce, max_delay)
+        self._libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+        self._wd_paths = {}
+        # 其他线程添加监视时，保证新监视的事件不会在记录其路径之前被读取
+        self._wd_lock = threading.Lock()
+        try:
+            for path in directories:
+                self._add_watch(path)
+        except OSError:
+            self._close()
+            raise
+
+    def watch(self, file_manager, directories):
+        for path in directories:
+            try:
+                self._add_watch(path)
+            except OSError as e:
+                print(f"无法监视目录 {path}: {e}")
+
+    def _add_watch(self, path):
+        """为目录添加监视，同一目录重复添加时更新其路径（目录被移动的情况）"""
+        with self._wd_lock:
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), WATCH_MASK)
+            if wd < 0:
+                errno = ctypes.get_errno()
+                # 目录已被删除或不是目录时忽略，监视数量达到上限时抛出
+                if errno in (2, 20):  # ENOENT, ENOTDIR
+                    return
+                raise OSError(errno, f"{os.strerror(errno)}: {path}")
+            self._wd_paths[wd] = path
+
+    def _add_tree(self, path):
+        """为新出现的目录及其所有子目录添加监视"""
+        stack = [path]
+        while stack:
+            current = stack.pop()
+            try:
+                self._add_watch(current)
+                with os.scandir(current) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+            except OSError as e:
+                print(f"无法监视目录 {current}: {e}")
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            timeout = self.debounce / 2 if self._pending else 0.5
+            try:
+                ready, _, _ = select.select([self._fd], [], [], timeout)
+            except (OSError, ValueError):
+                break
+            if ready:
+                self._read_events()
+            self._flush_if_due()
+
+    def _read_events(self):
+        """读取并解析 inotify 事件"""
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return
+
+        offset = 0
+        while offset < len(data):
+            wd, mask, _cookie, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                self._record(self.root, 'overflow')
+                continue
+            with self._wd_lock:
+                if mask & IN_IGNORED:
+                    self._wd_paths.pop(wd, None)
+                    continue
+                directory = self._wd_paths.get(wd)
+            if directory is None or not name:
+                continue
+            path = os.path.join(directory, os.fsdecode(name))
+
+            if mask & (IN_CREATE | IN_MOVED_TO):
+                if mask & IN_ISDIR:
+                    self._add_tree(path)
+                self._record(path, 'created')
+            elif mask & (IN_DELETE | IN_MOVED_FROM):
+                self._record(path, 'deleted')
+            elif mask & (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE):
+                self._record(path, 'modified')
+
+    def _close(self):
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+class PollingWatcher(FileWatcher):
+    """轮询监视器：定期检查目录修改时间，只对发生变化的目录比较其内容
+
+    目录修改时间只在目录项增删改名时变化，因此未变化目录中文件的原地修改不会被发现
+    """
+
+    def __init__(self, root, callback, listings, interval=2.0, debounce=0.3, max_delay=2.0):
+        super().__init__(root, callback, debounce, max_delay)
+        # 目录路径 -> (修改时间, {名称: 签名})，文件签名为 (大小, 修改时间)，目录为 None
+        self.listings = listings
+        self.interval = interval
+
+    def watch(self, file_manager, directories):
+        for path in directories:
+            listing = node_listing(file_manager, path)
+            if listing is not None:
+                self.listings[path] = listing
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            self._poll()
+            self._flush_if_due()
+
+    def _poll(self):
+        for path, (mtime, entries) in list(self.listings.items()):
+            if path not in self.listings:
+                continue
+            try:
+                current = os.stat(path).st_mtime
+            except OSError:
+                self._forget(path)
+                self._record(path, 'deleted')
+                continue
+            if current == mtime:
+                continue
+
+            current_entries = self._read_listing(path)
+            self.listings[path] = (current, current_entries)
+            for name, signature in current_entries.items():
+                child_path = os.path.join(path, name)
+                if name not in entries:
+                    if signature is None:
+                        self._add_tree(child_path)
+                    self._record(child_path, 'created')
+                elif entries[name] != signature:
+                    if entries[name] is None:
+                        self._forget(child_path)
+                    self._record(child_path, 'modified')
+            for name in entries.keys() - current_entries.keys():
+                child_path = os.path.join(path, name)
+                self._forget(child_path)
+                self._record(child_path, 'deleted')
+
+    def _read_listing(self, path):
+        """读取目录内容的签名"""
+        entries = {}
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir():
+                            entries[entry.name] = None
+                        else:
+                            stat = entry.stat()
+                            entries[entry.name] = (stat.st_size, stat.st_mtime)
+                    except OSError:
+                        continue
+        except OSError:
+            pass
+        return entries
+
+    def _add_tree(self, path):
+        """开始轮询新出现的目录及其子目录（不进入符号链接目录）"""
+        if os.path.islink(path):
+            return
+        stack = [path]
+        while stack:
+            current = stack.pop()
+            try:
+                mtime = os.stat(current).st_mtime
+            except OSError:
+                continue
+            entries = self._read_listing(current)
+            self.listings[current] = (mtime, entries)
+            for name, signature in entries.items():
+                child_path = os.path.join(current, name)
+                if signature is None and not os.path.islink(child_path):
+                    stack.append(child_path)
+
+    def _forget(self, path):
+        """停止轮询已删除的目录及其子目录"""
+        prefix = path + os.sep
+        for listed in [p for p in self.listings if p == path or p.startswith(prefix)]:
+            del self.listings[listed]
+
+
+def create_watcher(file_manager, root, callback):
+    """为已扫描的目录树创建监视器：Linux 上使用 inotify，其他平台或失败时退回轮询"""
+    directories = list(file_manager.dir_mtimes)
+    if sys.platform.startswith('linux'):
+        try:
+            return InotifyWatcher(root, callback, directories)
+        except (OSError, AttributeError) as e:
+            print(f"inotify 不可用，改用轮询监视: {e}")
+
+    listings = {}
+    for path in directories:
+        listing = node_listing(file_manager, path)
+        if listing is not None:
+            listings[path] = listing
+    return PollingWatcher(root, callback, listings)
+
+
+def node_listing(file_manager, path):
+    """由已扫描的目录节点生成轮询用的 (修改时间, {名称: 签名})，目录不在树中时返回 None"""
+    node = file_manager.node_index.get(path)
+    if node is None or path not in file_manager.dir_mtimes:
+        return None
+    return (file_manager.dir_mtimes[path], {
+        child['name']: (
+            None if child['type'] == 'directory'
+            else (child['size'], child['modified'])
+        )
+        for child in node['children']
+    })
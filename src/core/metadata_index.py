@@ -0,0 +1,211 @@
+import os
+import sqlite3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS nodes (
+    path TEXT PRIMARY KEY,
+    parent TEXT,
+    name TEXT NOT NULL,
+    type TEXT NOT NULL,
+    size INTEGER,
+    created REAL,
+    modified REAL,
+    extension TEXT,
+    dir_mtime REAL
+);
+CREATE INDEX IF NOT EXISTS idx_nodes_parent ON nodes (parent);
+CREATE TABLE IF NOT EXISTS roots (
+    path TEXT PRIMARY KEY,
+    scanned REAL
+);
+"""
+
+UPSERT_SQL = """
+INSERT INTO nodes (path, parent, name, type, size, created, modified, extension, dir_mtime)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (path) DO UPDATE SET
+    parent = excluded.parent,
+    name = excluded.name,
+    type = excluded.type,
+    size = excluded.size,
+    created = excluded.created,
+    modified = excluded.modified,
+    extension = excluded.extension,
+    dir_mtime = COALESCE(excluded.dir_mtime, nodes.dir_mtime)
+"""
+
+COLUMNS = "path, parent, name, type, size, created, modified, extension, dir_mtime"
+
+
+class MetadataIndex:
+    """文件元数据的 SQLite 索引
+
+    保存扫描得到的每个节点（路径、父目录、大小、时间、扩展名）以及目录的修改时间，
+    启动时可直接从索引恢复上次的文件树，其他组件也可以直接查询文件元数据而无需重新扫描。
+    每个线程应使用各自的 MetadataIndex 实例
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        """关闭数据库连接"""
+        self.conn.close()
+
+    def upsert_nodes(self, nodes, dir_mtimes=None):
+        """批量插入或更新节点（不包括其子节点）"""
+        dir_mtimes = dir_mtimes or {}
+        with self.conn:
+            self.conn.executemany(
+                UPSERT_SQL, (self._to_row(node, dir_mtimes) for node in nodes)
+            )
+
+    def upsert_subtree(self, node, dir_mtimes=None):
+        """批量插入或更新节点及其所有子节点"""
+        self.upsert_nodes(iter_subtree(node), dir_mtimes)
+
+    def delete_subtree(self, path):
+        """删除节点及其所有子节点"""
+        low, high = self._subtree_range(path)
+        with self.conn:
+            self.conn.execute(
+                "DELETE FROM nodes WHERE path = ? OR (path > ? AND path < ?)",
+                (path, low, high),
+            )
+
+    def save_tree(self, tree, dir_mtimes):
+        """用完整的扫描结果替换索引中该根目录下的所有记录"""
+        root = tree['path']
+        low, high = self._subtree_range(root)
+        with self.conn:
+            self.conn.execute(
+                "DELETE FROM nodes WHERE path = ? OR (path > ? AND path < ?)",
+                (root, low, high),
+            )
+            self.conn.executemany(
+                UPSERT_SQL, (self._to_row(node, dir_mtimes) for node in iter_subtree(tree))
+            )
+            self.conn.execute(
+                "INSERT OR REPLACE INTO roots (path, scanned) VALUES (?, julianday('now'))",
+                (root,),
+            )
+
+    def load_tree(self, root):
+        """从索引恢复根目录的文件树，返回 (树, 目录修改时间)，没有记录时返回 (None, {})"""
+        if self.conn.execute("SELECT 1 FROM roots WHERE path = ?", (root,)).fetchone() is None:
+            return None, {}
+
+        low, high = self._subtree_range(root)
+        rows = self.conn.execute(
+            f"SELECT {COLUMNS} FROM nodes WHERE path = ? OR (path > ? AND path < ?) "
+            "ORDER BY type, rowid",
+            (root, low, high),
+        ).fetchall()
+
+        nodes = {}
+        dir_mtimes = {}
+        for row in rows:
+            nodes[row[0]] = self._to_node(row)
+            if row[8] is not None:
+                dir_mtimes[row[0]] = row[8]
+
+        tree = nodes.get(root)
+        if tree is None:
+            return None, {}
+        for row in rows:
+            parent = nodes.get(row[1])
+            if row[0] != root and parent is not None:
+                parent['children'].append(nodes[row[0]])
+        return tree, dir_mtimes
+
+    def apply_changes(self, changes, dir_mtimes=None):
+        """将 FileManager.apply_changes 返回的变更写入索引，dir_mtimes 用于查找新目录的修改时间"""
+        dir_mtimes = dir_mtimes or {}
+        with self.conn:
+            for operation, _parent_path, node in changes:
+                if operation == 'remove':
+                    low, high = self._subtree_range(node['path'])
+                    self.conn.execute(
+                        "DELETE FROM nodes WHERE path = ? OR (path > ? AND path < ?)",
+                        (node['path'], low, high),
+                    )
+                elif operation == 'insert':
+                    self.conn.executemany(
+                        UPSERT_SQL,
+                        (self._to_row(child, dir_mtimes) for child in iter_subtree(node)),
+                    )
+                elif operation == 'update':
+                    self.conn.execute(UPSERT_SQL, self._to_row(node, dir_mtimes))
+
+    def update_dir_mtimes(self, dir_mtimes):
+        """更新目录的修改时间"""
+        with self.conn:
+            self.conn.executemany(
+                "UPDATE nodes SET dir_mtime = ? WHERE path = ?",
+                ((mtime, path) for path, mtime in dir_mtimes.items()),
+            )
+
+    def get(self, path):
+        """查询单个节点的元数据（目录不包含子节点），不存在时返回 None"""
+        row = self.conn.execute(
+            f"SELECT {COLUMNS} FROM nodes WHERE path = ?", (path,)
+        ).fetchone()
+        return self._to_node(row) if row else None
+
+    def children(self, path):
+        """查询目录的直接子节点"""
+        rows = self.conn.execute(
+            f"SELECT {COLUMNS} FROM nodes WHERE parent = ? ORDER BY type, rowid", (path,)
+        )
+        return [self._to_node(row) for row in rows]
+
+    def iter_files(self, root):
+        """遍历根目录下所有文件节点"""
+        low, high = self._subtree_range(root)
+        rows = self.conn.execute(
+            f"SELECT {COLUMNS} FROM nodes WHERE type = 'file' AND path > ? AND path < ?",
+            (low, high),
+        )
+        for row in rows:
+            yield self._to_node(row)
+
+    def _subtree_range(self, path):
+        """子节点路径的取值范围：以 "路径 + 分隔符" 开头的所有字符串"""
+        prefix = path if path.endswith(os.sep) else path + os.sep
+        return prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+    def _to_row(self, node, dir_mtimes):
+        path = node['path']
+        if node['type'] == 'directory':
+            return (path, os.path.dirname(path), node['name'], 'directory',
+                    None, None, None, None, dir_mtimes.get(path))
+        return (path, os.path.dirname(path), node['name'], 'file', node['size'],
+                node['created'], node['modified'], node['extension'], None)
+
+    def _to_node(self, row):
+        path, _parent, name, node_type, size, created, modified, extension, _dir_mtime = row
+        if node_type == 'directory':
+            return {'name': name, 'path': path, 'type': 'directory', 'children': []}
+        return {
+            'name': name,
+            'size': size,
+            'created': created,
+            'modified': modified,
+            'path': path,
+            'type': 'file',
+            'extension': extension
+        }
+
+
+def iter_subtree(node):
+    """前序遍历节点及其所有子节点"""
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        yield current
+        if current['type'] == 'directory':
+            stack.extend(reversed(current['children']))
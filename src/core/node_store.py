@@ -0,0 +1,194 @@
+import os
+import sys
+from array import array
+
+# 节点类型
+FILE = 0
+DIRECTORY = 1
+
+
+class NodeStore:
+    """紧凑的列式文件树存储，适用于百万级文件的目录
+
+    每个节点只占各列数组中的一个槽位：名称驻留复用，父子关系用下标表示，
+    路径按需沿父节点链拼接，大小、时间和扩展名编码分别存放在 array 列中。
+    同一目录的子节点连续存放，子节点范围由 child_start/child_count 描述。
+    目录的 sizes/modified 槽位在 compute_rollups 之后保存递归总大小和最新修改时间
+    """
+
+    def __init__(self, root_path):
+        self.root_path = root_path
+        self.names = []
+        self.parents = array('i')
+        self.kinds = array('b')
+        self.sizes = array('q')
+        self.created = array('d')
+        self.modified = array('d')
+        self.ext_codes = array('I')
+        self.child_start = array('i')
+        self.child_count = array('i')
+        # 目录的递归文件数量，文件为 0
+        self.file_counts = array('q')
+        # 扩展名编码表
+        self.extensions = []
+        self._ext_lookup = {}
+        self.add_node(-1, os.path.basename(root_path), DIRECTORY)
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def add_node(self, parent, name, kind, size=0, created=0.0, modified=0.0, extension=''):
+        """追加一个节点，返回其下标"""
+        index = len(self.kinds)
+        self.names.append(sys.intern(name))
+        self.parents.append(parent)
+        self.kinds.append(kind)
+        self.sizes.append(size)
+        self.created.append(created)
+        self.modified.append(modified)
+        self.ext_codes.append(self.extension_code(extension))
+        self.child_start.append(0)
+        self.child_count.append(0)
+        self.file_counts.append(0)
+        return index
+
+    def set_children(self, index, start, count):
+        """设置目录节点的子节点范围"""
+        self.child_start[index] = start
+        self.child_count[index] = count
+
+    def extension_code(self, extension):
+        """获取扩展名的编码，新扩展名自动加入编码表"""
+        code = self._ext_lookup.get(extension)
+        if code is None:
+            code = len(self.extensions)
+            self.extensions.append(extension)
+            self._ext_lookup[extension] = code
+        return code
+
+    def children(self, index):
+        """返回目录节点的子节点下标范围"""
+        start = self.child_start[index]
+        return range(start, start + self.child_count[index])
+
+    def path(self, index):
+        """沿父节点链拼接节点的完整路径"""
+        parts = []
+        while index > 0:
+            parts.append(self.names[index])
+            index = self.parents[index]
+        return os.path.join(self.root_path, *reversed(parts))
+
+    def compute_rollups(self):
+        """自底向上汇总每个目录的总大小、文件数量和最新修改时间
+
+        子节点总是在父节点之后追加，因此按下标逆序累加即可保证子目录先于父目录汇总
+        """
+        parents = self.parents
+        kinds = self.kinds
+        sizes = self.sizes
+        modified = self.modified
+        counts = self.file_counts
+        for index in range(len(kinds) - 1, 0, -1):
+            parent = parents[index]
+            sizes[parent] += sizes[index]
+            counts[parent] += 1 if kinds[index] == FILE else counts[index]
+            if modified[index] > modified[parent]:
+                modified[parent] = modified[index]
+
+    def node(self, index):
+        """返回节点视图"""
+        return NodeView(self, index)
+
+    def root(self):
+        """返回根节点视图"""
+        return NodeView(self, 0)
+
+    @classmethod
+    def from_tree(cls, tree):
+        """由字典形式的文件树构建列式存储"""
+        store = cls(tree['path'])
+        queue = [(0, tree)]
+        for index, node in queue:
+            start = len(store)
+            for child in node['children']:
+                if child['type'] == 'directory':
+                    child_index = store.add_node(index, child['name'], DIRECTORY)
+                    queue.append((child_index, child))
+                else:
+                    store.add_node(
+                        index, child['name'], FILE, child['size'],
+                        child['created'], child['modified'], child['extension']
+                    )
+            store.set_children(index, start, len(store) - start)
+        store.compute_rollups()
+        return store
+
+
+class NodeView:
+    """节点视图，以与字典节点相同的键访问 NodeStore 中的节点
+
+    目录支持 name/path/type/children/size/file_count/newest_modified，
+    文件支持 name/size/created/modified/path/type/extension
+    """
+
+    __slots__ = ('store', 'index')
+
+    DIRECTORY_KEYS = ('name', 'path', 'type', 'children', 'size', 'file_count', 'newest_modified')
+    FILE_KEYS = ('name', 'size', 'created', 'modified', 'path', 'type', 'extension')
+
+    def __init__(self, store, index):
+        self.store = store
+        self.index = index
+
+    def is_directory(self):
+        return self.store.kinds[self.index] == DIRECTORY
+
+    def keys(self):
+        return self.DIRECTORY_KEYS if self.is_directory() else self.FILE_KEYS
+
+    def __contains__(self, key):
+        return key in self.keys()
+
+    def __getitem__(self, key):
+        store = self.store
+        index = self.index
+        if key == 'name':
+            return store.names[index]
+        if key == 'path':
+            return store.path(index)
+        if key == 'type':
+            return 'directory' if store.kinds[index] == DIRECTORY else 'file'
+        if key == 'size':
+            return store.sizes[index]
+        if store.kinds[index] == DIRECTORY:
+            if key == 'children':
+                return [NodeView(store, child) for child in store.children(index)]
+            if key == 'file_count':
+                return store.file_counts[index]
+            if key == 'newest_modified':
+                return store.modified[index]
+        elif key == 'created':
+            return store.created[index]
+        elif key == 'modified':
+            return store.modified[index]
+        elif key == 'extension':
+            return store.extensions[store.ext_codes[index]]
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __eq__(self, other):
+        if isinstance(other, NodeView):
+            return self.store is other.store and self.index == other.index
+        return NotImplemented
+
+    def __hash__(self):
+        return hash((id(self.store), self.index))
+
+    def __repr__(self):
+        return f"NodeView({self['path']!r})"
@@ -0,0 +1,201 @@
+import os
+
+# 勾选状态，取值与 Qt.CheckState 一致
+UNCHECKED = 0
+PARTIAL = 1
+CHECKED = 2
+
+
+class SelectionSet:
+    """以路径为键的勾选集合
+
+    files 保存已勾选的文件节点（路径 -> 节点），counts 保存每个目录下已勾选文件的递归数量，
+    directories 保存作为整体勾选的目录（包括空目录和尚未加载的目录）。
+    按需加载时未加载目录中的文件不计入目录的文件数量，pending_dirs 保存已勾选的未加载目录，
+    pending 保存每个目录下其数量，与目录节点的 unloaded_count 比较。
+    目录的三态勾选由这两种计数与目录的汇总信息比较得出；勾选或取消整个子树时只遍历一次子树，
+    祖先目录的计数按差值一次更新
+    """
+
+    def __init__(self, root_path=None):
+        self.root_path = root_path
+        self._files = {}
+        self._counts = {}
+        self._directories = set()
+        self._pending = {}
+        self._pending_dirs = set()
+        # 文件字典被快照共享时，下一次修改前先复制
+        self._shared = False
+
+    def __len__(self):
+        return len(self._files)
+
+    def __contains__(self, path):
+        return path in self._files
+
+    def __iter__(self):
+        return iter(self._files.values())
+
+    def state(self, node):
+        """返回节点的勾选状态"""
+        path = node['path']
+        if node['type'] != 'directory':
+            return CHECKED if path in self._files else UNCHECKED
+        count = self._counts.get(path, 0)
+        pending = self._pending.get(path, 0)
+        total = node.get('file_count')
+        if count == 0 and pending == 0:
+            return CHECKED if path in self._directories else UNCHECKED
+        if total is None:
+            return CHECKED if path in self._directories else PARTIAL
+        # 文件已全部勾选，但还有未勾选的未加载目录时仍是部分勾选
+        return CHECKED if count >= total and pending >= node.get('unloaded_count', 0) else PARTIAL
+
+    def is_marked(self, path):
+        """目录是否作为整体被勾选（加载完成后应勾选其新内容）"""
+        return path in self._directories
+
+    def select(self, node):
+        """勾选节点，目录包括其整个子树；返回子树中尚未加载的目录"""
+        return self._set_subtree(node, True)
+
+    def deselect(self, node):
+        """取消勾选节点，目录包括其整个子树"""
+        self._set_subtree(node, False)
+
+    def refresh(self, node):
+        """节点对象被替换后更新已勾选文件的引用"""
+        path = node['path']
+        if path in self._files:
+            self._unshare()
+            self._files[path] = node
+
+    def clear(self):
+        """取消所有勾选"""
+        self._files = {}
+        self._counts = {}
+        self._directories = set()
+        self._pending = {}
+        self._pending_dirs = set()
+        self._shared = False
+
+    def snapshot(self):
+        """返回当前已勾选文件的只读快照，不复制文件列表"""
+        self._shared = True
+        return SelectionSnapshot(self._files)
+
+    def _set_subtree(self, node, selected):
+        self._unshare()
+        files = self._files
+        counts = self._counts
+        path = node['path']
+        before = counts.get(path, 0) if node['type'] == 'directory' else int(path in files)
+
+        unloaded = []
+        directories = []
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            if current['type'] == 'directory':
+                directories.append(current)
+                loaded = current.get('loaded', True)
+                if selected:
+                    self._directories.add(current['path'])
+                    if not loaded:
+                        unloaded.append(current)
+                else:
+                    self._directories.discard(current['path'])
+                # 已加载（或取消勾选）的目录不再计为已勾选的未加载目录
+                self._set_pending(current['path'], selected and not loaded)
+                stack.extend(current['children'])
+            elif selected:
+                files[current['path']] = current
+            else:
+                files.pop(current['path'], None)
+
+        # 子目录总在父目录之后出现，逆序汇总即可得到每个目录的递归文件数量
+        if selected:
+            for directory in reversed(directories):
+                count = 0
+                for child in directory['children']:
+                    if child['type'] == 'directory':
+                        count += counts.get(child['path'], 0)
+                    else:
+                        count += 1
+                if count:
+                    counts[directory['path']] = count
+        else:
+            for directory in directories:
+                counts.pop(directory['path'], None)
+
+        after = counts.get(path, 0) if node['type'] == 'directory' else int(path in files)
+        self._adjust_ancestors(path, after - before, selected)
+        return unloaded
+
+    def _set_pending(self, path, pending):
+        """登记或注销已勾选的未加载目录，并更新其各级上级目录的计数"""
+        if pending == (path in self._pending_dirs):
+            return
+        if pending:
+            self._pending_dirs.add(path)
+        else:
+            self._pending_dirs.discard(path)
+        delta = 1 if pending else -1
+        pending_counts = self._pending
+        while path != self.root_path:
+            parent = os.path.dirname(path)
+            if parent == path:
+                break
+            path = parent
+            count = pending_counts.get(path, 0) + delta
+            if count > 0:
+                pending_counts[path] = count
+            else:
+                pending_counts.pop(path, None)
+
+    def _adjust_ancestors(self, path, delta, selected):
+        """按差值更新祖先目录的计数，取消勾选时祖先不再是整体勾选"""
+        counts = self._counts
+        while path != self.root_path:
+            parent = os.path.dirname(path)
+            if parent == path:
+                break
+            path = parent
+            if not selected:
+                self._directories.discard(path)
+            if delta:
+                count = counts.get(path, 0) + delta
+                if count > 0:
+                    counts[path] = count
+                else:
+                    counts.pop(path, None)
+
+    def _unshare(self):
+        if self._shared:
+            self._files = dict(self._files)
+            self._shared = False
+
+
+class SelectionSnapshot:
+    """某一时刻已勾选文件的只读快照，按勾选顺序迭代文件节点
+
+    节点支持 name/path/extension 等键，供备份和打印使用
+    """
+
+    __slots__ = ('_files',)
+
+    def __init__(self, files):
+        self._files = files
+
+    def __len__(self):
+        return len(self._files)
+
+    def __iter__(self):
+        return iter(self._files.values())
+
+    def __contains__(self, path):
+        return path in self._files
+
+    def paths(self):
+        """返回已勾选文件的路径"""
+        return list(self._files)
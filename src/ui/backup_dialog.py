@@ -3,6 +3,7 @@ import os
 from datetime import datetime
 
 from PyQt5.QtWidgets import (
+    QCheckBox,
     QComboBox,
     QDateTimeEdit,
     QDialog,
@@ -16,7 +17,9 @@ from PyQt5.QtWidgets import (
     QVBoxLayout,
 )
 
-from src.core.backup_task import BackupTask
+from src.core.backup_archive import ARCHIVE_TAR, ARCHIVE_ZIP
+from src.core.backup_schedule import CATCH_UP_ONCE, CATCH_UP_SKIP, FREQUENCY_INTERVALS, parse_frequency
+from src.core.backup_task import STORE_ARCHIVE, STORE_FILES, STORE_REPOSITORY, BackupTask
 
 
 class BackupDialog(QDialog):
@@ -73,13 +76,49 @@ class BackupDialog(QDialog):
         frequency_group = QGroupBox("备份频率")
         frequency_layout = QHBoxLayout()
         
+        # 可直接输入五段式 cron 表达式（分 时 日 月 星期），如 "30 2 * * 1-5"
         self.frequency_combo = QComboBox()
-        self.frequency_combo.addItems(["每小时", "每6小时", "每天", "每周", "每月"])
+        self.frequency_combo.setEditable(True)
+        self.frequency_combo.addItems(list(FREQUENCY_INTERVALS))
+        self.frequency_combo.setCurrentText("每天")
+        self.frequency_combo.setToolTip("选择固定间隔，或输入 cron 表达式：分 时 日 月 星期")
+        
+        self.catch_up_combo = QComboBox()
+        self.catch_up_combo.addItem("补做一次", CATCH_UP_ONCE)
+        self.catch_up_combo.addItem("跳过", CATCH_UP_SKIP)
+        self.catch_up_combo.setToolTip("电脑关机或休眠期间错过的备份如何处理")
         
         frequency_layout.addWidget(QLabel("备份间隔:"))
         frequency_layout.addWidget(self.frequency_combo)
+        frequency_layout.addWidget(QLabel("错过的备份:"))
+        frequency_layout.addWidget(self.catch_up_combo)
         frequency_group.setLayout(frequency_layout)
         
+        # 保存方式
+        store_layout = QHBoxLayout()
+        self.store_combo = QComboBox()
+        self.store_combo.addItem("普通文件（增量快照）", STORE_FILES)
+        self.store_combo.addItem("去重仓库（相同内容只保存一次）", STORE_REPOSITORY)
+        self.store_combo.addItem("压缩包", STORE_ARCHIVE)
+        
+        # 压缩包的格式和压缩算法
+        self.archive_combo = QComboBox()
+        self.archive_combo.addItem("zip (Deflate)", (ARCHIVE_ZIP, 'zlib'))
+        self.archive_combo.addItem("zip (bzip2)", (ARCHIVE_ZIP, 'bz2'))
+        self.archive_combo.addItem("zip (LZMA)", (ARCHIVE_ZIP, 'lzma'))
+        self.archive_combo.addItem("tar.gz（多线程压缩）", (ARCHIVE_TAR, 'zlib'))
+        self.archive_combo.addItem("tar.bz2（多线程压缩）", (ARCHIVE_TAR, 'bz2'))
+        self.archive_combo.addItem("tar.xz（多线程压缩）", (ARCHIVE_TAR, 'lzma'))
+        self.archive_combo.setEnabled(False)
+        
+        # 普通文件快照中未改变的文件使用硬链接
+        self.hardlink_check = QCheckBox("未改变的文件使用硬链接，每个备份目录都是完整副本")
+        self.store_combo.currentIndexChanged.connect(self.update_store_options)
+        
+        store_layout.addWidget(QLabel("保存方式:"))
+        store_layout.addWidget(self.store_combo)
+        store_layout.addWidget(self.archive_combo)
+        
         # 按钮
         button_layout = QHBoxLayout()
         self.ok_btn = QPushButton("确定")
@@ -95,10 +134,18 @@ class BackupDialog(QDialog):
         layout.addLayout(dir_layout)
         layout.addWidget(time_range_group)
         layout.addWidget(frequency_group)
+        layout.addLayout(store_layout)
+        layout.addWidget(self.hardlink_check)
         layout.addLayout(button_layout)
         
         self.setLayout(layout)
         
+    def update_store_options(self):
+        """按保存方式启用相应的选项"""
+        store = self.store_combo.currentData()
+        self.archive_combo.setEnabled(store == STORE_ARCHIVE)
+        self.hardlink_check.setEnabled(store == STORE_FILES)
+        
     def load_backup_config(self):
         """加载备份配置"""
         try:
@@ -130,13 +177,19 @@ class BackupDialog(QDialog):
             
     def get_backup_task(self):
         """获取备份任务配置"""
+        archive_format, codec = self.archive_combo.currentData()
         return BackupTask(
             self.selected_files,
             self.backup_dir_edit.text(),
             self.start_time_edit.dateTime().toPyDateTime(),
             self.end_time_edit.dateTime().toPyDateTime(),
-            self.frequency_combo.currentText(),
-            self.name_edit.text()
+            self.frequency_combo.currentText().strip(),
+            self.name_edit.text(),
+            store=self.store_combo.currentData(),
+            archive_format=archive_format,
+            codec=codec,
+            hardlink=self.hardlink_check.isChecked(),
+            catch_up=self.catch_up_combo.currentData()
         )
         
     def accept(self):
@@ -149,4 +202,10 @@ class BackupDialog(QDialog):
             QMessageBox.warning(self, "警告", "开始时间必须早于结束时间")
             return
             
+        try:
+            parse_frequency(self.frequency_combo.currentText().strip())
+        except ValueError as e:
+            QMessageBox.warning(self, "警告", f"备份频率无效: {e}")
+            return
+            
         super().accept()
\ No newline at end of file
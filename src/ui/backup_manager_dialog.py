@@ -17,6 +17,8 @@ from PyQt5.QtWidgets import (
     QVBoxLayout,
 )
 
+from src.core.backup_executor import PAUSED, format_progress
+
 
 class BackupManagerDialog(QDialog):
     def __init__(self, backup_manager, parent=None):
@@ -29,10 +31,10 @@ class BackupManagerDialog(QDialog):
         self.create_ui()
         self.update_task_list()
         
-        # 定时更新任务列表
+        # 定时更新任务列表和备份进度
         self.timer = QTimer()
         self.timer.timeout.connect(self.update_task_list)
-        self.timer.start(5000)  # 每5秒更新一次
+        self.timer.start(1000)  # 每秒更新一次
         
     def create_ui(self):
         """创建对话框界面"""
@@ -40,8 +42,8 @@ class BackupManagerDialog(QDialog):
         
         # 任务列表
         self.task_table = QTableWidget()
-        self.task_table.setColumnCount(5)
-        self.task_table.setHorizontalHeaderLabels(["任务名称", "备份目录", "开始时间", "结束时间", "频率"])
+        self.task_table.setColumnCount(7)
+        self.task_table.setHorizontalHeaderLabels(["任务名称", "备份目录", "开始时间", "结束时间", "频率", "下次备份", "状态"])
         self.task_table.setEditTriggers(QTableWidget.NoEditTriggers)  # 设置为只读
         
         # 设置列宽策略，允许手动调节
@@ -52,6 +54,8 @@ class BackupManagerDialog(QDialog):
         self.task_table.setColumnWidth(2, 160)  # 开始时间
         self.task_table.setColumnWidth(3, 160)  # 结束时间
         self.task_table.setColumnWidth(4, 100)  # 频率
+        self.task_table.setColumnWidth(5, 160)  # 下次备份
+        self.task_table.setColumnWidth(6, 300)  # 状态
         
         # 连接双击信号和右键菜单
         self.task_table.cellDoubleClicked.connect(self.on_cell_double_clicked)
@@ -63,16 +67,25 @@ class BackupManagerDialog(QDialog):
         self.add_btn = QPushButton("新增任务")
         self.remove_btn = QPushButton("删除任务")
         self.view_backup_btn = QPushButton("查看备份位置")
+        self.run_btn = QPushButton("立即执行")
+        self.pause_btn = QPushButton("暂停/继续")
+        self.cancel_btn = QPushButton("取消执行")
         self.close_btn = QPushButton("关闭")
         
         self.add_btn.clicked.connect(self.add_task)
         self.remove_btn.clicked.connect(self.remove_task)
         self.view_backup_btn.clicked.connect(self.view_backup_location)
+        self.run_btn.clicked.connect(self.run_selected_task)
+        self.pause_btn.clicked.connect(self.toggle_pause_selected_task)
+        self.cancel_btn.clicked.connect(self.cancel_selected_task)
         self.close_btn.clicked.connect(self.accept)
         
         button_layout.addWidget(self.add_btn)
         button_layout.addWidget(self.remove_btn)
         button_layout.addWidget(self.view_backup_btn)
+        button_layout.addWidget(self.run_btn)
+        button_layout.addWidget(self.pause_btn)
+        button_layout.addWidget(self.cancel_btn)
         button_layout.addStretch()
         button_layout.addWidget(self.close_btn)
         
@@ -85,9 +98,10 @@ class BackupManagerDialog(QDialog):
         
     def update_task_list(self):
         """更新任务列表"""
-        self.task_table.setRowCount(len(self.backup_manager.backup_tasks))
+        tasks = self.backup_manager.backup_tasks
+        self.task_table.setRowCount(len(tasks))
         
-        for i, task in enumerate(self.backup_manager.backup_tasks):
+        for i, task in enumerate(tasks):
             # 任务名称
             name_item = QTableWidgetItem(getattr(task, 'name', f'任务_{i+1}'))
             self.task_table.setItem(i, 0, name_item)
@@ -108,6 +122,61 @@ class BackupManagerDialog(QDialog):
             freq_item = QTableWidgetItem(task.frequency)
             self.task_table.setItem(i, 4, freq_item)
             
+            # 下一次计划执行时间，正在执行或已过结束时间时为空
+            next_run = self.backup_manager.next_run(task)
+            next_item = QTableWidgetItem(next_run.strftime("%Y-%m-%d %H:%M:%S") if next_run else "")
+            self.task_table.setItem(i, 5, next_item)
+            
+            # 最近一次执行的状态和进度
+            status_item = QTableWidgetItem(format_progress(self.backup_manager.job_status(task.name), full_path=False))
+            self.task_table.setItem(i, 6, status_item)
+            
+    def selected_task(self):
+        """返回选中的任务，未选择时提示并返回 None"""
+        selected_rows = self.task_table.selectionModel().selectedRows()
+        tasks = self.backup_manager.backup_tasks
+        if not selected_rows or selected_rows[0].row() >= len(tasks):
+            msg_box = QMessageBox()
+            msg_box.setIcon(QMessageBox.Warning)
+            msg_box.setWindowTitle("警告")
+            msg_box.setText("请先选择一个任务")
+            msg_box.exec_()
+            return None
+        return tasks[selected_rows[0].row()]
+        
+    def run_selected_task(self):
+        """立即在后台执行选中的任务"""
+        task = self.selected_task()
+        if task is None:
+            return
+        if not self.backup_manager.run_task(task):
+            msg_box = QMessageBox()
+            msg_box.setIcon(QMessageBox.Information)
+            msg_box.setWindowTitle("提示")
+            msg_box.setText("该任务正在执行")
+            msg_box.exec_()
+        self.update_task_list()
+        
+    def toggle_pause_selected_task(self):
+        """暂停或继续选中的任务"""
+        task = self.selected_task()
+        if task is None:
+            return
+        status = self.backup_manager.job_status(task.name)
+        if status is not None and status['state'] == PAUSED:
+            self.backup_manager.resume_task(task.name)
+        else:
+            self.backup_manager.pause_task(task.name)
+        self.update_task_list()
+        
+    def cancel_selected_task(self):
+        """取消选中任务的执行"""
+        task = self.selected_task()
+        if task is None:
+            return
+        self.backup_manager.cancel_task(task.name)
+        self.update_task_list()
+            
     def add_task(self):
         """新增任务"""
         from src.ui.backup_dialog import BackupDialog
@@ -153,7 +222,7 @@ class BackupManagerDialog(QDialog):
         if reply == QMessageBox.Yes:
             # 从后往前删除，避免索引问题
             for index in sorted([row.row() for row in selected_rows], reverse=True):
-                del self.backup_manager.backup_tasks[index]
+                self.backup_manager.remove_task(index)
             self.update_task_list()
             
     def view_backup_location(self):
@@ -0,0 +1,151 @@
+import time
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from src.core.file_manager import FileManager
+from src.core.metadata_index import MetadataIndex
+
+
+class DirectoryLoadThread(QThread):
+    """目录加载线程，用于按需展开时在后台扫描目录"""
+
+    # 加载完成信号: (目录路径, 目录节点, 路径索引, 目录修改时间)
+    loaded = pyqtSignal(str, object, object, object)
+
+    def __init__(self, path, recursive=False):
+        super().__init__()
+        self.path = path
+        # 为 True 时加载完整子树，否则只加载直接子节点
+        self.recursive = recursive
+
+    def run(self):
+        """在独立的 FileManager 中扫描，避免在后台线程中修改当前树"""
+        scanner = FileManager()
+        if self.recursive:
+            node = scanner.load_files_tree(self.path)
+        else:
+            node = scanner.load_files_level(self.path)
+        self.loaded.emit(self.path, node, scanner.node_index, scanner.dir_mtimes)
+
+
+class IndexLoadThread(QThread):
+    """索引加载线程：在后台从元数据索引恢复上次扫描的文件树，支持取消"""
+
+    # 加载完成信号: (加载使用的 FileManager, 文件树，索引中没有该目录时为 None)
+    loaded = pyqtSignal(object, object)
+
+    def __init__(self, directory, db_path):
+        super().__init__()
+        self.directory = directory
+        self.db_path = db_path
+        self._cancelled = False
+
+    def cancel(self):
+        """请求取消加载，已开始的加载完成后丢弃结果"""
+        self._cancelled = True
+
+    def run(self):
+        """SQLite 连接不能跨线程使用，在后台线程中打开独立的连接"""
+        scanner = FileManager()
+        tree = None
+        try:
+            metadata_index = MetadataIndex(self.db_path)
+            try:
+                tree = scanner.load_from_index(metadata_index, self.directory)
+            finally:
+                metadata_index.close()
+        except Exception as e:
+            print(f"读取文件索引失败: {e}")
+        if not self._cancelled:
+            self.loaded.emit(scanner, tree)
+
+
+class NodeStoreLoadThread(QThread):
+    """列式存储扫描线程：在后台把目录扫描到紧凑的列式存储中，支持取消"""
+
+    # 扫描完成信号: (扫描使用的 FileManager, 列式存储 NodeStore)
+    loaded = pyqtSignal(object, object)
+
+    def __init__(self, directory):
+        super().__init__()
+        self.directory = directory
+        self._cancelled = False
+
+    def cancel(self):
+        """请求取消扫描，已开始的扫描完成后丢弃结果"""
+        self._cancelled = True
+
+    def run(self):
+        scanner = FileManager()
+        store = scanner.load_node_store(self.directory)
+        if not self._cancelled:
+            self.loaded.emit(scanner, store)
+
+
+class ScanThread(QThread):
+    """后台扫描线程，以流的方式分批产出扫描结果，支持取消"""
+
+    # 扫描批次信号: [(父目录路径, [子节点...]), ...]
+    batch_ready = pyqtSignal(object)
+    # 进度信号: (已扫描目录数, 已发现节点数)
+    progress = pyqtSignal(int, int)
+    # 扫描结束信号: (扫描使用的 FileManager, 是否被取消)
+    scan_finished = pyqtSignal(object, bool)
+
+    def __init__(self, directory, workers=1, batch_interval=0.05):
+        super().__init__()
+        self.directory = directory
+        self.workers = workers
+        # 两次产出批次之间的最短间隔（秒），第一批立即产出
+        self.batch_interval = batch_interval
+        self._cancelled = False
+
+    def cancel(self):
+        """请求取消扫描"""
+        self._cancelled = True
+
+    def run(self):
+        """逐个目录扫描，按时间间隔将已扫描目录的子节点分批发出"""
+        scanner = FileManager()
+        pending = []
+        directories = 0
+        nodes = 0
+        last_emit = 0.0
+
+        scan = scanner.iter_files_tree(self.directory, self.workers)
+        for dir_node in scan:
+            if self._cancelled:
+                scan.close()
+                break
+            pending.append((dir_node['path'], dir_node['children']))
+            directories += 1
+            nodes += len(dir_node['children'])
+
+            now = time.perf_counter()
+            if now - last_emit >= self.batch_interval:
+                self.batch_ready.emit(pending)
+                self.progress.emit(directories, nodes)
+                pending = []
+                last_emit = now
+
+        if pending and not self._cancelled:
+            self.batch_ready.emit(pending)
+            self.progress.emit(directories, nodes)
+        self.scan_finished.emit(scanner, self._cancelled)
+
+
+class ReconcileThread(QThread):
+    """后台对比线程：检查目录修改时间，读取发生变化的目录的最新内容"""
+
+    # 对比完成信号: (变化路径的最新状态, 发生变化的目录的当前修改时间)
+    reconciled = pyqtSignal(object, object)
+
+    def __init__(self, file_manager):
+        super().__init__()
+        self.file_manager = file_manager
+        # 在界面线程中复制目录修改时间，后台线程只读取副本
+        self.dir_mtimes = dict(file_manager.dir_mtimes)
+
+    def run(self):
+        prepared, stale_mtimes = self.file_manager.reconcile(self.dir_mtimes)
+        self.reconciled.emit(prepared, stale_mtimes)
@@ -0,0 +1,188 @@
+import os
+from datetime import datetime
+
+from PyQt5.QtCore import Qt, QThread, pyqtSignal
+from PyQt5.QtWidgets import (
+    QDialog,
+    QHBoxLayout,
+    QHeaderView,
+    QLabel,
+    QMessageBox,
+    QProgressBar,
+    QPushButton,
+    QTreeWidget,
+    QTreeWidgetItem,
+    QVBoxLayout,
+)
+
+from src.core.duplicate_finder import DuplicateFinder, HashCache
+
+# 各阶段的显示名称
+STAGE_NAMES = {'partial': "比较首尾内容", 'full': "比较完整内容"}
+
+
+class DuplicateScanThread(QThread):
+    """重复文件查找线程"""
+
+    # 进度信号: (阶段, 已完成, 总数)
+    progress = pyqtSignal(str, int, int)
+    # 完成信号: (重复文件组, 统计信息)，被取消时重复文件组为 None
+    found = pyqtSignal(object, object)
+
+    def __init__(self, files, cache_path):
+        super().__init__()
+        self.files = files
+        self.cache_path = cache_path
+        self.finder = DuplicateFinder(workers=min(8, (os.cpu_count() or 1) * 2))
+
+    def cancel(self):
+        """请求取消查找"""
+        self.finder.cancel()
+
+    def run(self):
+        """在后台线程中使用独立的缓存连接查找"""
+        cache = None
+        groups = None
+        try:
+            cache = HashCache(self.cache_path)
+            self.finder.cache = cache
+            groups = self.finder.find(self.files, progress=self.progress.emit)
+        except Exception as e:
+            print(f"查找重复文件失败: {e}")
+        finally:
+            if cache is not None:
+                cache.close()
+        self.found.emit(groups, self.finder.stats)
+
+
+class DuplicateDialog(QDialog):
+    """重复文件对话框：按组显示内容相同的文件及可释放的空间"""
+
+    def __init__(self, file_manager, files, cache_path, parent=None):
+        super().__init__(parent)
+        self.file_manager = file_manager
+        # [(路径, 大小, 修改时间), ...]
+        self.files = files
+        self.cache_path = cache_path
+        self.scan_thread = None
+        self.setWindowTitle("查找重复文件")
+        self.resize(1000, 650)
+        self.create_ui()
+
+    def create_ui(self):
+        """创建对话框界面"""
+        layout = QVBoxLayout()
+
+        self.summary_label = QLabel(f"共 {len(self.files)} 个文件")
+        layout.addWidget(self.summary_label)
+
+        self.group_tree = QTreeWidget()
+        self.group_tree.setHeaderLabels(["文件", "大小", "修改时间", "可释放"])
+        self.group_tree.header().setSectionResizeMode(QHeaderView.Interactive)
+        self.group_tree.setColumnWidth(0, 560)
+        self.group_tree.setColumnWidth(1, 110)
+        self.group_tree.setColumnWidth(2, 160)
+        self.group_tree.setColumnWidth(3, 110)
+        layout.addWidget(self.group_tree)
+
+        self.progress_bar = QProgressBar()
+        self.progress_bar.hide()
+        self.status_label = QLabel()
+        layout.addWidget(self.progress_bar)
+        layout.addWidget(self.status_label)
+
+        button_layout = QHBoxLayout()
+        self.start_btn = QPushButton("开始查找")
+        self.start_btn.clicked.connect(self.start_scan)
+        self.cancel_btn = QPushButton("停止")
+        self.cancel_btn.clicked.connect(self.cancel_scan)
+        self.cancel_btn.setEnabled(False)
+        self.close_btn = QPushButton("关闭")
+        self.close_btn.clicked.connect(self.accept)
+
+        button_layout.addWidget(self.start_btn)
+        button_layout.addWidget(self.cancel_btn)
+        button_layout.addStretch()
+        button_layout.addWidget(self.close_btn)
+        layout.addLayout(button_layout)
+
+        self.setLayout(layout)
+
+    def start_scan(self):
+        """开始查找重复文件"""
+        if not self.files:
+            QMessageBox.warning(self, "警告", "没有可查找的文件")
+            return
+        self.group_tree.clear()
+        self.start_btn.setEnabled(False)
+        self.cancel_btn.setEnabled(True)
+        self.progress_bar.setValue(0)
+        self.progress_bar.show()
+        self.status_label.setText("正在按大小分组...")
+
+        self.scan_thread = DuplicateScanThread(self.files, self.cache_path)
+        self.scan_thread.progress.connect(self.update_progress)
+        self.scan_thread.found.connect(self.show_groups)
+        self.scan_thread.start()
+
+    def cancel_scan(self):
+        """停止查找"""
+        if self.scan_thread is not None:
+            self.scan_thread.cancel()
+            self.status_label.setText("正在停止...")
+
+    def update_progress(self, stage, done, total):
+        """更新进度"""
+        self.progress_bar.setMaximum(max(total, 1))
+        self.progress_bar.setValue(done)
+        self.status_label.setText(f"{STAGE_NAMES.get(stage, stage)}: {done}/{total}")
+
+    def show_groups(self, groups, stats):
+        """显示重复文件组"""
+        if self.sender() is not self.scan_thread:
+            return
+        self.scan_thread.wait()
+        self.scan_thread = None
+        self.start_btn.setEnabled(True)
+        self.cancel_btn.setEnabled(False)
+        self.progress_bar.hide()
+        if groups is None:
+            self.status_label.setText("查找已停止")
+            return
+
+        format_size = self.file_manager.format_size
+        modified = {path: mtime for path, _size, mtime in self.files}
+        self.group_tree.setUpdatesEnabled(False)
+        for group in groups:
+            group_item = QTreeWidgetItem(self.group_tree)
+            group_item.setText(0, f"{len(group['paths'])} 个相同文件")
+            group_item.setText(1, format_size(group['size']))
+            group_item.setText(3, format_size(group['reclaimable']))
+            for path in group['paths']:
+                file_item = QTreeWidgetItem(group_item)
+                file_item.setText(0, path)
+                file_item.setText(1, format_size(group['size']))
+                file_item.setText(
+                    2, datetime.fromtimestamp(modified[path]).strftime("%Y-%m-%d %H:%M:%S")
+                )
+                file_item.setData(0, Qt.UserRole, path)
+        self.group_tree.setUpdatesEnabled(True)
+
+        total = sum(group['reclaimable'] for group in groups)
+        files = sum(len(group['paths']) for group in groups)
+        self.summary_label.setText(
+            f"共 {len(self.files)} 个文件，发现 {len(groups)} 组重复（{files} 个文件），"
+            f"可释放 {format_size(total)}"
+        )
+        cached = stats.get('partial_cached', 0) + stats.get('full_cached', 0)
+        self.status_label.setText(
+            f"按大小筛选后 {stats.get('size_candidates', 0)} 个候选，"
+            f"完整比较 {stats.get('full_candidates', 0)} 个，使用缓存 {cached} 次"
+        )
+
+    def done(self, result):
+        """关闭对话框时停止查找"""
+        self.cancel_scan()
+        if self.scan_thread is not None:
+            self.scan_thread.wait()
+        super().done(result)
@@ -0,0 +1,586 @@
+import operator
+from collections import OrderedDict
+from datetime import datetime
+
+from PyQt5.QtCore import QAbstractItemModel, QModelIndex, Qt, pyqtSignal
+
+from src.core.selection import CHECKED, SelectionSet
+
+# 列标题
+COLUMNS = ["文件名", "大小", "创建时间", "修改时间", "类型", "路径"]
+
+# 各列的排序键：按原始数值比较大小和时间，目录按递归总大小和最新修改时间参与排序
+SORT_KEYS = [
+    lambda node: node['name'].lower(),
+    lambda node: node.get('size', 0) or 0,
+    lambda node: node.get('created', 0.0) if node['type'] == 'file' else 0.0,
+    lambda node: (node['modified'] if node['type'] == 'file'
+                  else node.get('newest_modified', 0.0)),
+    lambda node: node['extension'] if node['type'] == 'file' else "目录",
+    lambda node: node['path'],
+]
+
+# 勾选状态与 Qt.CheckState 的对应
+CHECK_STATES = [Qt.Unchecked, Qt.PartiallyChecked, Qt.Checked]
+
+# 按数值排序的列，其余列按文本排序
+NUMERIC_COLUMNS = {1, 2, 3}
+
+
+# 排序相关的函数在函数内导入 numpy，只在第一次排序时加载，不拖慢程序启动
+def sort_keys(nodes, column):
+    """计算一组节点在某列上的排序键数组
+
+    数值列直接取原始字节数和时间戳，文本列先排序一次转换为密集排名（相同文本排名相同），
+    之后同一列的排序都只需对整数数组做稳定排序
+    """
+    import numpy as np
+
+    key = SORT_KEYS[column]
+    if column in NUMERIC_COLUMNS:
+        return np.fromiter((key(node) for node in nodes), dtype=np.float64, count=len(nodes))
+    values = [key(node) for node in nodes]
+    ranks = np.zeros(len(values), dtype=np.int64)
+    if len(values) > 1:
+        order = sorted(range(len(values)), key=values.__getitem__)
+        ordered = [values[i] for i in order]
+        # 与前一项不同时排名加一
+        changed = np.fromiter(
+            map(operator.ne, ordered[1:], ordered[:-1]), dtype=np.int64, count=len(values) - 1
+        )
+        ranks[order[1:]] = np.cumsum(changed)
+    return ranks
+
+
+def sort_order(keys, descending):
+    """返回稳定排序的下标，倒序时相同键仍保持原有顺序"""
+    import numpy as np
+
+    return np.argsort(-keys if descending else keys, kind='stable')
+
+
+class TreeEntry:
+    """模型中已构建的一行：对应的节点、父行、在父行 children 中的位置，以及已构建的子行
+
+    QModelIndex 的内部指针指向 TreeEntry，节点对象本身可以被替换（例如扫描结束后替换根节点）。
+    children 按加入顺序保存（未构建时为 None），排序只改变 order（行号 -> 位置）和
+    rows（位置 -> 行号）两个数组，None 表示行号与位置相同。
+    keys 缓存子行在各列上的排序键数组（列 -> 数组，与 children 顺序一致）
+    """
+
+    __slots__ = ('node', 'parent', 'slot', 'children', 'order', 'rows', 'keys')
+
+    def __init__(self, node, parent, slot):
+        self.node = node
+        self.parent = parent
+        self.slot = slot
+        self.children = None
+        self.order = None
+        self.rows = None
+        self.keys = None
+
+    @property
+    def row(self):
+        """在父行中的当前行号"""
+        if self.parent is None or self.parent.rows is None:
+            return self.slot
+        return int(self.parent.rows[self.slot])
+
+    def child(self, row):
+        """返回指定行号的子行"""
+        if self.order is None:
+            return self.children[row]
+        return self.children[self.order[row]]
+
+    def set_order(self, order):
+        """设置子行的显示顺序，order[行号] 为子行在 children 中的位置"""
+        import numpy as np
+
+        self.order = order
+        if order is None:
+            self.rows = None
+        else:
+            self.rows = np.empty_like(order)
+            self.rows[order] = np.arange(len(order))
+
+
+class FileTreeModel(QAbstractItemModel):
+    """直接基于扫描得到的文件树的树状模型
+
+    只为视图访问过的目录构建行，显示文本在绘制时才格式化并缓存少量结果，
+    避免为每个文件创建控件项。文件树的增删改通过 insert_node/update_node/remove_node 同步
+    """
+
+    # 请求加载未加载的目录: (目录路径, 是否加载完整子树)
+    fetch_requested = pyqtSignal(str, bool)
+
+    def __init__(self, file_manager, cache_size=4096, parent=None):
+        super().__init__(parent)
+        self.file_manager = file_manager
+        self._root = TreeEntry(None, None, 0)
+        self._root.children = []
+        # 路径 -> 已构建的行
+        self._entries = {}
+        # 已构建子行的目录行
+        self._levels = set()
+        # 已勾选的文件及目录的三态勾选
+        self.selection = SelectionSet()
+        # 筛选后应显示的节点（支持 `节点 in visible` 查询），None 表示显示全部
+        self._visible = None
+        # 后台扫描期间只显示子节点已完整的目录
+        self._streaming = False
+        self._ready = set()
+        # 当前排序: (列, 顺序)，None 表示保持文件树中的顺序
+        self._sort = None
+        # 显示文本缓存: (行, 列) -> 文本
+        self._cache = OrderedDict()
+        self._cache_size = cache_size
+
+    # ---- 文件树 ----
+
+    def set_tree(self, tree, streaming=False):
+        """显示新的文件树，streaming 为 True 时子节点由 children_ready 分批加入"""
+        self.beginResetModel()
+        self._root.children = []
+        self._entries = {}
+        self._levels = set()
+        self._cache.clear()
+        self.selection = SelectionSet(tree['path'] if tree else None)
+        self._visible = None
+        self._streaming = streaming
+        self._ready = set()
+        if tree:
+            self._root.children = [self._add_entry(tree, self._root, 0)]
+        self.endResetModel()
+
+    def root_node(self):
+        """返回当前显示的根节点"""
+        return self._root.children[0].node if self._root.children else None
+
+    def root_index(self):
+        """返回根节点的索引"""
+        if not self._root.children:
+            return QModelIndex()
+        return self.createIndex(0, 0, self._root.children[0])
+
+    def children_ready(self, parent_path, children):
+        """后台扫描产出目录的（一部分）子节点：已构建的目录立即显示新行
+
+        大目录的子节点可以分多次加入；目录在此期间被展开时已从文件树构建了全部子行，
+        之后加入的子节点不再重复显示
+        """
+        self._ready.add(parent_path)
+        entry = self._entries.get(parent_path)
+        if entry is None or entry.children is None:
+            return
+        nodes = [
+            node for node in self._filter_children(children) if node['path'] not in self._entries
+        ]
+        if not nodes:
+            return
+        start = len(entry.children)
+        self.beginInsertRows(self._index_of(entry), start, start + len(nodes) - 1)
+        self._append_children(entry, nodes)
+        self.endInsertRows()
+
+    def finish_streaming(self, tree):
+        """后台扫描结束：用扫描得到的根节点替换临时根节点"""
+        self._streaming = False
+        self._ready = set()
+        if self._root.children:
+            self._root.children[0].node = tree
+            self.update_node(tree)
+
+    def insert_node(self, parent_path, node):
+        """新节点加入文件树"""
+        import numpy as np
+
+        entry = self._entries.get(parent_path)
+        if entry is None or entry.children is None or node['path'] in self._entries:
+            return
+        if self._visible is not None and node not in self._visible:
+            return
+        row = self._insert_position(entry, node)
+        self.beginInsertRows(self._index_of(entry), row, row)
+        slot = len(entry.children)
+        entry.children.append(self._add_entry(node, entry, slot))
+        if entry.order is not None or row != slot:
+            order = entry.order if entry.order is not None else np.arange(slot)
+            entry.set_order(np.insert(order, row, slot))
+        if entry.keys is not None:
+            entry.keys = {
+                column: np.append(keys, sort_keys([node], column))
+                for column, keys in entry.keys.items() if column in NUMERIC_COLUMNS
+            }
+        self.endInsertRows()
+
+    def update_node(self, node):
+        """节点信息发生变化"""
+        entry = self._entries.get(node['path'])
+        if entry is None:
+            return
+        entry.node = node
+        parent = entry.parent
+        if parent is not None and parent.keys is not None:
+            # 数值键原地更新，文本键（名称、路径不会变化）保留
+            for column, keys in parent.keys.items():
+                if column in NUMERIC_COLUMNS:
+                    keys[entry.slot] = SORT_KEYS[column](node)
+        self.selection.refresh(node)
+        for column in range(len(COLUMNS)):
+            self._cache.pop((entry, column), None)
+        index = self._index_of(entry)
+        self.dataChanged.emit(index, index.sibling(index.row(), len(COLUMNS) - 1))
+
+    def remove_node(self, node):
+        """节点从文件树中移除，同时取消其勾选"""
+        import numpy as np
+
+        self.selection.deselect(node)
+        entry = self._entries.get(node['path'])
+        if entry is None or entry.parent is None:
+            return
+        self._emit_ancestors_changed(entry)
+        parent = entry.parent
+        slot = entry.slot
+        self.beginRemoveRows(self._index_of(parent), entry.row, entry.row)
+        del parent.children[slot]
+        for child in parent.children[slot:]:
+            child.slot -= 1
+        if parent.order is not None:
+            order = parent.order[parent.order != slot]
+            order[order > slot] -= 1
+            parent.set_order(order)
+        if parent.keys is not None:
+            parent.keys = {column: np.delete(keys, slot) for column, keys in parent.keys.items()}
+        self._forget_entry(entry)
+        self.endRemoveRows()
+
+    def reload_children(self, dir_node):
+        """目录内容加载完成：显示其子节点，目录已勾选时同时勾选新加载的内容"""
+        entry = self._entries.get(dir_node['path'])
+        if entry is None:
+            return
+        entry.node = dir_node
+        index = self._index_of(entry)
+        if entry.children:
+            self.beginRemoveRows(index, 0, len(entry.children) - 1)
+            for child in entry.children:
+                self._forget_entry(child)
+            entry.children = []
+            entry.set_order(None)
+            entry.keys = None
+            self.endRemoveRows()
+        if entry.children is not None:
+            nodes = self._filter_children(dir_node['children'])
+            if nodes:
+                self.beginInsertRows(index, 0, len(nodes) - 1)
+                self._append_children(entry, nodes)
+                self.endInsertRows()
+        self.update_node(dir_node)
+        if self.selection.is_marked(dir_node['path']):
+            self.set_checked(dir_node, True)
+
+    def set_visible(self, visible):
+        """只显示 visible 中的节点（例如 FileColumns.filter 返回的 VisibleNodes），None 表示显示全部"""
+        self.beginResetModel()
+        self._visible = visible
+        root = self.root_node()
+        self._root.children = []
+        self._entries = {}
+        self._levels = set()
+        self._cache.clear()
+        if root is not None:
+            self._root.children = [self._add_entry(root, self._root, 0)]
+        self.endResetModel()
+
+    def node(self, index):
+        """返回索引对应的节点"""
+        if not index.isValid():
+            return None
+        return index.internalPointer().node
+
+    def index_of_path(self, path):
+        """返回已构建行的索引，未构建时返回无效索引"""
+        entry = self._entries.get(path)
+        return self._index_of(entry) if entry is not None else QModelIndex()
+
+    # ---- 勾选 ----
+
+    def is_checked(self, node):
+        """文件已勾选，或目录下的文件已全部勾选"""
+        return self.selection.state(node) == CHECKED
+
+    def set_checked(self, node, checked):
+        """勾选或取消勾选节点，目录包括其整个子树"""
+        if checked:
+            # 尚未加载的目录在后台加载完整子树，加载完成后再勾选其内容
+            for directory in self.selection.select(node):
+                self.fetch_requested.emit(directory['path'], True)
+        else:
+            self.selection.deselect(node)
+        self._emit_checks_changed(node)
+
+    def clear_checks(self):
+        """取消所有勾选"""
+        self.selection.clear()
+        root = self.root_node()
+        if root is not None:
+            self._emit_checks_changed(root)
+
+    def selected_snapshot(self):
+        """返回已勾选文件的只读快照"""
+        return self.selection.snapshot()
+
+    def _emit_checks_changed(self, node):
+        """通知视图刷新节点、其祖先以及已构建子行的勾选状态，每一级子行只发出一次信号"""
+        entry = self._entries.get(node['path'])
+        if entry is None:
+            return
+        index = self._index_of(entry)
+        self.dataChanged.emit(index, index, [Qt.CheckStateRole])
+        self._emit_ancestors_changed(entry)
+        stack = [entry]
+        while stack:
+            current = stack.pop()
+            if current.children:
+                parent = self._index_of(current)
+                last = len(current.children) - 1
+                self.dataChanged.emit(
+                    self.index(0, 0, parent), self.index(last, 0, parent), [Qt.CheckStateRole]
+                )
+                stack.extend(child for child in current.children if child.children)
+
+    def _emit_ancestors_changed(self, entry):
+        parent = entry.parent
+        while parent is not None and parent is not self._root:
+            index = self._index_of(parent)
+            self.dataChanged.emit(index, index, [Qt.CheckStateRole])
+            parent = parent.parent
+
+    # ---- QAbstractItemModel ----
+
+    def index(self, row, column, parent=QModelIndex()):
+        entry = parent.internalPointer() if parent.isValid() else self._root
+        children = self._build(entry)
+        if 0 <= row < len(children) and 0 <= column < len(COLUMNS):
+            return self.createIndex(row, column, entry.child(row))
+        return QModelIndex()
+
+    def parent(self, index):
+        if not index.isValid():
+            return QModelIndex()
+        parent = index.internalPointer().parent
+        if parent is None or parent is self._root:
+            return QModelIndex()
+        return self.createIndex(parent.row, 0, parent)
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.column() > 0:
+            return 0
+        entry = parent.internalPointer() if parent.isValid() else self._root
+        if entry is not self._root and entry.node['type'] != 'directory':
+            return 0
+        return len(self._build(entry))
+
+    def columnCount(self, parent=QModelIndex()):
+        return len(COLUMNS)
+
+    def hasChildren(self, parent=QModelIndex()):
+        if not parent.isValid():
+            return bool(self._root.children)
+        entry = parent.internalPointer()
+        node = entry.node
+        if node['type'] != 'directory':
+            return False
+        if entry.children is not None:
+            return bool(entry.children) or not node.get('loaded', True)
+        if self._streaming and node['path'] not in self._ready:
+            return True
+        return bool(node['children']) or not node.get('loaded', True)
+
+    def canFetchMore(self, parent):
+        if not parent.isValid():
+            return False
+        node = parent.internalPointer().node
+        return node['type'] == 'directory' and not node.get('loaded', True)
+
+    def fetchMore(self, parent):
+        if parent.isValid():
+            self.fetch_requested.emit(parent.internalPointer().node['path'], False)
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        flags = Qt.ItemIsEnabled | Qt.ItemIsSelectable
+        if index.column() == 0:
+            flags |= Qt.ItemIsUserCheckable
+        return flags
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return COLUMNS[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        entry = index.internalPointer()
+        node = entry.node
+        column = index.column()
+        if role == Qt.DisplayRole:
+            key = (entry, column)
+            text = self._cache.get(key)
+            if text is None:
+                text = self._format(node, column)
+                self._cache[key] = text
+                if len(self._cache) > self._cache_size:
+                    self._cache.popitem(last=False)
+            else:
+                self._cache.move_to_end(key)
+            return text
+        if role == Qt.CheckStateRole and column == 0:
+            return CHECK_STATES[self.selection.state(node)]
+        if role == Qt.UserRole:
+            return node['path']
+        if role == Qt.ToolTipRole and column == 1 and node['type'] == 'directory':
+            if 'file_count' in node:
+                return f"{node['file_count']} 个文件"
+        return None
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if not index.isValid() or role != Qt.CheckStateRole or index.column() != 0:
+            return False
+        self.set_checked(index.internalPointer().node, value != Qt.Unchecked)
+        return True
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        """按列对已构建的各级子行做稳定排序，之后构建的目录也按此顺序排列
+
+        每一级子行的排序键数组只在第一次按该列排序时计算，之后切换顺序或列时复用；
+        排序只重新计算行号数组，不移动子行对象
+        """
+        self._sort = (column, order)
+        self.layoutAboutToBeChanged.emit()
+        old = self.persistentIndexList()
+        targets = [(index.internalPointer(), index.column()) for index in old]
+
+        for entry in self._levels:
+            if len(entry.children) > 1:
+                entry.set_order(self._sort_order(entry))
+
+        self.changePersistentIndexList(
+            old, [self.createIndex(entry.row, column, entry) for entry, column in targets]
+        )
+        self.layoutChanged.emit()
+
+    # ---- 内部实现 ----
+
+    def _sort_order(self, entry, start=0):
+        """按当前排序列计算 children[start:] 的稳定排序，返回在 children 中的位置数组"""
+        column, order = self._sort
+        if entry.keys is None:
+            entry.keys = {}
+        keys = entry.keys.get(column)
+        if keys is None:
+            keys = sort_keys([child.node for child in entry.children], column)
+            entry.keys[column] = keys
+        return start + sort_order(keys[start:], order == Qt.DescendingOrder)
+
+    def _append_children(self, entry, nodes):
+        """在目录行末尾加入一批子节点，排序时这批子行按当前排序列排列"""
+        import numpy as np
+
+        start = len(entry.children)
+        entry.children.extend(
+            self._add_entry(node, entry, slot) for slot, node in enumerate(nodes, start)
+        )
+        self._levels.add(entry)
+        # 新的子行使已缓存的排序键失效
+        entry.keys = None
+        if self._sort is None or len(nodes) < 2:
+            if entry.order is not None:
+                entry.set_order(np.concatenate([entry.order, np.arange(start, len(entry.children))]))
+            return
+        order = self._sort_order(entry, start)
+        if start:
+            order = np.concatenate([entry.order if entry.order is not None else np.arange(start),
+                                    order])
+        entry.set_order(order)
+
+    def _insert_position(self, entry, node):
+        """二分查找新节点在已排序子行中的位置，相同键插在已有行之后"""
+        if self._sort is None:
+            return len(entry.children)
+        column, order = self._sort
+        sort_key = SORT_KEYS[column]
+        key = sort_key(node)
+        descending = order == Qt.DescendingOrder
+        low, high = 0, len(entry.children)
+        while low < high:
+            middle = (low + high) // 2
+            other = sort_key(entry.child(middle).node)
+            if (key > other) if descending else (key < other):
+                high = middle
+            else:
+                low = middle + 1
+        return low
+
+    def _format(self, node, column):
+        """格式化单元格的显示文本"""
+        if column == 0:
+            return node['name']
+        if column == 5:
+            return node['path']
+        if node['type'] == 'directory':
+            if column == 1:
+                # 尚未汇总（扫描中或未加载）的目录留空
+                if 'size' not in node or not node.get('loaded', True):
+                    return ""
+                return self.file_manager.format_size(node['size'])
+            if column == 4:
+                return "目录"
+            return ""
+        if column == 1:
+            return self.file_manager.format_size(node['size'])
+        if column == 2:
+            return datetime.fromtimestamp(node['created']).strftime("%Y-%m-%d %H:%M:%S")
+        if column == 3:
+            return datetime.fromtimestamp(node['modified']).strftime("%Y-%m-%d %H:%M:%S")
+        return node['extension']
+
+    def _build(self, entry):
+        """构建目录的子行（只在视图第一次访问时构建）"""
+        if entry.children is None:
+            node = entry.node
+            entry.children = []
+            if not self._streaming or node['path'] in self._ready:
+                self._append_children(entry, self._filter_children(node['children']))
+        return entry.children
+
+    def _filter_children(self, children):
+        if self._visible is None:
+            return list(children)
+        return [child for child in children if child in self._visible]
+
+    def _add_entry(self, node, parent, row):
+        entry = TreeEntry(node, parent, row)
+        self._entries[node['path']] = entry
+        return entry
+
+    def _forget_entry(self, entry):
+        """移除行及其已构建的子行"""
+        stack = [entry]
+        while stack:
+            current = stack.pop()
+            self._entries.pop(current.node['path'], None)
+            self._levels.discard(current)
+            for column in range(len(COLUMNS)):
+                self._cache.pop((current, column), None)
+            if current.children:
+                stack.extend(current.children)
+
+    def _index_of(self, entry):
+        if entry is None or entry is self._root:
+            return QModelIndex()
+        return self.createIndex(entry.row, 0, entry)
@@ -1,10 +1,10 @@
 import json
 import os
-from datetime import datetime
-from io import BytesIO
+import queue
+import time
+from collections import deque
 
-from PIL import Image, ImageDraw
-from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtCore import Qt, QTimer, pyqtSignal
 from PyQt5.QtGui import QIcon, QPixmap
 from PyQt5.QtWidgets import (
     QAction,
@@ -18,22 +18,41 @@ from PyQt5.QtWidgets import (
     QMainWindow,
     QMenu,
     QMessageBox,
+    QProgressBar,
     QPushButton,
     QSystemTrayIcon,
-    QTreeWidget,
-    QTreeWidgetItem,
+    QTreeView,
     QVBoxLayout,
     QWidget,
 )
 
 from src.core.backup_manager import BackupManager
+from src.core.backup_service import BackupClient, RemoteBackupManager
 from src.core.file_manager import FileManager
-from src.ui.backup_dialog import BackupDialog
-from src.ui.backup_manager_dialog import BackupManagerDialog
-from src.ui.print_dialog import PrintDialog
+from src.core.file_watcher import create_watcher
+from src.core.metadata_index import MetadataIndex
+from src.ui.directory_loader import (
+    DirectoryLoadThread,
+    IndexLoadThread,
+    NodeStoreLoadThread,
+    ReconcileThread,
+    ScanThread,
+)
+from src.ui.file_tree_model import FileTreeModel
+from src.utils.startup_profiler import profiler
+
+# 两次检查备份计划之间的最长间隔（秒）
+BACKUP_MAX_SLEEP = 300
+# 每次定时器触发时显示扫描结果最多占用的时间（秒）
+SCAN_DRAIN_BUDGET = 0.03
+# 大目录的子节点按此数量分批显示
+SCAN_CHUNK_SIZE = 1000
 
 
 class FileManagementApp(QMainWindow):
+    # 备份计划改变，可能在备份的工作线程中发出
+    backup_schedule_changed = pyqtSignal()
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle("BHRM文件管理器")
@@ -45,44 +64,129 @@ class FileManagementApp(QMainWindow):
         # 配置文件路径
         self.config_file = "file_management_config.json"
 
+        # 文件元数据索引，启动时从索引恢复文件树，后台只对比发生变化的目录
+        self.metadata_index = MetadataIndex("file_index.db")
+        # 后台对比线程
+        self.reconcile_thread = None
+
+        # 扫描线程数，网络共享等高延迟目录可调大以并行扫描
+        self.scan_workers = 1
+
+        # 是否使用紧凑的列式存储保存文件树（适用于百万级文件的目录）
+        self.compact_tree = False
+
+        # 是否按需加载：只扫描顶层，展开目录时再在后台加载其内容
+        self.lazy_loading = False
+        # 正在后台加载的目录路径 -> 加载线程
+        self.loading_dirs = {}
+
+        # 是否实时监视目录变化
+        self.watch_enabled = True
+        self.watcher = None
+        # 监视线程准备好的 (变化批次, 目录修改时间)，以及待同步到树状视图的变更
+        self.watch_queue = queue.Queue()
+        self.pending_tree_changes = deque()
+
+        # 后台扫描线程
+        self.scan_thread = None
+        # 等待显示的扫描结果 (父目录路径, 子节点)，以及扫描结束后待接管的扫描器
+        self.pending_scan_batches = deque()
+        self.scan_result = None
+        # 已取消但尚未结束的线程，保留引用直到其结束
+        self.retired_threads = set()
+
         # 核心管理器
         self.file_manager = FileManager()
-        self.backup_manager = BackupManager()
+        # 备份服务正在运行时作为其客户端，否则在本进程中执行备份
+        backup_client = BackupClient()
+        if backup_client.ping():
+            self.backup_manager = RemoteBackupManager(backup_client)
+        else:
+            self.backup_manager = BackupManager()
+        # 退出时取消正在执行的备份，不等待其复制完成
+        QApplication.instance().aboutToQuit.connect(self.backup_manager.shutdown)
 
         # 存储文件信息
         self.files_tree = {}
-        self.selected_files = []
+
+        # 当前的筛选条件、文件树的列式快照（文件树变化后重建），以及是否需要重新筛选
+        self.filter_predicates = []
+        self.file_columns = None
+        self.filter_dirty = False
+
+        # 上次打开的目录，窗口首次绘制后再开始加载
+        self.initial_directory = None
+        self.first_paint_done = False
 
         # 创建系统托盘图标
         self.create_system_tray()
+        profiler.mark("托盘图标")
 
         # 创建主界面
         self.create_main_ui()
+        profiler.mark("创建界面")
 
         # 加载配置
         self.load_config()
+        profiler.mark("加载配置")
 
         # 初始化定时器
+        # 单次定时器，每次在最早的备份任务到期时触发，最长间隔 BACKUP_MAX_SLEEP
         self.backup_timer = QTimer()
+        self.backup_timer.setSingleShot(True)
         self.backup_timer.timeout.connect(self.check_backup_tasks)
-        self.backup_timer.start(60000)  # 每分钟检查一次
+        self.backup_schedule_changed.connect(self.check_backup_tasks)
+        if isinstance(self.backup_manager, BackupManager):
+            self.backup_manager.on_schedule_changed = self.backup_schedule_changed.emit
+        self.backup_timer.start(0)
+
+        # 分批处理文件监视事件，避免一次性更新阻塞界面
+        self.watch_timer = QTimer()
+        self.watch_timer.timeout.connect(self.process_watch_events)
+        self.watch_timer.start(200)
+
+        # 后台扫描期间分批显示扫描结果，每次只占用很短的界面时间
+        self.scan_timer = QTimer()
+        self.scan_timer.setInterval(10)
+        self.scan_timer.timeout.connect(self.drain_scan_batches)
+
+    def paintEvent(self, event):
+        """窗口首次绘制后再开始加载上次打开的目录，避免扫描推迟窗口显示"""
+        super().paintEvent(event)
+        if not self.first_paint_done:
+            self.first_paint_done = True
+            profiler.mark("首次绘制")
+            QTimer.singleShot(0, self.start_initial_load)
+
+    def start_initial_load(self):
+        """加载上次打开的目录"""
+        profiler.report()
+        if profiler.exit_after_report:
+            QApplication.quit()
+            return
+        if self.initial_directory and self.dir_path_edit.text() == self.initial_directory:
+            self.load_files()
+        self.initial_directory = None
 
     def set_window_icon(self):
         """设置窗口图标"""
         icon_path = "static/bhrm_logo.png"
+        self.app_icon = None
         if os.path.exists(icon_path):
-            pixmap = QPixmap(icon_path)
-            self.setWindowIcon(QIcon(pixmap))
+            self.app_icon = QIcon(QPixmap(icon_path))
+            self.setWindowIcon(self.app_icon)
 
     def create_system_tray(self):
         """创建系统托盘图标"""
         # 使用提供的图片文件作为图标
-        icon_path = "static/bhrm_logo.png"
-        if os.path.exists(icon_path):
-            pixmap = QPixmap(icon_path)
-            self.tray_icon = QSystemTrayIcon(QIcon(pixmap), self)
+        if self.app_icon is not None:
+            self.tray_icon = QSystemTrayIcon(self.app_icon, self)
         else:
-            # 如果图片文件不存在，使用默认图标
+            # 如果图片文件不存在，使用 Pillow 绘制默认图标
+            from io import BytesIO
+
+            from PIL import Image, ImageDraw
+
             image = Image.new("RGB", (64, 64), color=(73, 109, 137))
             draw = ImageDraw.Draw(image)
             draw.rectangle([10, 10, 54, 54], outline="white", width=2)
@@ -118,19 +222,35 @@ class FileManagementApp(QMainWindow):
             if os.path.exists(self.config_file):
                 with open(self.config_file, "r", encoding="utf-8") as f:
                     config = json.load(f)
+                    # 加载扫描线程数
+                    self.scan_workers = max(int(config.get("scan_workers", 1)), 1)
+                    # 加载是否实时监视目录变化
+                    self.watch_enabled = bool(config.get("watch_files", True))
+                    # 加载是否使用列式存储
+                    self.compact_tree = bool(config.get("compact_tree", False))
+                    # 加载是否按需加载目录
+                    self.lazy_loading = bool(config.get("lazy_loading", False))
                     # 加载上次选择的目录
                     if "last_directory" in config:
                         self.dir_path_edit.setText(config["last_directory"])
-                        # 自动加载文件
+                        # 窗口首次绘制后自动加载文件
                         if os.path.exists(config["last_directory"]):
-                            self.load_files()
+                            self.initial_directory = config["last_directory"]
         except Exception as e:
             print(f"加载配置文件失败: {e}")
 
     def save_config(self):
         """保存配置文件"""
         try:
-            config = {"last_directory": self.dir_path_edit.text()}
+            config = {
+                "last_directory": self.dir_path_edit.text(),
+                "watch_files": self.watch_enabled,
+                "compact_tree": self.compact_tree,
+                "lazy_loading": self.lazy_loading,
+            }
+            # 扫描线程数只在手动调整过时保存，否则使用代码中的默认值
+            if self.scan_workers != 1:
+                config["scan_workers"] = self.scan_workers
             with open(self.config_file, "w", encoding="utf-8") as f:
                 json.dump(config, f, ensure_ascii=False, indent=2)
         except Exception as e:
@@ -159,20 +279,49 @@ class FileManagementApp(QMainWindow):
         dir_selection_layout.addWidget(self.dir_browse_btn)
         dir_selection_layout.addWidget(self.refresh_btn)
 
-        # 创建文件树状视图
-        self.file_tree = QTreeWidget()
-        self.file_tree.setHeaderLabels(
-            ["文件名", "大小", "创建时间", "修改时间", "类型", "路径"]
-        )
-        self.file_tree.setSelectionMode(QTreeWidget.ExtendedSelection)
+        # 后台扫描进度及取消按钮，仅在扫描时显示
+        self.scan_progress = QProgressBar()
+        self.scan_progress.setRange(0, 0)
+        self.scan_progress.setMaximumWidth(120)
+        self.scan_status_label = QLabel()
+        self.scan_cancel_btn = QPushButton("取消扫描")
+        self.scan_cancel_btn.clicked.connect(self.cancel_scan)
+        for widget in (self.scan_progress, self.scan_status_label, self.scan_cancel_btn):
+            widget.hide()
+            dir_selection_layout.addWidget(widget)
+
+        # 创建筛选栏
+        filter_layout = QHBoxLayout()
+        self.filter_edit = QLineEdit()
+        self.filter_edit.setPlaceholderText("例如: ext:mp4,mkv size>1GB modified<7d")
+        self.filter_edit.returnPressed.connect(self.apply_filter)
+        self.filter_btn = QPushButton("筛选")
+        self.filter_btn.clicked.connect(self.apply_filter)
+        self.clear_filter_btn = QPushButton("清除筛选")
+        self.clear_filter_btn.clicked.connect(self.clear_filter)
+        self.filter_status_label = QLabel()
+
+        filter_layout.addWidget(QLabel("筛选:"))
+        filter_layout.addWidget(self.filter_edit)
+        filter_layout.addWidget(self.filter_btn)
+        filter_layout.addWidget(self.clear_filter_btn)
+        filter_layout.addWidget(self.filter_status_label)
+
+        # 创建文件树状视图，数据直接来自扫描得到的文件树，只为可见行格式化文本
+        self.tree_model = FileTreeModel(self.file_manager, parent=self)
+        self.tree_model.fetch_requested.connect(self.load_directory)
+        self.file_tree = QTreeView()
+        self.file_tree.setModel(self.tree_model)
+        self.file_tree.setUniformRowHeights(True)
+        self.file_tree.setSelectionMode(QTreeView.ExtendedSelection)
         self.file_tree.setContextMenuPolicy(Qt.CustomContextMenu)
         self.file_tree.customContextMenuRequested.connect(self.open_context_menu)
-        self.file_tree.itemClicked.connect(self.on_file_selected)
-        self.file_tree.itemDoubleClicked.connect(self.on_file_double_clicked)
-        self.file_tree.setSortingEnabled(True)
+        self.file_tree.doubleClicked.connect(self.on_file_double_clicked)
 
-        # 连接表头点击信号
+        # 连接表头点击信号，由 on_header_clicked 决定排序顺序
         header = self.file_tree.header()
+        header.setSectionsClickable(True)
+        header.setSortIndicatorShown(True)
         header.sectionClicked.connect(self.on_header_clicked)
 
         # 初始化排序状态
@@ -192,14 +341,19 @@ class FileManagementApp(QMainWindow):
         self.print_btn = QPushButton("批量打印")
         self.print_btn.clicked.connect(self.open_print_dialog)
 
+        self.duplicate_btn = QPushButton("查找重复文件")
+        self.duplicate_btn.clicked.connect(self.open_duplicate_dialog)
+
         button_layout.addWidget(self.backup_btn)
         button_layout.addWidget(self.details_btn)
         button_layout.addWidget(self.manage_backup_btn)
         button_layout.addWidget(self.print_btn)
+        button_layout.addWidget(self.duplicate_btn)
         button_layout.addStretch()
 
         # 添加到主布局
         main_layout.addLayout(dir_selection_layout)
+        main_layout.addLayout(filter_layout)
         main_layout.addWidget(self.file_tree)
         main_layout.addLayout(button_layout)
 
@@ -240,18 +394,53 @@ class FileManagementApp(QMainWindow):
         if not directory or not os.path.exists(directory):
             return
 
-        self.files_tree = self.file_manager.load_files_tree(directory)
+        # 正在后台扫描同一目录时不重复扫描，切换目录时取消之前的扫描
+        if self.scan_thread is not None:
+            if self.scan_thread.directory == directory:
+                return
+            self.cancel_scan()
+
+        # 同一目录再次加载时只做增量刷新
+        if (
+            not self.compact_tree
+            and self.files_tree
+            and self.files_tree["path"] == directory
+        ):
+            self.refresh_files()
+            return
+
+        if self.lazy_loading:
+            # 按需加载模式：只扫描顶层，子目录在展开时加载
+            self.files_tree = self.file_manager.load_files_level(directory)
+        elif self.compact_tree:
+            # 列式存储模式：每次在后台完整扫描，不使用索引、增量刷新和实时监视
+            self.start_store_load(directory)
+            return
+        else:
+            # 优先在后台从元数据索引恢复上次的文件树，索引中没有时完整扫描
+            self.start_index_load(directory)
+            return
 
-        # 清空树状视图
-        self.file_tree.clear()
+        self.show_files_tree(directory)
 
-        # 填充树状视图
-        self.populate_tree(self.files_tree, self.file_tree)
+    def show_files_tree(self, directory):
+        """用当前文件树重新填充树状视图"""
+        self.tree_model.set_tree(self.files_tree)
 
-        # 展开根节点
-        self.file_tree.expandAll()
+        # 只展开根节点，其余目录在展开时才构建行
+        self.file_tree.expand(self.tree_model.root_index())
+        self.set_column_widths()
 
-        # 设置列宽
+        # 默认按创建时间倒序排列
+        self.sort_tree(2, Qt.DescendingOrder)
+
+        self.invalidate_filter()
+
+        # 监视新目录的变化
+        self.start_watcher(directory)
+
+    def set_column_widths(self):
+        """设置列宽"""
         self.file_tree.setColumnWidth(0, 550)  # 文件名
         self.file_tree.setColumnWidth(1, 120)  # 大小
         self.file_tree.setColumnWidth(2, 160)  # 创建时间
@@ -259,122 +448,367 @@ class FileManagementApp(QMainWindow):
         self.file_tree.setColumnWidth(4, 120)  # 类型
         self.file_tree.setColumnWidth(5, 300)  # 路径
 
-        # 默认按创建时间倒序排列
-        self.file_tree.sortItems(2, Qt.DescendingOrder)
-
-    def populate_tree(self, node, parent_item):
-        """填充树状视图"""
-        if node["type"] == "directory":
-            # 创建目录节点
-            tree_item = QTreeWidgetItem(parent_item)
-            tree_item.setText(0, node["name"])
-            tree_item.setText(3, "目录")
-            tree_item.setText(4, node["path"])
-            tree_item.setFlags(tree_item.flags() | Qt.ItemIsUserCheckable)
-            tree_item.setCheckState(0, Qt.Unchecked)
-
-            # 递归添加子节点
-            for child in node["children"]:
-                self.populate_tree(child, tree_item)
-        else:
-            # 创建文件节点
-            tree_item = QTreeWidgetItem(parent_item)
-            tree_item.setText(0, node["name"])
-            tree_item.setText(1, self.file_manager.format_size(node["size"]))
-            tree_item.setText(
-                2, datetime.fromtimestamp(node["created"]).strftime("%Y-%m-%d %H:%M:%S")
-            )
-            tree_item.setText(
-                3,
-                datetime.fromtimestamp(node["modified"]).strftime("%Y-%m-%d %H:%M:%S"),
+    def show_pending_root(self, directory):
+        """清空当前文件树，只显示根节点，目录的子节点在后台加载完成后才显示"""
+        self.stop_watcher()
+        self.files_tree = {}
+        self.file_manager.adopt(FileManager())
+
+        root_node = {
+            "name": os.path.basename(directory),
+            "path": directory,
+            "type": "directory",
+            "children": [],
+        }
+        self.tree_model.set_tree(root_node, streaming=True)
+        self.file_tree.expand(self.tree_model.root_index())
+        self.set_column_widths()
+
+    def start_scan_thread(self, status):
+        """启动 scan_thread 并显示进度指示"""
+        self.scan_status_label.setText(status)
+        self.scan_progress.show()
+        self.scan_status_label.show()
+        self.scan_cancel_btn.show()
+        self.scan_thread.start()
+
+    def start_index_load(self, directory):
+        """在后台线程中从元数据索引恢复文件树"""
+        self.show_pending_root(directory)
+
+        self.scan_thread = IndexLoadThread(directory, self.metadata_index.db_path)
+        self.scan_thread.loaded.connect(self.on_index_loaded)
+
+        self.start_scan_thread("正在读取文件索引...")
+
+    def on_index_loaded(self, scanner, tree):
+        """索引加载完成：立即显示上次的文件树并在后台对比变化，索引中没有该目录时完整扫描"""
+        if self.sender() is not self.scan_thread:
+            return
+        directory = self.scan_thread.directory
+        self.reset_scan_state()
+        if tree is None:
+            self.start_scan(directory)
+            return
+
+        self.file_manager.adopt(scanner)
+        self.files_tree = tree
+        self.show_files_tree(directory)
+        self.refresh_files()
+
+    def start_store_load(self, directory):
+        """在后台线程中把目录扫描到列式存储，扫描完成后一次显示"""
+        self.show_pending_root(directory)
+
+        self.scan_thread = NodeStoreLoadThread(directory)
+        self.scan_thread.loaded.connect(self.on_store_loaded)
+
+        self.start_scan_thread("正在扫描...")
+
+    def on_store_loaded(self, scanner, store):
+        """列式存储扫描完成，把存储的根节点视图交给树状视图"""
+        if self.sender() is not self.scan_thread:
+            return
+        directory = self.scan_thread.directory
+        self.reset_scan_state()
+
+        self.file_manager.adopt(scanner)
+        self.files_tree = store.root()
+        self.show_files_tree(directory)
+
+    def start_scan(self, directory):
+        """在后台线程中扫描目录，扫描结果分批显示在树状视图中"""
+        self.show_pending_root(directory)
+
+        self.scan_thread = ScanThread(directory, self.scan_workers)
+        self.scan_thread.batch_ready.connect(self.on_scan_batch)
+        self.scan_thread.progress.connect(self.on_scan_progress)
+        self.scan_thread.scan_finished.connect(self.on_scan_finished)
+
+        self.start_scan_thread("正在扫描...")
+
+    def on_scan_batch(self, batch):
+        """接收扫描批次，排队后由定时器分批显示，大目录的子节点拆成多批"""
+        if self.sender() is not self.scan_thread:
+            return
+        for parent_path, children in batch:
+            # 空目录也要排队，显示时标记为已扫描
+            for start in range(0, max(len(children), 1), SCAN_CHUNK_SIZE):
+                self.pending_scan_batches.append(
+                    (parent_path, children[start:start + SCAN_CHUNK_SIZE])
+                )
+        if not self.scan_timer.isActive():
+            self.scan_timer.start()
+
+    def drain_scan_batches(self):
+        """显示排队的扫描结果，每次最多占用 SCAN_DRAIN_BUDGET，全部显示后完成扫描"""
+        deadline = time.perf_counter() + SCAN_DRAIN_BUDGET
+        while self.pending_scan_batches and time.perf_counter() < deadline:
+            self.tree_model.children_ready(*self.pending_scan_batches.popleft())
+        if not self.pending_scan_batches:
+            self.scan_timer.stop()
+            if self.scan_result is not None:
+                self.finish_scan(self.scan_result)
+
+    def on_scan_progress(self, directories, nodes):
+        """更新扫描进度"""
+        if self.sender() is not self.scan_thread:
+            return
+        self.scan_status_label.setText(
+            f"正在扫描: 已扫描 {directories} 个目录，发现 {nodes} 个项目"
+        )
+
+    def on_scan_finished(self, scanner, cancelled):
+        """扫描结束"""
+        if self.sender() is not self.scan_thread or cancelled:
+            return
+        # 排队的扫描结果全部显示之后才完成扫描
+        self.scan_result = scanner
+        if not self.pending_scan_batches:
+            self.finish_scan(scanner)
+
+    def finish_scan(self, scanner):
+        """扫描完成：接管扫描结果，写入元数据索引并开始监视"""
+        directory = self.scan_thread.directory
+        self.reset_scan_state()
+
+        self.file_manager.adopt(scanner)
+        self.files_tree = self.file_manager.find_node(directory)
+        if self.scan_workers > 1:
+            for line in self.file_manager.format_scan_stats():
+                print(line)
+        try:
+            self.metadata_index.save_tree(self.files_tree, self.file_manager.dir_mtimes)
+        except Exception as e:
+            print(f"保存文件索引失败: {e}")
+
+        # 扫描结束后才有目录汇总信息
+        self.tree_model.finish_streaming(self.files_tree)
+        for node in self.file_manager.node_index.values():
+            if node["type"] == "directory":
+                self.tree_model.update_node(node)
+
+        self.sort_tree(self.sort_column, self.sort_order)
+        self.invalidate_filter()
+        self.start_watcher(directory)
+
+    def cancel_scan(self):
+        """取消正在进行的后台扫描，已显示的部分结果保留，下次加载时重新扫描"""
+        if self.scan_thread is None:
+            return
+        self.scan_thread.cancel()
+        self.reset_scan_state()
+
+    def reset_scan_state(self):
+        """清理扫描状态并隐藏进度指示"""
+        thread = self.scan_thread
+        if thread is not None:
+            # 保留线程引用直到其真正结束
+            self.retired_threads.add(thread)
+            thread.finished.connect(lambda: self.retired_threads.discard(thread))
+            if thread.isFinished():
+                self.retired_threads.discard(thread)
+        self.scan_thread = None
+        self.scan_result = None
+        self.pending_scan_batches.clear()
+        self.scan_timer.stop()
+        self.scan_progress.hide()
+        self.scan_status_label.hide()
+        self.scan_cancel_btn.hide()
+
+    def start_watcher(self, directory):
+        """开始监视目录变化，替换之前的监视器"""
+        self.stop_watcher()
+
+        if not self.watch_enabled or self.compact_tree:
+            return
+        try:
+            self.watcher = create_watcher(
+                self.file_manager, directory, self.on_watch_events
             )
-            tree_item.setText(4, node["extension"])
-            tree_item.setText(5, node["path"])
-            tree_item.setFlags(tree_item.flags() | Qt.ItemIsUserCheckable)
-            tree_item.setCheckState(0, Qt.Unchecked)
-
-    def on_file_selected(self, item, column):
-        """处理文件选择事件"""
-        if column == 0:  # 只有在第一列点击时才处理选择
-            # 检查是否是目录
-            is_directory = item.text(3) == "目录"
-
-            if item.checkState(0) == Qt.Checked:
-                if is_directory:
-                    # 如果是目录，选中所有子项
-                    self.select_all_children(item, True)
-                else:
-                    # 添加到选中列表
-                    file_info = {
-                        "name": item.text(0),
-                        "size": item.text(1),
-                        "created": item.text(2),
-                        "modified": item.text(3),
-                        "type": item.text(4),
-                        "path": item.text(5),
-                    }
-                    if file_info not in self.selected_files:
-                        self.selected_files.append(file_info)
-            else:
-                if is_directory:
-                    # 如果是目录，取消选中所有子项
-                    self.select_all_children(item, False)
-                else:
-                    # 从选中列表移除
-                    file_info = {
-                        "name": item.text(0),
-                        "size": item.text(1),
-                        "created": item.text(2),
-                        "modified": item.text(3),
-                        "type": item.text(4),
-                        "path": item.text(5),
-                    }
-                    if file_info in self.selected_files:
-                        self.selected_files.remove(file_info)
-
-    def select_all_children(self, item, select):
-        """递归选中或取消选中所有子项"""
-        # 处理当前项的所有直接子项
-        for i in range(item.childCount()):
-            child = item.child(i)
-            # 设置复选框状态
-            if select:
-                child.setCheckState(0, Qt.Checked)
-                # 如果是文件，添加到选中列表
-                if child.text(3) != "目录":
-                    file_info = {
-                        "name": child.text(0),
-                        "size": child.text(1),
-                        "created": child.text(2),
-                        "modified": child.text(3),
-                        "type": child.text(4),
-                        "path": child.text(5),
-                    }
-                    if file_info not in self.selected_files:
-                        self.selected_files.append(file_info)
-            else:
-                child.setCheckState(0, Qt.Unchecked)
-                # 如果是文件，从选中列表移除
-                if child.text(3) != "目录":
-                    file_info = {
-                        "name": child.text(0),
-                        "size": child.text(1),
-                        "created": child.text(2),
-                        "modified": child.text(3),
-                        "type": child.text(4),
-                        "path": child.text(5),
-                    }
-                    if file_info in self.selected_files:
-                        self.selected_files.remove(file_info)
-
-            # 如果子项是目录，递归处理其子项
-            if child.text(3) == "目录":
-                self.select_all_children(child, select)
+            self.watcher.start()
+        except Exception as e:
+            self.watcher = None
+            print(f"启动目录监视失败: {e}")
+
+    def stop_watcher(self):
+        """停止监视，丢弃尚未处理的变化"""
+        if self.watcher is not None:
+            self.watcher.stop()
+            self.watcher = None
+        self.stop_reconcile()
+        self.watch_queue = queue.Queue()
+        self.pending_tree_changes.clear()
+
+    def on_watch_events(self, events):
+        """在监视线程中读取变化路径的最新状态，交给界面线程合并"""
+        self.watch_queue.put((self.file_manager.prepare_changes(events), {}))
+
+    def process_watch_events(self):
+        """合并监视事件并分批同步到树状视图，每次只占用很短的界面时间"""
+        while True:
+            try:
+                prepared, dir_mtimes = self.watch_queue.get_nowait()
+            except queue.Empty:
+                break
+            changes = self.file_manager.apply_changes(prepared, dir_mtimes)
+            self.pending_tree_changes.extend(changes)
+            self.update_metadata_index(changes, dir_mtimes)
+            if changes:
+                self.update_filter_columns(changes)
+
+        deadline = time.perf_counter() + 0.02
+        while self.pending_tree_changes and time.perf_counter() < deadline:
+            self.apply_tree_change(*self.pending_tree_changes.popleft())
+
+        # 变更全部同步后按当前条件重新筛选
+        if self.filter_dirty and not self.pending_tree_changes:
+            self.run_filter()
+
+    def apply_filter(self):
+        """解析筛选栏中的条件并筛选文件树"""
+        text = self.filter_edit.text().strip()
+        if not text:
+            self.clear_filter()
+            return
+        from src.core.file_filter import parse_filter
+
+        try:
+            self.filter_predicates = parse_filter(text)
+        except ValueError as e:
+            self.filter_status_label.setText(str(e))
+            return
+        self.run_filter()
+
+    def clear_filter(self):
+        """清除筛选条件，显示所有项"""
+        self.filter_predicates = []
+        self.filter_dirty = False
+        self.filter_edit.clear()
+        self.filter_status_label.clear()
+        self.tree_model.set_visible(None)
+        self.file_tree.expand(self.tree_model.root_index())
+
+    def invalidate_filter(self):
+        """显示了新的文件树，丢弃列式快照，有筛选条件时等待重新筛选"""
+        self.file_columns = None
+        self.filter_dirty = bool(self.filter_predicates)
+
+    def update_filter_columns(self, changes):
+        """文件树发生变化，原地更新列式快照，有筛选条件时等待重新筛选"""
+        if self.file_columns is not None and not self.file_columns.apply_changes(changes):
+            self.file_columns = None
+        self.filter_dirty = bool(self.filter_predicates)
+
+    def run_filter(self):
+        """按当前条件筛选，只显示匹配的文件及其上级目录（按需加载模式只筛选已加载的部分）"""
+        self.filter_dirty = False
+        if not self.filter_predicates or not self.files_tree:
+            return
+
+        from src.core.file_filter import FileColumns
+
+        start = time.perf_counter()
+        if self.file_columns is None:
+            self.file_columns = FileColumns.from_tree(self.files_tree)
+        count, visible = self.file_columns.filter(self.filter_predicates)
+        elapsed = (time.perf_counter() - start) * 1000
+
+        self.tree_model.set_visible(visible)
+        # 匹配项不多时展开全部，否则只展开根节点
+        if len(visible) <= 5000:
+            self.file_tree.expandAll()
+        else:
+            self.file_tree.expand(self.tree_model.root_index())
+        self.filter_status_label.setText(f"匹配 {count} 个文件（{elapsed:.0f} 毫秒）")
+
+    def apply_tree_change(self, operation, parent_path, node):
+        """将单个变更同步到树状视图"""
+        if operation == "refresh":
+            self.refresh_files()
+        elif operation == "insert":
+            self.tree_model.insert_node(parent_path, node)
+        elif operation == "update":
+            self.tree_model.update_node(node)
+        elif operation == "remove":
+            self.tree_model.remove_node(node)
+
+    def refresh_files(self):
+        """在后台对比目录修改时间，变化通过与实时监视相同的流程同步到树状视图"""
+        if self.reconcile_thread is not None or not self.files_tree:
+            return
+        thread = ReconcileThread(self.file_manager)
+        thread.reconciled.connect(self.on_reconciled)
+        thread.finished.connect(thread.deleteLater)
+        self.reconcile_thread = thread
+        thread.start()
+
+    def on_reconciled(self, prepared, dir_mtimes):
+        """对比完成，将变化交给监视事件的处理流程"""
+        if self.sender() is not self.reconcile_thread:
+            return
+        self.reconcile_thread = None
+        self.watch_queue.put((prepared, dir_mtimes))
+
+    def stop_reconcile(self):
+        """丢弃正在进行的后台对比结果"""
+        thread = self.reconcile_thread
+        if thread is not None:
+            self.retired_threads.add(thread)
+            thread.finished.connect(lambda: self.retired_threads.discard(thread))
+            if thread.isFinished():
+                self.retired_threads.discard(thread)
+        self.reconcile_thread = None
+
+    def update_metadata_index(self, changes, dir_mtimes):
+        """将变更写入元数据索引（按需加载和列式存储模式不使用索引）"""
+        if self.lazy_loading or self.compact_tree:
+            return
+        if not changes and not dir_mtimes:
+            return
+        try:
+            self.metadata_index.apply_changes(changes, self.file_manager.dir_mtimes)
+            self.metadata_index.update_dir_mtimes(dir_mtimes)
+        except Exception as e:
+            print(f"更新文件索引失败: {e}")
+
+    def load_directory(self, path, recursive=False):
+        """在后台加载目录内容，recursive 为 True 时加载完整子树"""
+        if path in self.loading_dirs:
+            return
+        thread = DirectoryLoadThread(path, recursive)
+        thread.loaded.connect(self.on_directory_loaded)
+        thread.finished.connect(lambda: self.loading_dirs.pop(path, None))
+        self.loading_dirs[path] = thread
+        thread.start()
+
+    def on_directory_loaded(self, path, loaded_node, node_index, dir_mtimes):
+        """目录加载完成后显示其内容；目录已勾选时同步勾选新加载的内容"""
+        dir_node = self.file_manager.find_node(path)
+        if dir_node is None or dir_node.get("loaded", True):
+            return
+        touched = self.file_manager.attach_children(
+            dir_node, loaded_node, node_index, dir_mtimes
+        )
+        for ancestor in touched:
+            self.tree_model.update_node(ancestor)
+        if self.watcher is not None:
+            # 监视器只监视创建时已加载的目录
+            self.watcher.watch(self.file_manager, dir_mtimes)
+        self.tree_model.reload_children(dir_node)
+        self.update_filter_columns(
+            [("insert", path, child) for child in dir_node["children"]]
+        )
+
+    @property
+    def selected_files(self):
+        """已勾选文件的只读快照，供备份和打印对话框使用"""
+        return self.tree_model.selected_snapshot()
 
     def show_file_details(self):
         """显示文件详情"""
-        selected_items = self.file_tree.selectedItems()
-        if not selected_items:
+        selected_rows = self.file_tree.selectionModel().selectedRows()
+        if not selected_rows:
             msg_box = QMessageBox()
             msg_box.setIcon(QMessageBox.Warning)
             msg_box.setWindowTitle("警告")
@@ -382,17 +816,12 @@ class FileManagementApp(QMainWindow):
             msg_box.exec_()
             return
 
-        item = selected_items[0]
-        self.name_label.setText(item.text(0))
-        self.size_label.setText(item.text(1))
-        self.modified_label.setText(item.text(3))  # 修改时间在第4列
-        self.type_label.setText(item.text(4))  # 类型在第5列
-        self.path_label.setText(item.text(5))  # 路径在第6列
+        self.show_item_details(selected_rows[0])
 
     def open_context_menu(self, position):
         """打开右键菜单"""
-        item = self.file_tree.itemAt(position)
-        if not item:
+        item = self.file_tree.indexAt(position).siblingAtColumn(0)
+        if not item.isValid():
             return
 
         menu = QMenu()
@@ -425,7 +854,7 @@ class FileManagementApp(QMainWindow):
     def open_file(self, item):
         """打开文件"""
         try:
-            file_path = item.text(5)  # 路径在第6列
+            file_path = self.tree_model.node(item)["path"]
             # 使用系统默认程序打开文件
             import subprocess
 
@@ -439,11 +868,11 @@ class FileManagementApp(QMainWindow):
 
     def show_item_details(self, item):
         """显示项目详情"""
-        self.name_label.setText(item.text(0))
-        self.size_label.setText(item.text(1))
-        self.modified_label.setText(item.text(3))  # 修改时间在第4列
-        self.type_label.setText(item.text(4))  # 类型在第5列
-        self.path_label.setText(item.text(5))  # 路径在第6列
+        self.name_label.setText(item.siblingAtColumn(0).data())
+        self.size_label.setText(item.siblingAtColumn(1).data())
+        self.modified_label.setText(item.siblingAtColumn(3).data())  # 修改时间在第4列
+        self.type_label.setText(item.siblingAtColumn(4).data())  # 类型在第5列
+        self.path_label.setText(item.siblingAtColumn(5).data())  # 路径在第6列
 
     def on_header_clicked(self, column):
         """处理表头点击事件"""
@@ -461,10 +890,19 @@ class FileManagementApp(QMainWindow):
             self.sort_order = Qt.DescendingOrder
 
         # 执行排序
-        self.file_tree.sortItems(self.sort_column, self.sort_order)
+        self.sort_tree(self.sort_column, self.sort_order)
+
+    def sort_tree(self, column, order):
+        """按列排序树状视图并更新表头的排序标记"""
+        self.sort_column = column
+        self.sort_order = order
+        self.file_tree.header().setSortIndicator(column, order)
+        self.tree_model.sort(column, order)
 
     def open_backup_dialog(self):
         """打开备份策略对话框"""
+        from src.ui.backup_dialog import BackupDialog
+
         if not self.selected_files:
             msg_box = QMessageBox()
             msg_box.setIcon(QMessageBox.Warning)
@@ -484,8 +922,12 @@ class FileManagementApp(QMainWindow):
             msg_box.exec_()
 
     def check_backup_tasks(self):
-        """检查并执行备份任务"""
-        self.backup_manager.execute_tasks()
+        """启动到期的备份任务，并在下一个任务到期时再次检查"""
+        delay = self.backup_manager.execute_tasks()
+        # 系统休眠或时钟调整后定时器可能不准，至少每 BACKUP_MAX_SLEEP 秒检查一次
+        if delay is None or delay > BACKUP_MAX_SLEEP:
+            delay = BACKUP_MAX_SLEEP
+        self.backup_timer.start(int(delay * 1000) + 1)
 
     def closeEvent(self, event):
         """处理窗口关闭事件"""
@@ -516,31 +958,19 @@ class FileManagementApp(QMainWindow):
 
     def deselect_all(self):
         """撤销所有选择"""
-        # 遍历所有顶级项目
-        for i in range(self.file_tree.topLevelItemCount()):
-            item = self.file_tree.topLevelItem(i)
-            self.deselect_item_and_children(item)
-
-        # 清空选中文件列表
-        self.selected_files.clear()
-
-    def deselect_item_and_children(self, item):
-        """递归取消选中项目及其所有子项"""
-        # 取消当前项目的选中状态
-        item.setCheckState(0, Qt.Unchecked)
-
-        # 递归处理所有子项
-        for i in range(item.childCount()):
-            child = item.child(i)
-            self.deselect_item_and_children(child)
+        self.tree_model.clear_checks()
 
     def open_backup_manager(self):
         """打开备份管理对话框"""
+        from src.ui.backup_manager_dialog import BackupManagerDialog
+
         dialog = BackupManagerDialog(self.backup_manager, self)
         dialog.exec_()
 
     def open_print_dialog(self):
         """打开批量打印对话框"""
+        from src.ui.print_dialog import PrintDialog
+
         if not self.selected_files:
             msg_box = QMessageBox()
             msg_box.setIcon(QMessageBox.Warning)
@@ -552,10 +982,31 @@ class FileManagementApp(QMainWindow):
         dialog = PrintDialog(self.selected_files, self)
         dialog.exec_()
 
+    def open_duplicate_dialog(self):
+        """打开查找重复文件对话框，在当前文件树中查找"""
+        from src.core.duplicate_finder import collect_files
+        from src.ui.duplicate_dialog import DuplicateDialog
+
+        if not self.files_tree:
+            msg_box = QMessageBox()
+            msg_box.setIcon(QMessageBox.Warning)
+            msg_box.setWindowTitle("警告")
+            msg_box.setText("请先加载目录")
+            msg_box.exec_()
+            return
+
+        dialog = DuplicateDialog(
+            self.file_manager,
+            collect_files(self.files_tree),
+            self.metadata_index.db_path,
+            self,
+        )
+        dialog.exec_()
+
     def select_files_from_context_menu(self, item):
         """从右键菜单勾选文件"""
         # 获取当前选中的项目
-        selected_items = self.file_tree.selectedItems()
+        selected_items = self.file_tree.selectionModel().selectedRows()
 
         # 如果没有选中项目，则勾选右键点击的项目
         if not selected_items:
@@ -563,52 +1014,12 @@ class FileManagementApp(QMainWindow):
 
         # 遍历选中的项目，只勾选文件（不包括目录）
         for selected_item in selected_items:
-            if selected_item.text(3) != "目录":  # 不是目录
-                selected_item.setCheckState(0, Qt.Checked)
-                # 添加到选中列表
-                file_info = {
-                    "name": selected_item.text(0),
-                    "size": selected_item.text(1),
-                    "created": selected_item.text(2),
-                    "modified": selected_item.text(3),
-                    "type": selected_item.text(4),
-                    "path": selected_item.text(5),
-                }
-                if file_info not in self.selected_files:
-                    self.selected_files.append(file_info)
-
-    def on_file_double_clicked(self, item, column):
-        """处理文件双击事件"""
-        # 只有双击文件时才处理
-        if item.text(3) != "目录":  # 不是目录
-            # 检查当前是否已勾选
-            is_checked = item.checkState(0) == Qt.Checked
-
-            if is_checked:
-                # 如果已勾选，则取消勾选
-                item.setCheckState(0, Qt.Unchecked)
-                # 从选中列表移除
-                file_info = {
-                    "name": item.text(0),
-                    "size": item.text(1),
-                    "created": item.text(2),
-                    "modified": item.text(3),
-                    "type": item.text(4),
-                    "path": item.text(5),
-                }
-                if file_info in self.selected_files:
-                    self.selected_files.remove(file_info)
-            else:
-                # 如果未勾选，则勾选
-                item.setCheckState(0, Qt.Checked)
-                # 添加到选中列表
-                file_info = {
-                    "name": item.text(0),
-                    "size": item.text(1),
-                    "created": item.text(2),
-                    "modified": item.text(3),
-                    "type": item.text(4),
-                    "path": item.text(5),
-                }
-                if file_info not in self.selected_files:
-                    self.selected_files.append(file_info)
+            node = self.tree_model.node(selected_item)
+            if node is not None and node["type"] == "file":
+                self.tree_model.set_checked(node, True)
+
+    def on_file_double_clicked(self, item):
+        """处理文件双击事件：切换文件的勾选状态"""
+        node = self.tree_model.node(item)
+        if node is not None and node["type"] == "file":
+            self.tree_model.set_checked(node, not self.tree_model.is_checked(node))
@@ -45,7 +45,7 @@ class PrintThread(QThread):
 
                 # 使用Windows默认打印命令打印文件
                 # 根据文件类型选择不同的打印方法
-                ext = file_info["type"].lower()
+                ext = file_info["extension"].lower()
 
                 if ext in [
                     ".pdf",
@@ -0,0 +1,50 @@
+"""启动耗时统计
+
+设置环境变量 BHRM_STARTUP_PROFILE=1 后，在窗口首次绘制时输出导入和初始化各阶段的耗时；
+设置为 exit 时输出后立即退出，供 benchmarks/bench_startup.py 测量。
+本模块只依赖标准库，应在 app.py 中最先导入
+"""
+import os
+import time
+
+_START = time.perf_counter()
+
+
+class StartupProfiler:
+    """记录启动各阶段结束的时刻"""
+
+    def __init__(self, start=None, mode=None):
+        self.start = _START if start is None else start
+        # None: 不统计，'1': 输出报告，'exit': 输出报告后退出
+        self.mode = mode
+        self.phases = []
+        self.reported = False
+
+    @property
+    def enabled(self):
+        return bool(self.mode)
+
+    @property
+    def exit_after_report(self):
+        return self.mode == 'exit'
+
+    def mark(self, phase):
+        """记录一个阶段在此刻结束"""
+        if self.enabled and not self.reported:
+            self.phases.append((phase, time.perf_counter()))
+
+    def report(self):
+        """输出各阶段耗时（只输出一次）"""
+        if not self.enabled or self.reported:
+            return
+        self.reported = True
+        lines = ["启动耗时:"]
+        previous = self.start
+        for phase, moment in self.phases:
+            lines.append(f"  {(moment - previous) * 1000:8.1f} ms"
+                         f"  (累计 {(moment - self.start) * 1000:7.1f} ms)  {phase}")
+            previous = moment
+        print("\n".join(lines), flush=True)
+
+
+profiler = StartupProfiler(mode=os.environ.get('BHRM_STARTUP_PROFILE') or None)
@@ -0,0 +1,158 @@
+import os
+from datetime import datetime
+
+import pytest
+
+from src.core import backup_task, copy_engine
+from src.core.backup_journal import JOURNAL_NAME, BackupJournal, find_partial
+from src.core.backup_manifest import PARTIAL_SUFFIX, manifest_index
+from src.core.backup_task import BackupTask
+from src.core.copy_engine import copy_file
+
+
+def write(path, data):
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+def partial_dir(tmp_path, name="backup_2026-10-17_10_00_00"):
+    path = tmp_path / (name + PARTIAL_SUFFIX)
+    path.mkdir()
+    return str(path)
+
+
+def test_find_partial_matches_task(tmp_path):
+    snapshot_dir = partial_dir(tmp_path)
+    BackupJournal(snapshot_dir, "任务A", "backup_2026-10-17_10_00_00").close()
+    assert find_partial(str(tmp_path), "任务A") == snapshot_dir
+    assert find_partial(str(tmp_path), "任务B") is None
+
+
+def test_resume_from_checkpoint(tmp_path):
+    snapshot_dir = partial_dir(tmp_path)
+    dst = os.path.join(snapshot_dir, "big.bin")
+    write(dst, b'x' * 300)
+    journal = BackupJournal(snapshot_dir, "任务", "snap")
+    journal.expect(dst, 1000, 123)
+    journal.checkpoint(dst, 100)
+    journal.checkpoint(dst, 200)
+    journal.close()
+
+    resumed = BackupJournal(snapshot_dir)
+    assert resumed.task_name == "任务"
+    # 同一文件以最后一个检查点为准
+    assert resumed.resume_offset(dst, 1000, 123) == 200
+    # 源文件已改变时从头复制
+    assert resumed.resume_offset(dst, 1001, 123) == 0
+    assert resumed.resume_offset(dst, 1000, 124) == 0
+    resumed.close()
+
+
+def test_resume_from_start_when_target_is_shorter(tmp_path):
+    snapshot_dir = partial_dir(tmp_path)
+    dst = os.path.join(snapshot_dir, "big.bin")
+    write(dst, b'x' * 50)
+    journal = BackupJournal(snapshot_dir, "任务", "snap")
+    journal.expect(dst, 1000, 123)
+    journal.checkpoint(dst, 100)
+    journal.close()
+    assert BackupJournal(snapshot_dir).resume_offset(dst, 1000, 123) == 0
+
+
+def test_completed_file_is_skipped_only_if_unchanged(tmp_path):
+    snapshot_dir = partial_dir(tmp_path)
+    dst = os.path.join(snapshot_dir, "small.txt")
+    write(dst, b'hello')
+    os.utime(dst, ns=(0, 5_000_000_000))
+    journal = BackupJournal(snapshot_dir, "任务", "snap")
+    journal.expect(dst, 5, 5_000_000_000)
+    journal.done(dst)
+    journal.close()
+
+    resumed = BackupJournal(snapshot_dir)
+    assert resumed.resume_offset(dst, 5, 5_000_000_000) is None
+    # 目标文件在完成之后被改动过
+    write(dst, b'hell')
+    os.utime(dst, ns=(0, 5_000_000_000))
+    assert resumed.resume_offset(dst, 5, 5_000_000_000) == 0
+    resumed.close()
+
+
+def test_torn_last_record_is_ignored(tmp_path):
+    snapshot_dir = partial_dir(tmp_path)
+    dst = os.path.join(snapshot_dir, "big.bin")
+    write(dst, b'x' * 300)
+    journal = BackupJournal(snapshot_dir, "任务", "snap")
+    journal.expect(dst, 1000, 123)
+    journal.checkpoint(dst, 100)
+    journal.close()
+    with open(os.path.join(snapshot_dir, JOURNAL_NAME), 'a', encoding='utf-8') as f:
+        f.write('{"stored": "big.bin", "size": 1000, "mtime_ns": 123, "off')
+    assert BackupJournal(snapshot_dir).resume_offset(dst, 1000, 123) == 100
+
+
+def test_commit_renames_snapshot_and_removes_journal(tmp_path):
+    snapshot_dir = partial_dir(tmp_path)
+    final_dir = str(tmp_path / "backup_2026-10-17_10_00_00")
+    journal = BackupJournal(snapshot_dir, "任务", "snap")
+    journal.commit(final_dir)
+    assert not os.path.exists(snapshot_dir)
+    assert os.listdir(final_dir) == []
+
+
+def test_copy_file_resumes_at_offset(tmp_path):
+    data = os.urandom(256 * 1024)
+    src = str(tmp_path / "src.bin")
+    dst = str(tmp_path / "dst.bin")
+    write(src, data)
+    # 检查点之后的数据可能不完整，继续复制时被覆盖
+    write(dst, data[:100_000] + b'\0' * 50_000)
+    copy_file(src, dst, offset=100_000)
+    with open(dst, 'rb') as f:
+        assert f.read() == data
+
+
+def test_copy_file_reports_checkpoints(tmp_path, monkeypatch):
+    monkeypatch.setattr(copy_engine, 'CHECKPOINT_SIZE', 64 * 1024)
+    data = os.urandom(300 * 1024)
+    src = str(tmp_path / "src.bin")
+    dst = str(tmp_path / "dst.bin")
+    write(src, data)
+    offsets = []
+    copy_file(src, dst, offset=0, on_checkpoint=offsets.append)
+    assert offsets == sorted(offsets)
+    assert offsets and all(b - a >= 64 * 1024 for a, b in zip([0] + offsets, offsets))
+    assert offsets[-1] <= len(data)
+    with open(dst, 'rb') as f:
+        assert f.read() == data
+
+
+def test_resume_does_not_overwrite_hardlinked_file(tmp_path, monkeypatch):
+    source = tmp_path / "source"
+    source.mkdir()
+    backup_dir = str(tmp_path / "backup")
+    files = []
+    for name in ("a.txt", "b.txt"):
+        write(str(source / name), b'old')
+        files.append({'name': name, 'path': str(source / name)})
+    task = BackupTask(files, backup_dir, datetime(2026, 1, 1), datetime(2026, 12, 31), 'daily',
+                      "任务", hardlink=True)
+    task.backup_files()
+    first = os.path.join(backup_dir, os.listdir(backup_dir)[0])
+
+    # 第二次备份把未改变的文件硬链接过来之后、提交之前中断
+    def interrupt(*args):
+        raise OSError("备份盘已断开")
+    monkeypatch.setattr(backup_task, 'write_manifest', interrupt)
+    with pytest.raises(OSError):
+        task.backup_files()
+    monkeypatch.undo()
+    assert find_partial(backup_dir, "任务") is not None
+
+    # 继续备份时改变的文件要复制，不能写进与第一个快照共用的文件
+    write(files[0]['path'], b'new content')
+    task.backup_files()
+    assert find_partial(backup_dir, "任务") is None
+    stored = manifest_index(first)[files[0]['path']]['stored']
+    with open(os.path.join(first, stored), 'rb') as f:
+        assert f.read() == b'old'
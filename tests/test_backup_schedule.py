@@ -0,0 +1,150 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.core.backup_schedule import (
+    CATCH_UP_ONCE,
+    CATCH_UP_SKIP,
+    BackupScheduler,
+    CronExpression,
+    next_run,
+    parse_field,
+)
+from src.core.backup_task import BackupTask
+
+
+def make_task(frequency, last_backup=None, catch_up=CATCH_UP_ONCE,
+              start=datetime(2026, 1, 1), end=datetime(2027, 1, 1)):
+    task = BackupTask([], "/backup", start, end, frequency, name=frequency, catch_up=catch_up)
+    task.last_backup = last_backup
+    return task
+
+
+# ---- cron 表达式 ----
+
+def test_parse_field_steps_and_ranges():
+    assert parse_field('*/15', 0, 59) == {0, 15, 30, 45}
+    assert parse_field('10-20/5', 0, 59) == {10, 15, 20}
+    # 单个起点带步长时一直取到上限
+    assert parse_field('5/20', 0, 59) == {5, 25, 45}
+    assert parse_field('1,3,5-6', 0, 23) == {1, 3, 5, 6}
+
+
+@pytest.mark.parametrize('field', ['60', '*/0', '5-3', 'a', '1-x'])
+def test_parse_field_rejects_invalid(field):
+    with pytest.raises(ValueError):
+        parse_field(field, 0, 59)
+
+
+def test_cron_requires_five_fields():
+    with pytest.raises(ValueError):
+        CronExpression('0 * * *')
+
+
+def test_cron_step_hours():
+    cron = CronExpression('0 */6 * * *')
+    assert cron.next_after(datetime(2026, 10, 17, 6, 0)) == datetime(2026, 10, 17, 12, 0)
+    assert cron.next_after(datetime(2026, 10, 17, 19, 30)) == datetime(2026, 10, 18, 0, 0)
+
+
+def test_cron_day_of_month_or_weekday():
+    # 日和星期都受限时满足其一即可：每月 12 日或每周五
+    cron = CronExpression('0 9 12 * 5')
+    # 2026-10-17 是周六，下一个周五是 10-23
+    assert cron.next_after(datetime(2026, 10, 17)) == datetime(2026, 10, 23, 9, 0)
+    # 11-12 是周四，只满足日
+    assert cron.next_after(datetime(2026, 11, 7)) == datetime(2026, 11, 12, 9, 0)
+
+
+def test_cron_weekday_only_when_day_is_any():
+    # 日为 * 时只看星期
+    cron = CronExpression('0 9 * * 1')
+    assert cron.next_after(datetime(2026, 10, 17)) == datetime(2026, 10, 19, 9, 0)
+
+
+def test_cron_sunday_is_zero_or_seven():
+    assert CronExpression('0 0 * * 7').weekdays == CronExpression('0 0 * * 0').weekdays == {0}
+
+
+def test_cron_alias():
+    assert CronExpression('@daily').next_after(datetime(2026, 10, 17, 8)) == datetime(2026, 10, 18)
+
+
+# ---- 下一次执行时间 ----
+
+def test_next_run_first_backup_at_start_time():
+    task = make_task("每小时", start=datetime(2026, 10, 17, 9, 0))
+    assert next_run(task, datetime(2026, 10, 17, 8, 0)) == datetime(2026, 10, 17, 9, 0)
+
+
+def test_next_run_interval_catch_up_once():
+    task = make_task("每小时", last_backup=datetime(2026, 10, 17, 10, 0))
+    # 错过的备份立即补做一次
+    assert next_run(task, datetime(2026, 10, 17, 13, 30)) == datetime(2026, 10, 17, 11, 0)
+
+
+def test_next_run_interval_catch_up_skip():
+    task = make_task("每小时", last_backup=datetime(2026, 10, 17, 10, 0), catch_up=CATCH_UP_SKIP)
+    assert next_run(task, datetime(2026, 10, 17, 13, 30)) == datetime(2026, 10, 17, 14, 0)
+    # 宽限期内的计划时间不算错过
+    assert next_run(task, datetime(2026, 10, 17, 13, 3)) == datetime(2026, 10, 17, 13, 0)
+
+
+def test_next_run_cron_catch_up():
+    last = datetime(2026, 10, 17, 10, 0)
+    now = datetime(2026, 10, 17, 13, 30)
+    assert next_run(make_task('0 * * * *', last), now) == datetime(2026, 10, 17, 11, 0)
+    skip = make_task('0 * * * *', last, catch_up=CATCH_UP_SKIP)
+    assert next_run(skip, now) == datetime(2026, 10, 17, 14, 0)
+
+
+def test_next_run_after_end_or_invalid_frequency():
+    task = make_task("每天", end=datetime(2026, 10, 17))
+    assert next_run(task, datetime(2026, 10, 18)) is None
+    assert next_run(make_task("每十年"), datetime(2026, 10, 17)) is None
+
+
+# ---- 优先队列 ----
+
+def test_scheduler_orders_by_due_time():
+    scheduler = BackupScheduler()
+    now = datetime(2026, 10, 17, 10, 30)
+    hourly = make_task("每小时", last_backup=datetime(2026, 10, 17, 10, 0))
+    daily = make_task("每天", last_backup=datetime(2026, 10, 17, 0, 0))
+    scheduler.schedule(hourly, now)
+    scheduler.schedule(daily, now)
+    assert scheduler.next_due() == datetime(2026, 10, 17, 11, 0)
+    assert scheduler.pop_due(datetime(2026, 10, 17, 11, 0)) == [hourly]
+    assert scheduler.due_time(hourly) is None
+    assert scheduler.next_due() == datetime(2026, 10, 18, 0, 0)
+
+
+def test_scheduler_reschedule_invalidates_old_entry():
+    scheduler = BackupScheduler()
+    now = datetime(2026, 10, 17, 10, 30)
+    task = make_task("每小时", last_backup=datetime(2026, 10, 17, 10, 0))
+    scheduler.schedule(task, now)
+    # 重新计划到更晚的时间后，旧条目仍在堆中但已无效
+    later = scheduler.schedule(task, now, not_before=datetime(2026, 10, 17, 15, 0))
+    assert later == datetime(2026, 10, 17, 15, 0)
+    assert scheduler.pop_due(datetime(2026, 10, 17, 12, 0)) == []
+    assert scheduler.next_due() == later
+    assert scheduler.pop_due(later) == [task]
+    assert scheduler.next_due() is None
+
+
+def test_scheduler_unschedule():
+    scheduler = BackupScheduler()
+    task = make_task("每小时", last_backup=datetime(2026, 10, 17, 10, 0))
+    scheduler.schedule(task, datetime(2026, 10, 17, 10, 30))
+    scheduler.unschedule(task)
+    assert scheduler.due_time(task) is None
+    assert scheduler.next_due() is None
+    assert scheduler.pop_due(datetime(2026, 10, 17) + timedelta(days=1)) == []
+
+
+def test_scheduler_drops_finished_task():
+    scheduler = BackupScheduler()
+    task = make_task("每天", last_backup=datetime(2026, 12, 31, 8, 0), end=datetime(2027, 1, 1))
+    assert scheduler.schedule(task, datetime(2026, 12, 31, 12, 0)) is None
+    assert scheduler.next_due() is None
@@ -0,0 +1,115 @@
+import os
+
+from src.core.file_manager import FileManager
+from src.core.selection import CHECKED, PARTIAL, UNCHECKED, SelectionSet
+
+
+def file_node(path):
+    return {'name': os.path.basename(path), 'path': path, 'type': 'file',
+            'size': 1, 'created': 0.0, 'modified': 0.0, 'extension': '.txt'}
+
+
+def dir_node(path, children):
+    return {'name': os.path.basename(path), 'path': path, 'type': 'directory', 'children': children}
+
+
+def make_tree():
+    """/r 下有 a/(1.txt, 2.txt)、b/3.txt 和空目录 empty"""
+    a = dir_node('/r/a', [file_node('/r/a/1.txt'), file_node('/r/a/2.txt')])
+    b = dir_node('/r/b', [file_node('/r/b/3.txt')])
+    empty = dir_node('/r/empty', [])
+    root = dir_node('/r', [a, b, empty])
+    FileManager().compute_rollups(root)
+    return root, a, b, empty
+
+
+def test_tri_state_counts():
+    root, a, b, _empty = make_tree()
+    selection = SelectionSet('/r')
+    selection.select(a['children'][0])
+    assert (selection.state(a), selection.state(root)) == (PARTIAL, PARTIAL)
+    selection.select(a['children'][1])
+    assert (selection.state(a), selection.state(root)) == (CHECKED, PARTIAL)
+    selection.select(b)
+    assert selection.state(root) == CHECKED
+    assert len(selection) == 3
+
+    selection.deselect(a)
+    assert (selection.state(a), selection.state(b), selection.state(root)) == (
+        UNCHECKED, CHECKED, PARTIAL)
+    selection.deselect(root)
+    assert selection.state(root) == UNCHECKED
+    assert len(selection) == 0
+
+
+def test_empty_directory_is_checked_as_a_whole():
+    root, _a, _b, empty = make_tree()
+    selection = SelectionSet('/r')
+    selection.select(empty)
+    assert selection.state(empty) == CHECKED
+    assert selection.state(root) == UNCHECKED
+
+
+def lazy_tree(tmp_path):
+    """按需加载：只加载顶层，d0 和 d1 尚未加载"""
+    for name in ('d0', 'd1'):
+        os.makedirs(tmp_path / name / 'inner')
+        (tmp_path / name / 'a.txt').write_text('x')
+        (tmp_path / name / 'inner' / 'b.txt').write_text('x')
+    (tmp_path / 'top.txt').write_text('x')
+    manager = FileManager()
+    root = manager.load_files_level(str(tmp_path))
+    return manager, root
+
+
+def attach(manager, path):
+    node = manager.find_node(path)
+    scanner = FileManager()
+    loaded = scanner.load_files_level(path)
+    manager.attach_children(node, loaded, scanner.node_index, scanner.dir_mtimes)
+    return node
+
+
+def test_lazy_directory_with_unloaded_children_stays_partial(tmp_path):
+    manager, root = lazy_tree(tmp_path)
+    assert root['unloaded_count'] == 2
+    selection = SelectionSet(root['path'])
+    top = manager.find_node(str(tmp_path / 'top.txt'))
+    # 已加载的文件全部勾选，但未加载的目录没有勾选
+    selection.select(top)
+    assert selection.state(root) == PARTIAL
+
+
+def test_lazy_select_and_deselect_unloaded_directory(tmp_path):
+    manager, root = lazy_tree(tmp_path)
+    selection = SelectionSet(root['path'])
+    unloaded = selection.select(root)
+    assert sorted(node['name'] for node in unloaded) == ['d0', 'd1']
+    assert selection.state(root) == CHECKED
+
+    d1 = manager.find_node(str(tmp_path / 'd1'))
+    selection.deselect(d1)
+    assert (selection.state(d1), selection.state(root)) == (UNCHECKED, PARTIAL)
+    selection.select(d1)
+    assert selection.state(root) == CHECKED
+
+
+def test_lazy_counts_follow_attached_directories(tmp_path):
+    manager, root = lazy_tree(tmp_path)
+    d0 = attach(manager, str(tmp_path / 'd0'))
+    # d0 不再是未加载的目录，但其中的 inner 尚未加载
+    assert (root['unloaded_count'], d0['unloaded_count']) == (2, 1)
+
+    selection = SelectionSet(root['path'])
+    selection.select(manager.find_node(str(tmp_path / 'd0' / 'a.txt')))
+    assert selection.state(d0) == PARTIAL
+
+    selection.select(d0)
+    assert selection.state(d0) == CHECKED
+    assert selection.state(root) == PARTIAL
+
+    # 加载完成后重新勾选已勾选目录的新内容（与界面中的流程相同）
+    inner = attach(manager, str(tmp_path / 'd0' / 'inner'))
+    assert d0['unloaded_count'] == 0
+    selection.select(inner)
+    assert selection.state(d0) == CHECKED